@@ -1,16 +1,69 @@
+import re
+import time
 import requests
 import base64
+from typing import Dict, Iterator, List
+from urllib.parse import quote
 from packaging import version
+from utils.metrics import metrics
 
 class GitHubAPI:
     """Handles GitHub API requests."""
-    def __init__(self, token):
+    def __init__(self, token, base_url: str = "https://api.github.com",
+                 connect_timeout: float = 10.0, read_timeout: float = 60.0):
         self.headers = {"Authorization": f"token {token}"}
+        self.base_url = base_url.rstrip("/")
+        # Without a timeout a stalled connection would block its caller forever.
+        self.timeout = (connect_timeout, read_timeout)
+
+    def request(self, method: str, endpoint: str, url: str, **kwargs) -> requests.Response:
+        """Sends a request and records its latency, status and rate-limit headers.
+
+        `endpoint` is a low-cardinality name for the kind of call (e.g.
+        "contents") used to label the metrics. The configured connect and
+        read timeouts apply unless `timeout` is passed.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        start = time.perf_counter()
+        try:
+            response = requests.request(method, url, headers=self.headers, **kwargs)
+        except requests.Timeout:
+            metrics.inc("http_requests_total", endpoint=endpoint, status="timeout")
+            raise
+        except requests.RequestException:
+            metrics.inc("http_requests_total", endpoint=endpoint, status="error")
+            raise
+        finally:
+            metrics.observe("http_request_duration_seconds", time.perf_counter() - start, endpoint=endpoint)
+
+        metrics.inc("http_requests_total", endpoint=endpoint, status=str(response.status_code))
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        if remaining is not None:
+            metrics.set(
+                "rate_limit_remaining",
+                int(remaining),
+                resource=response.headers.get("X-RateLimit-Resource", "core")
+            )
+        return response
+
+    @staticmethod
+    def rate_limited(response: requests.Response) -> bool:
+        """Tells a rate-limit refusal apart from a permission error, both of which may be 403."""
+        return response.status_code == 429 or (
+            response.status_code == 403 and response.headers.get("X-RateLimit-Remaining") == "0"
+        )
+
+    def capped_timeout(self, timeout: float = None):
+        """Returns the connect/read timeouts with both capped at `timeout` seconds."""
+        if timeout is None:
+            return self.timeout
+        timeout = max(timeout, 0.001)
+        return (min(self.timeout[0], timeout), min(self.timeout[1], timeout))
 
     def fetch_readme(self, owner, repo):
         """Fetch the README content of a repository."""
-        api_url = f"https://api.github.com/repos/{owner}/{repo}/readme"
-        response = requests.get(api_url, headers=self.headers)
+        api_url = f"{self.base_url}/repos/{owner}/{repo}/readme"
+        response = self.request("GET", "readme", api_url)
 
         if response.status_code == 200:
             content_base64 = response.json().get("content", "")
@@ -20,47 +73,237 @@ class GitHubAPI:
 
     def fetch_repo_metadata(self, owner, repo):
         """Fetch metadata for a GitHub repository."""
-        api_url = f"https://api.github.com/repos/{owner}/{repo}"
-        response = requests.get(api_url, headers=self.headers)
+        return {
+            "owner": owner,
+            **self.repository_fields(self.fetch_repository(owner, repo)),
+            "collaborators": self.fetch_collaborator_count(owner, repo),
+            "languages": self.fetch_language_list(owner, repo),
+            "url": f"https://github.com/{owner}/{repo}"
+        }
+
+    def fetch_language_list(self, owner: str, repo: str) -> str:
+        """Returns the ";"-separated languages, or "" when they cannot be fetched.
+
+        Languages only narrow which manifests are probed, and no languages
+        means probing all of them, so a failure here must not drop the
+        repository.
+        """
+        try:
+            return ";".join(self.fetch_languages(owner, repo))
+        except Exception as e:
+            print(f"Error fetching languages of {owner}/{repo}, leaving them empty: {e}")
+            return ""
+
+    def fetch_repository(self, owner: str, repo: str) -> Dict:
+        """Fetches the repository object: name, description, counts, pushed_at, etc."""
+        api_url = f"{self.base_url}/repos/{owner}/{repo}"
+        response = self.request("GET", "repository", api_url)
         if response.status_code == 200:
-            data = response.json()
-            collaborators_url = f"{api_url}/collaborators"
-            collaborators = requests.get(collaborators_url, headers=self.headers).json()
-            return {
-                "owner": owner,
-                "name": data.get("name", ""),
-                "description": data.get("description", ""),
-                "stars": data.get("stargazers_count", 0),
-                "forks": data.get("forks_count", 0),
-                "collaborators": len(collaborators),
-                "url": f"https://github.com/{owner}/{repo}"
-            }
+            return response.json()
         raise Exception(f"Failed to fetch repository metadata: {response.status_code}")
-    
-    def fetch_file_content(self, owner: str, repo: str, file_name: str) -> str:
-        """Fetches file content from a GitHub repository."""
-        api_url = f"https://api.github.com/repos/{owner}/{repo}/contents/{file_name}"
-        response = requests.get(api_url, headers=self.headers)
+
+    @staticmethod
+    def repository_fields(data: Dict) -> Dict:
+        """Picks the metadata columns out of a repository object."""
+        return {
+            "name": data.get("name", ""),
+            "description": data.get("description", ""),
+            "stars": data.get("stargazers_count", 0),
+            "forks": data.get("forks_count", 0),
+        }
+
+    def fetch_collaborator_count(self, owner: str, repo: str) -> int:
+        """Counts the collaborators listed on the first page of the collaborators endpoint."""
+        api_url = f"{self.base_url}/repos/{owner}/{repo}/collaborators"
+        response = self.request("GET", "collaborators", api_url)
+        if response.status_code == 200:
+            return len(response.json())
+        if self.rate_limited(response) or response.status_code >= 500:
+            raise Exception(f"Failed to fetch collaborators: {response.status_code}")
+        # The list needs push access; without it there is nothing to count.
+        return 0
+
+    def iter_owner_repositories(self, login: str, page_size: int = 100) -> Iterator[Dict]:
+        """Lists every repository of an organization or user with its metadata.
+
+        Pages through GraphQL `page_size` repositories at a time, so a whole
+        organization costs one request per page instead of several per
+        repository. Rows have the shape of `fetch_repo_metadata`; since the
+        collaborator list needs push access, "collaborators" counts the
+        users who can be mentioned in the repository instead.
+        """
+        github_graphql_api = f"{self.base_url}/graphql"
+        query = """
+        query ($login: String!, $first: Int!, $after: String) {
+          repositoryOwner(login: $login) {
+            repositories(first: $first, after: $after, ownerAffiliations: OWNER,
+                         orderBy: {field: NAME, direction: ASC}) {
+              pageInfo { hasNextPage endCursor }
+              nodes {
+                name
+                owner { login }
+                description
+                stargazerCount
+                forkCount
+                mentionableUsers { totalCount }
+                languages(first: 100, orderBy: {field: SIZE, direction: DESC}) { nodes { name } }
+              }
+            }
+          }
+        }
+        """
+        cursor = None
+        while True:
+            variables = {"login": login, "first": page_size, "after": cursor}
+            response = self.request(
+                "POST",
+                "graphql_repositories",
+                github_graphql_api,
+                json={"query": query, "variables": variables},
+            )
+            if response.status_code != 200:
+                raise Exception(f"Failed to list repositories of {login}: {response.status_code}")
+            body = response.json()
+            owner = (body.get("data") or {}).get("repositoryOwner")
+            if owner is None:
+                raise Exception(f"Failed to list repositories of {login}: {body.get('errors', 'not found')}")
+            repositories = owner["repositories"]
+            for node in repositories["nodes"]:
+                login_name = node["owner"]["login"]
+                yield {
+                    "owner": login_name,
+                    "name": node["name"],
+                    "description": node.get("description") or "",
+                    "stars": node.get("stargazerCount", 0),
+                    "forks": node.get("forkCount", 0),
+                    "collaborators": (node.get("mentionableUsers") or {}).get("totalCount", 0),
+                    "languages": ";".join(language["name"] for language in node["languages"]["nodes"]),
+                    "url": f"https://github.com/{login_name}/{node['name']}"
+                }
+            if not repositories["pageInfo"]["hasNextPage"]:
+                break
+            cursor = repositories["pageInfo"]["endCursor"]
+
+    def fetch_languages(self, owner: str, repo: str) -> Dict[str, int]:
+        """Fetches the bytes of code per language, largest first."""
+        api_url = f"{self.base_url}/repos/{owner}/{repo}/languages"
+        response = self.request("GET", "languages", api_url)
+
+        if response.status_code == 200:
+            return response.json()
+        if response.status_code == 404:
+            return {}
+        raise Exception(f"Failed to fetch languages: {response.status_code}")
+
+    def fetch_file_content(self, owner: str, repo: str, file_name: str, timeout: float = None) -> str:
+        """Fetches file content from a GitHub repository.
+
+        `timeout` caps the read timeout, e.g. to what is left of a time budget.
+        """
+        api_url = f"{self.base_url}/repos/{owner}/{repo}/contents/{quote(file_name)}"
+        response = self.request("GET", "contents", api_url, timeout=self.capped_timeout(timeout))
 
         if response.status_code == 200:
             print(f"Successfully fetched {file_name} from {owner}/{repo}")
             content_base64 = response.json().get("content", "")
             return base64.b64decode(content_base64).decode("utf-8")
-        return ""
-    
+        if response.status_code == 404:
+            return ""
+        raise Exception(f"Failed to fetch {file_name}: {response.status_code}")
+
+    def fetch_tarball(self, owner: str, repo: str, ref: str = None, timeout: float = None) -> requests.Response:
+        """Starts streaming the gzipped tarball of a repository; the caller closes the response."""
+        api_url = f"{self.base_url}/repos/{owner}/{repo}/tarball" + (f"/{ref}" if ref else "")
+        response = self.request("GET", "tarball", api_url, stream=True, timeout=self.capped_timeout(timeout))
+
+        if response.status_code == 200:
+            # Undo any transfer encoding so the stream is the .tar.gz itself.
+            response.raw.decode_content = True
+            return response
+        response.close()
+        raise Exception(f"Failed to fetch tarball: {response.status_code}")
+
+    def fetch_blob(self, owner: str, repo: str, sha: str) -> str:
+        """Fetches a file by its blob SHA."""
+        api_url = f"{self.base_url}/repos/{owner}/{repo}/git/blobs/{sha}"
+        response = self.request("GET", "blobs", api_url)
+
+        if response.status_code == 200:
+            return base64.b64decode(response.json().get("content", "")).decode("utf-8", errors="replace")
+        raise Exception(f"Failed to fetch blob {sha}: {response.status_code}")
+
+    def fetch_tags(self, owner: str, repo: str, limit: int = 100) -> List[Dict]:
+        """Fetches up to `limit` tags as returned by GitHub, 100 per page."""
+        tags = []
+        page = 1
+        while len(tags) < limit:
+            api_url = f"{self.base_url}/repos/{owner}/{repo}/tags"
+            response = self.request("GET", "tags", api_url, params={"per_page": 100, "page": page})
+            if response.status_code != 200:
+                raise Exception(f"Failed to fetch tags: {response.status_code}")
+            batch = response.json()
+            tags.extend(batch)
+            if len(batch) < 100:
+                break
+            page += 1
+        return tags[:limit]
+
+    def fetch_commits(self, owner: str, repo: str, limit: int = 100) -> List[Dict]:
+        """Fetches up to `limit` commits of the default branch, newest first, 100 per page."""
+        commits = []
+        page = 1
+        while len(commits) < limit:
+            api_url = f"{self.base_url}/repos/{owner}/{repo}/commits"
+            response = self.request("GET", "commits", api_url, params={"per_page": 100, "page": page})
+            if response.status_code == 409:
+                # Empty repository.
+                break
+            if response.status_code != 200:
+                raise Exception(f"Failed to fetch commits: {response.status_code}")
+            batch = response.json()
+            commits.extend(batch)
+            if len(batch) < 100:
+                break
+            page += 1
+        return commits[:limit]
+
+    def fetch_commit(self, owner: str, repo: str, sha: str) -> Dict:
+        """Fetches a git commit object, which carries its tree SHA and dates."""
+        api_url = f"{self.base_url}/repos/{owner}/{repo}/git/commits/{sha}"
+        response = self.request("GET", "git_commits", api_url)
+
+        if response.status_code == 200:
+            return response.json()
+        raise Exception(f"Failed to fetch commit {sha}: {response.status_code}")
+
+    def fetch_tree(self, owner: str, repo: str, tree_sha: str = "HEAD", recursive: bool = True):
+        """Lists the entries of a repository tree, or returns None for an empty repository."""
+        api_url = f"{self.base_url}/repos/{owner}/{repo}/git/trees/{tree_sha}"
+        response = self.request("GET", "trees", api_url, params={"recursive": "1"} if recursive else None)
+
+        if response.status_code == 200:
+            return response.json()
+        # 409 is what GitHub answers for a repository without commits.
+        if response.status_code in (404, 409):
+            return None
+        raise Exception(f"Failed to fetch tree {tree_sha}: {response.status_code}")
+
     def check_vulnerabilities(
             self,
             ecosystem,
             dependency_name, 
             dependency_version
         ):
-        dependency_name = "@react/react-dom"
-        dependency_version = "^16.8.0"
         """Check dependencies against a vulnerability database."""
-        github_graphql_api = "https://api.github.com/graphql"
+        vulnerabilities = self.fetch_security_vulnerabilities(ecosystem, dependency_name)
+        return self.filter_vulnerabilities(vulnerabilities, dependency_version)
+
+    def fetch_security_vulnerabilities(self, ecosystem, dependency_name):
+        """Fetch the advisories known for a package, regardless of version."""
+        github_graphql_api = f"{self.base_url}/graphql"
         query = """
         query ($name: String!, $ecosystem: SecurityAdvisoryEcosystem!) {
-          securityVulnerabilities(packageName: $name, ecosystem: $ecosystem, first: 10) {
+          securityVulnerabilities(package: $name, ecosystem: $ecosystem, first: 10) {
             edges {
               node {
                 vulnerableVersionRange
@@ -75,19 +318,24 @@ class GitHubAPI:
         }
         """
         variables = {"name": dependency_name, "ecosystem": ecosystem}
-        response = requests.post(
+        response = self.request(
+            "POST",
+            "graphql",
             github_graphql_api,
-            headers=self.headers,
             json={"query": query, "variables": variables},
         )
         
-        if response.status_code == 200:
-            vulnerabilities = response.json()["data"]["securityVulnerabilities"]["edges"]
-            return self.filter_vulnerabilities(vulnerabilities, dependency_version)
-        else:
-            print(f"Error: {response.status_code}, {response.text}")
-            return []
-        
+        # Failures raise rather than look like "no advisories", so the answer
+        # is neither cached nor checkpointed and a resumed run asks again.
+        if response.status_code != 200:
+            raise Exception(f"Failed to fetch advisories: {response.status_code}, {response.text}")
+        body = response.json()
+        data = body.get("data") or {}
+        if body.get("errors") and data.get("securityVulnerabilities") is None:
+            # GraphQL reports rate limiting as errors in a 200 response.
+            raise Exception(f"Failed to fetch advisories: {body['errors']}")
+        return (data.get("securityVulnerabilities") or {}).get("edges", [])
+
     def filter_vulnerabilities(self, vulnerabilities, dependency_version):
         """
         Filters vulnerabilities to check if the given version is affected.
@@ -113,14 +361,14 @@ class GitHubAPI:
         # Example: "^4.1.0" means >= 4.1.0 and < 5.0.0
         # Use `packaging.version` for precise version handling
         try:
-            if " " in vulnerable_range:  # Handle ranges like ">1.0.0 <2.0.0"
-                conditions = vulnerable_range.split(" ")
-                for condition in conditions:
-                    if not self.satisfies_condition(dependency_version, condition):
-                        return False
-                return True
-            else:
-                return self.satisfies_condition(dependency_version, vulnerable_range)
+            # Handle ranges like ">= 1.0.0, < 2.0.0" as well as ">1.0.0 <2.0.0"
+            conditions = re.findall(r"(>=|<=|==|>|<|=|\^|~)\s*([^\s,]+)", vulnerable_range)
+            for operator, ref_version in conditions:
+                if operator == "=":
+                    operator = "=="
+                if not self.satisfies_condition(dependency_version, operator + ref_version):
+                    return False
+            return bool(conditions)
         except Exception as e:
             print(f"Error parsing range {vulnerable_range}: {e}")
             return False
@@ -0,0 +1,257 @@
+import base64
+import io
+import json
+import os
+import tarfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+from urllib.parse import unquote, urlparse
+
+class FakeGitHub:
+    """Local stand-in for the parts of the GitHub API the analyzer uses.
+
+    Serves a synthetic corpus of `repo_count` repositories (or files recorded
+    on disk, see `load_recorded`) with a fixed per-request latency and the
+    usual rate-limit headers, so stages can be benchmarked without touching
+    api.github.com.
+    """
+    OWNER = "bench"
+    EXTENSION_LANGUAGES = {
+        ".py": "Python", ".js": "JavaScript", ".ts": "TypeScript", ".go": "Go", ".rb": "Ruby",
+        ".php": "PHP", ".java": "Java", ".kt": "Kotlin", ".rs": "Rust", ".cs": "C#",
+        ".swift": "Swift", ".c": "C", ".cpp": "C++", ".dart": "Dart",
+    }
+
+    def __init__(self, repo_count: int = 50, latency: float = 0.0, rate_limit: int = 1_000_000,
+                 tree_limit: int = 100_000):
+        self.repo_count = repo_count
+        # Recursive tree listings with more entries than this are truncated,
+        # as GitHub does.
+        self.tree_limit = tree_limit
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.remaining = rate_limit
+        self.requests = 0
+        self.lock = threading.Lock()
+        # owner/repo -> path -> file content
+        self.files: Dict[str, Dict[str, str]] = {}
+        # owner/repo -> language -> bytes, as the languages endpoint reports it
+        self.languages: Dict[str, Dict[str, int]] = {}
+        # owner/repo -> README, for repositories that link to others
+        self.readmes: Dict[str, str] = {}
+        for index in range(repo_count):
+            self.files[f"{self.OWNER}/repo-{index}"] = self.synthetic_files(index)
+            self.languages[f"{self.OWNER}/repo-{index}"] = {"Python": 50000, "JavaScript": 20000, "Go": 5000}
+        self.server = None
+
+    @staticmethod
+    def synthetic_files(index: int) -> Dict[str, str]:
+        """Returns a small but realistic set of manifests for repository `index`."""
+        packages = [f"package-{(index * 7 + offset) % 200}" for offset in range(20)]
+        return {
+            "requirements.txt": "".join(f"{name}==1.{offset}.0\n" for offset, name in enumerate(packages)),
+            "package.json": json.dumps({
+                "name": f"repo-{index}",
+                "dependencies": {name: f"^2.{offset}.0" for offset, name in enumerate(packages)}
+            }),
+            "go.mod": "module example.com/bench\n\n" + "".join(
+                f"require example.com/{name} v0.{offset}.0\n" for offset, name in enumerate(packages)
+            ),
+        }
+
+    def load_recorded(self, directory: str):
+        """Serves files recorded on disk as `<directory>/<owner>/<repo>/<path>`.
+
+        Languages are estimated from file extensions.
+        """
+        self.files = {}
+        self.languages = {}
+        for owner in sorted(os.listdir(directory)):
+            for repo in sorted(os.listdir(os.path.join(directory, owner))):
+                root = os.path.join(directory, owner, repo)
+                files = self.files[f"{owner}/{repo}"] = {}
+                for current, _, names in os.walk(root):
+                    for name in names:
+                        path = os.path.join(current, name)
+                        with open(path, mode="r", encoding="utf-8", errors="replace") as file:
+                            files[os.path.relpath(path, root).replace(os.sep, "/")] = file.read()
+                languages = self.languages[f"{owner}/{repo}"] = {}
+                for path, content in files.items():
+                    language = self.EXTENSION_LANGUAGES.get(os.path.splitext(path)[1])
+                    if language:
+                        languages[language] = languages.get(language, 0) + len(content)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def seed_url(self) -> str:
+        """URL of the repository whose README links to every other one."""
+        return f"https://github.com/{self.OWNER}/awesome-list"
+
+    def start(self) -> "FakeGitHub":
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fake.handle(self, "GET")
+
+            def do_POST(self):
+                fake.handle(self, "POST")
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name="fake-github", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handle(self, request: BaseHTTPRequestHandler, method: str):
+        if self.latency:
+            time.sleep(self.latency)
+        with self.lock:
+            self.requests += 1
+            # The request that uses up the limit is still served.
+            exhausted = self.remaining == 0
+            self.remaining = max(0, self.remaining - 1)
+            remaining = self.remaining
+        if exhausted:
+            return self.respond(request, 403, {"message": "API rate limit exceeded"}, remaining)
+
+        path = unquote(urlparse(request.path).path)
+        if method == "POST" and path == "/graphql":
+            length = int(request.headers.get("Content-Length", 0))
+            return self.respond(request, 200, self.graphql(json.loads(request.rfile.read(length))), remaining)
+
+        parts = path.strip("/").split("/")
+        if len(parts) < 3 or parts[0] != "repos":
+            return self.respond(request, 404, {"message": "Not Found"}, remaining)
+        key, rest = f"{parts[1]}/{parts[2]}", parts[3:]
+
+        if key == f"{self.OWNER}/awesome-list" and rest == ["readme"]:
+            readme = "\n".join(f"- https://github.com/{name}" for name in self.files)
+            return self.respond(request, 200, {"content": self.encode(readme)}, remaining)
+        if key in self.readmes and rest == ["readme"]:
+            return self.respond(request, 200, {"content": self.encode(self.readmes[key])}, remaining)
+        if key not in self.files:
+            return self.respond(request, 404, {"message": "Not Found"}, remaining)
+        if not rest:
+            return self.respond(request, 200, {
+                "name": parts[2],
+                "description": f"Synthetic repository {key}",
+                "stargazers_count": len(key) * 10,
+                "forks_count": len(key),
+                "pushed_at": f"2026-01-{1 + sum(map(ord, key)) % 28:02d}T00:00:00Z",
+            }, remaining)
+        if rest[0] == "tarball":
+            return self.respond_bytes(request, 200, self.tarball(key), "application/x-gzip", remaining)
+        if rest == ["languages"]:
+            languages = self.languages.get(key, {})
+            return self.respond(request, 200, dict(sorted(languages.items(), key=lambda item: -item[1])), remaining)
+        if rest == ["collaborators"]:
+            return self.respond(request, 200, [{"login": parts[1]}], remaining)
+        if rest[:2] == ["git", "trees"] and len(rest) == 3:
+            recursive = "recursive=" in urlparse(request.path).query
+            return self.respond(request, 200, self.tree(key, rest[2], recursive), remaining)
+        if rest[0] == "contents":
+            content = self.files[key].get("/".join(rest[1:]))
+            if content is None:
+                return self.respond(request, 404, {"message": "Not Found"}, remaining)
+            return self.respond(request, 200, {"content": self.encode(content)}, remaining)
+        return self.respond(request, 404, {"message": "Not Found"}, remaining)
+
+    def tree(self, key: str, sha: str, recursive: bool) -> Dict:
+        """Lists a directory; tree SHAs are the hex-encoded directory path, HEAD is the root."""
+        directory = "" if sha == "HEAD" else bytes.fromhex(sha).decode("utf-8")
+        prefix = f"{directory}/" if directory else ""
+        entries = {}
+        for path in self.files[key]:
+            if not path.startswith(prefix):
+                continue
+            parts = path[len(prefix):].split("/")
+            for depth in range(1, len(parts) if recursive else 1):
+                subtree = "/".join(parts[:depth])
+                entries[subtree] = {"path": subtree, "type": "tree",
+                                    "sha": f"{prefix}{subtree}".encode("utf-8").hex()}
+            if recursive or len(parts) == 1:
+                entries["/".join(parts)] = {"path": "/".join(parts), "type": "blob", "sha": "0" * 40}
+            else:
+                entries[parts[0]] = {"path": parts[0], "type": "tree",
+                                     "sha": f"{prefix}{parts[0]}".encode("utf-8").hex()}
+        tree = sorted(entries.values(), key=lambda entry: entry["path"])
+        truncated = recursive and len(tree) > self.tree_limit
+        return {"sha": sha, "tree": tree[:self.tree_limit] if truncated else tree, "truncated": truncated}
+
+    def tarball(self, key: str) -> bytes:
+        """Builds the gzipped tarball GitHub would serve, rooted at `<owner>-<repo>-<sha>/`."""
+        buffer = io.BytesIO()
+        root = f"{key.replace('/', '-')}-0000000"
+        with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+            for path, content in sorted(self.files[key].items()):
+                data = content.encode("utf-8")
+                member = tarfile.TarInfo(f"{root}/{path}")
+                member.size = len(data)
+                archive.addfile(member, io.BytesIO(data))
+        return buffer.getvalue()
+
+    def graphql(self, payload: Dict) -> Dict:
+        if "repositoryOwner" in payload.get("query", ""):
+            return self.graphql_repositories(payload["variables"])
+        name = payload.get("variables", {}).get("name", "")
+        # Every tenth package has a known advisory.
+        edges = []
+        if name.endswith("0"):
+            edges.append({"node": {
+                "vulnerableVersionRange": "< 1.5.0",
+                "severity": "HIGH",
+                "advisory": {"description": f"Synthetic advisory for {name}",
+                             "permalink": f"https://github.com/advisories/{name}"}
+            }})
+        return {"data": {"securityVulnerabilities": {"edges": edges}}}
+
+    def graphql_repositories(self, variables: Dict) -> Dict:
+        login = variables["login"]
+        keys = sorted(key for key in self.files if key.split("/")[0].lower() == login.lower())
+        if not keys:
+            return {"data": {"repositoryOwner": None}}
+        start = int(variables.get("after") or 0)
+        end = start + variables["first"]
+        nodes = [{
+            "name": key.split("/")[1],
+            "owner": {"login": key.split("/")[0]},
+            "description": f"Synthetic repository {key}",
+            "stargazerCount": 10,
+            "forkCount": 2,
+            "mentionableUsers": {"totalCount": 3},
+            "languages": {"nodes": [{"name": language} for language in self.languages.get(key, {})]},
+        } for key in keys[start:end]]
+        page_info = {"hasNextPage": end < len(keys), "endCursor": str(end)}
+        return {"data": {"repositoryOwner": {"repositories": {"pageInfo": page_info, "nodes": nodes}}}}
+
+    def respond(self, request: BaseHTTPRequestHandler, status: int, body, remaining: int):
+        self.respond_bytes(request, status, json.dumps(body).encode("utf-8"), "application/json", remaining)
+
+    def respond_bytes(self, request: BaseHTTPRequestHandler, status: int, data: bytes, content_type: str,
+                      remaining: int):
+        request.send_response(status)
+        request.send_header("Content-Type", content_type)
+        request.send_header("Content-Length", str(len(data)))
+        request.send_header("X-RateLimit-Limit", str(self.rate_limit))
+        request.send_header("X-RateLimit-Remaining", str(remaining))
+        request.send_header("X-RateLimit-Reset", str(int(time.time()) + 3600))
+        request.send_header("X-RateLimit-Resource", "graphql" if request.path == "/graphql" else "core")
+        request.end_headers()
+        request.wfile.write(data)
+
+    @staticmethod
+    def encode(content: str) -> str:
+        return base64.b64encode(content.encode("utf-8")).decode("ascii")
@@ -0,0 +1,411 @@
+"""Generates synthetic manifests for every format in `MANIFEST_PARSERS`.
+
+Usage (from the repository root):
+
+    python -m benchmarks.manifest_corpus corpus/ --size 50000
+
+Each generator takes the number of dependency entries to produce and a seeded
+`random.Random`, so the same size always yields the same file.
+"""
+import argparse
+import json
+import os
+import random
+from typing import Callable, Dict
+
+from utils.dependency_extractor import MANIFEST_PARSERS
+
+def _names(count: int, rng: random.Random, separator: str = "-"):
+    words = ["core", "util", "http", "json", "log", "test", "data", "cli", "async", "crypto",
+             "yaml", "xml", "cache", "auth", "db", "queue", "parse", "net", "io", "config"]
+    return [f"{rng.choice(words)}{separator}{rng.choice(words)}{separator}{index}" for index in range(count)]
+
+def _version(rng: random.Random) -> str:
+    return f"{rng.randint(0, 9)}.{rng.randint(0, 30)}.{rng.randint(0, 99)}"
+
+def _sha(rng: random.Random, length: int = 40) -> str:
+    return "".join(rng.choice("0123456789abcdef") for _ in range(length))
+
+def requirements_txt(size, rng):
+    lines = ["# Generated requirements", ""]
+    for name in _names(size, rng):
+        lines.append(f"{name}{rng.choice(['==', '>=', '~=', '<'])}{_version(rng)}")
+    return "\n".join(lines) + "\n"
+
+def pyproject_toml(size, rng):
+    lines = ['[tool.poetry]', 'name = "bench"', 'version = "0.1.0"', "", "[tool.poetry.dependencies]",
+             'python = "^3.11"']
+    for name in _names(size, rng):
+        if rng.random() < 0.2:
+            lines.append(f'{name} = {{version = "^{_version(rng)}", extras = ["all"]}}')
+        else:
+            lines.append(f'{name} = "^{_version(rng)}"')
+    return "\n".join(lines) + "\n"
+
+def pipfile(size, rng):
+    lines = ["[[source]]", 'url = "https://pypi.org/simple"', "", "[packages]"]
+    lines += [f'{name} = "=={_version(rng)}"' for name in _names(size, rng)]
+    return "\n".join(lines) + "\n"
+
+def pipfile_lock(size, rng):
+    requires = {name: {"version": f"=={_version(rng)}"} for name in _names(size, rng)}
+    default = {name: {"hashes": [f"sha256:{_sha(rng, 64)}"], "version": info["version"]}
+               for name, info in requires.items()}
+    return json.dumps({"_meta": {"hash": {"sha256": _sha(rng, 64)}, "requires": requires},
+                       "default": default, "develop": {}}, indent=4)
+
+def setup_py(size, rng):
+    requirements = ", ".join(f"'{name}>={_version(rng)}'" for name in _names(size, rng))
+    return f"from setuptools import setup\n\nsetup(\n    name='bench',\n    install_requires=[{requirements}],\n)\n"
+
+def setup_cfg(size, rng):
+    requirements = ", ".join(f"{name}>={_version(rng)}" for name in _names(size, rng))
+    return f"[metadata]\nname = bench\n\n[options]\ninstall_requires = {requirements}\n"
+
+def environment_yml(size, rng):
+    names = _names(size, rng)
+    conda = [f"  - {name}={_version(rng)}" for name in names[: size // 2]]
+    pip = [f"    - {name}=={_version(rng)}" for name in names[size // 2:]]
+    return "\n".join(["name: bench", "channels:", "  - conda-forge", "dependencies:"] + conda + ["  - pip:"] + pip) + "\n"
+
+def package_json(size, rng):
+    names = _names(size, rng)
+    return json.dumps({
+        "name": "bench",
+        "version": "1.0.0",
+        "dependencies": {name: f"^{_version(rng)}" for name in names[: size * 3 // 4]},
+        "devDependencies": {name: f"~{_version(rng)}" for name in names[size * 3 // 4:]},
+    }, indent=2)
+
+def package_lock_json(size, rng):
+    # Lockfile v2 carries both the legacy "dependencies" tree and "packages".
+    names = _names(size, rng)
+    versions = {name: _version(rng) for name in names}
+    requires = lambda: {rng.choice(names): f"^{_version(rng)}" for _ in range(rng.randint(0, 4))}
+    packages = {"": {"name": "bench", "version": "1.0.0",
+                     "dependencies": {name: f"^{versions[name]}" for name in names[:20]}}}
+    dependencies = {}
+    for name in names:
+        entry = {"version": versions[name],
+                 "resolved": f"https://registry.npmjs.org/{name}/-/{name}-{versions[name]}.tgz",
+                 "integrity": f"sha512-{_sha(rng, 86)}=="}
+        children = requires()
+        packages[f"node_modules/{name}"] = dict(entry, dependencies=children) if children else entry
+        dependencies[name] = dict(entry, requires=children) if children else entry
+    return json.dumps({"name": "bench", "version": "1.0.0", "lockfileVersion": 2, "requires": True,
+                       "packages": packages, "dependencies": dependencies}, indent=2)
+
+def yarn_lock(size, rng):
+    names = _names(size, rng)
+    blocks = ["# THIS IS AN AUTOGENERATED FILE. DO NOT EDIT THIS FILE DIRECTLY.", "# yarn lockfile v1", ""]
+    for name in names:
+        version = _version(rng)
+        block = [f'"{name}@^{version}":', f'  version "{version}"',
+                 f'  resolved "https://registry.yarnpkg.com/{name}/-/{name}-{version}.tgz#{_sha(rng)}"',
+                 f"  integrity sha512-{_sha(rng, 86)}=="]
+        children = rng.sample(names, min(len(names), rng.randint(0, 3)))
+        if children:
+            block.append("  dependencies:")
+            block += [f'    {child} "^{_version(rng)}"' for child in children]
+        blocks.append("\n".join(block) + "\n")
+    return "\n".join(blocks)
+
+def webpack_config_js(size, rng):
+    lines = [f"const plugin{index} = require('{name}');" for index, name in enumerate(_names(size, rng))]
+    return "\n".join(lines) + "\nmodule.exports = { mode: 'production' };\n"
+
+def pnpm_lock_yaml(size, rng):
+    names = _names(size, rng)
+    versions = {name: _version(rng) for name in names}
+    lines = ["lockfileVersion: '6.0'", "", "dependencies:"]
+    for name in names[:20]:
+        lines += [f"  {name}:", f"    specifier: ^{versions[name]}", f"    version: {versions[name]}"]
+    lines += ["", "packages:", ""]
+    for name in names:
+        lines += [f"  /{name}@{versions[name]}:",
+                  f"    resolution: {{integrity: sha512-{_sha(rng, 86)}==}}",
+                  f"    version: {versions[name]}"]
+        children = rng.sample(names, min(len(names), rng.randint(0, 3)))
+        if children:
+            lines.append("    dependencies:")
+            lines += [f"      {child}: {versions[child]}" for child in children]
+        lines += ["    dev: false", ""]
+    return "\n".join(lines)
+
+def bower_json(size, rng):
+    return json.dumps({"name": "bench", "dependencies": {name: f"~{_version(rng)}" for name in _names(size, rng)}},
+                      indent=2)
+
+def gemfile(size, rng):
+    lines = ["source 'https://rubygems.org'", ""]
+    lines += [f"gem '{name}', '~> {_version(rng)}'" for name in _names(size, rng, "_")]
+    return "\n".join(lines) + "\n"
+
+def gemfile_lock(size, rng):
+    names = _names(size, rng, "_")
+    lines = ["GEM", "  remote: https://rubygems.org/", "  specs:"]
+    for name in names:
+        lines.append(f"    {name} ({_version(rng)})")
+        lines += [f"      {child} (>= {_version(rng)})" for child in rng.sample(names, min(len(names), rng.randint(0, 3)))]
+    lines += ["", "PLATFORMS", "  ruby", "", "DEPENDENCIES"]
+    lines += [f"  {name}" for name in names[:20]]
+    return "\n".join(lines) + "\n"
+
+def composer_json(size, rng):
+    return json.dumps({"name": "bench/app",
+                       "require": {f"vendor{index % 50}/{name}": f"^{_version(rng)}"
+                                   for index, name in enumerate(_names(size, rng))}}, indent=4)
+
+def composer_lock(size, rng):
+    names = [f"vendor{index % 50}/{name}" for index, name in enumerate(_names(size, rng))]
+    packages = [{"name": name, "version": f"v{_version(rng)}",
+                 "require": {rng.choice(names): f"^{_version(rng)}" for _ in range(rng.randint(0, 3))}}
+                for name in names]
+    return json.dumps({"content-hash": _sha(rng, 32), "packages": packages, "packages-dev": []}, indent=4)
+
+def pom_xml(size, rng):
+    dependencies = "".join(
+        f"\n    <dependency>\n      <groupId>org.bench.{name.split('-')[0]}</groupId>"
+        f"\n      <artifactId>{name}</artifactId>\n      <version>{_version(rng)}</version>\n    </dependency>"
+        for name in _names(size, rng)
+    )
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<project xmlns="http://maven.apache.org/POM/4.0.0" '
+            'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+            'xsi:schemaLocation="http://maven.apache.org/POM/4.0.0 http://maven.apache.org/xsd/maven-4.0.0.xsd">\n'
+            "  <modelVersion>4.0.0</modelVersion>\n  <groupId>org.bench</groupId>\n"
+            "  <artifactId>bench</artifactId>\n  <version>1.0.0</version>\n"
+            f"  <dependencies>{dependencies}\n  </dependencies>\n</project>\n")
+
+def gradle_properties(size, rng):
+    return "\n".join(f"{name.replace('-', '.')}Version={_version(rng)}" for name in _names(size, rng)) + "\n"
+
+def gradle_lockfile(size, rng):
+    # The parser expects the JSON flavour of the lockfile.
+    return json.dumps({"dependencies": {f"org.bench:{name}": {"version": _version(rng)}
+                                        for name in _names(size, rng)}}, indent=2)
+
+def build_gradle(size, rng):
+    lines = ["plugins { id 'java' }", "", "dependencies {"]
+    lines += [f"    implementation 'org.bench:{name}:{_version(rng)}'" for name in _names(size, rng)]
+    return "\n".join(lines + ["}"]) + "\n"
+
+def build_xml(size, rng):
+    modules = "\n".join(f'  <ivy-module name="{name}" rev="{_version(rng)}"/>' for name in _names(size, rng))
+    return f'<project name="bench" default="build">\n{modules}\n</project>\n'
+
+def build_gradle_kts(size, rng):
+    lines = ["plugins { java }", "", "dependencies {"]
+    lines += [f'    implementation("org.bench:{name}:{_version(rng)}")' for name in _names(size, rng)]
+    return "\n".join(lines + ["}"]) + "\n"
+
+def settings_gradle(size, rng):
+    return "rootProject.name = 'bench'\n" + "\n".join(f"include '{name}'" for name in _names(size, rng)) + "\n"
+
+def cargo_toml(size, rng):
+    lines = ["[package]", 'name = "bench"', 'version = "0.1.0"', "", "[dependencies]"]
+    lines += [f'{name} = "{_version(rng)}"' for name in _names(size, rng)]
+    return "\n".join(lines) + "\n"
+
+def cargo_lock(size, rng):
+    names = _names(size, rng)
+    versions = {name: _version(rng) for name in names}
+    blocks = ["# This file is automatically @generated by Cargo.", "version = 3", ""]
+    for name in names:
+        block = ["[[package]]", f'name = "{name}"', f'version = "{versions[name]}"',
+                 'source = "registry+https://github.com/rust-lang/crates.io-index"',
+                 f'checksum = "{_sha(rng, 64)}"']
+        children = rng.sample(names, min(len(names), rng.randint(0, 3)))
+        if children:
+            block.append("dependencies = [")
+            block += [f' "{child}",' for child in children]
+            block.append("]")
+        blocks.append("\n".join(block) + "\n")
+    return "\n".join(blocks)
+
+def packages_config(size, rng):
+    packages = "\n".join(f'  <package id="Bench.{name}" version="{_version(rng)}" targetFramework="net48" />'
+                         for name in _names(size, rng))
+    return f'<?xml version="1.0" encoding="utf-8"?>\n<packages>\n{packages}\n</packages>\n'
+
+def project_json(size, rng):
+    return json.dumps({"dependencies": {f"Bench.{name}": _version(rng) for name in _names(size, rng)}}, indent=2)
+
+def csproj(size, rng):
+    references = "\n".join(f'    <PackageReference Include="Bench.{name}" Version="{_version(rng)}" />'
+                           for name in _names(size, rng))
+    return (f'<Project Sdk="Microsoft.NET.Sdk">\n  <ItemGroup>\n{references}\n  </ItemGroup>\n</Project>\n')
+
+def nuspec(size, rng):
+    dependencies = "\n".join(f'        <dependency id="Bench.{name}" version="{_version(rng)}" />'
+                             for name in _names(size, rng))
+    return ('<?xml version="1.0"?>\n'
+            '<package xmlns="http://schemas.microsoft.com/packaging/2013/05/nuspec.xsd">\n'
+            "  <metadata>\n    <id>Bench</id>\n    <version>1.0.0</version>\n"
+            f"    <dependencies>\n      <group>\n{dependencies}\n      </group>\n    </dependencies>\n"
+            "  </metadata>\n</package>\n")
+
+def project_assets_json(size, rng):
+    libraries = {f"Bench.{name}/{_version(rng)}": {"type": "package", "version": _version(rng)}
+                 for name in _names(size, rng)}
+    return json.dumps({"version": 3, "targets": {"net8.0": {"libraries": libraries}}}, indent=2)
+
+def packages_lock_json(size, rng):
+    return json.dumps({"version": 1, "dependencies": {
+        f"Bench.{name}": {"type": "Direct", "requested": f"[{_version(rng)}, )", "version": _version(rng)}
+        for name in _names(size, rng)}}, indent=2)
+
+def paket(size, rng):
+    return "source https://api.nuget.org/v3/index.json\n\n" + "".join(
+        f"nuget Bench.{name} {_version(rng)}\n" for name in _names(size, rng))
+
+def paket_lock(size, rng):
+    return "NUGET\n  remote: https://api.nuget.org/v3/index.json\n" + "".join(
+        f"    Bench.{name} ({_version(rng)})\n" for name in _names(size, rng))
+
+def go_mod(size, rng):
+    lines = ["module example.com/bench", "", "go 1.21", ""]
+    lines += [f"require example.com/{name} v{_version(rng)}" for name in _names(size, rng, "/")]
+    return "\n".join(lines) + "\n"
+
+def go_sum(size, rng):
+    lines = []
+    for name in _names(size // 2 + 1, rng, "/"):
+        version = f"v{_version(rng)}"
+        lines.append(f"example.com/{name} {version} h1:{_sha(rng, 43)}=")
+        lines.append(f"example.com/{name} {version}/go.mod h1:{_sha(rng, 43)}=")
+    return "\n".join(lines[:size]) + "\n"
+
+def glide_lock(size, rng):
+    lines = [f"hash: {_sha(rng, 64)}", "imports:"]
+    for name in _names(size, rng, "/"):
+        lines += [f"- name: github.com/{name}", f"  version: {_sha(rng)}"]
+    return "\n".join(lines) + "\n"
+
+def glide_yaml(size, rng):
+    # The parser reads `import` as a mapping of package to version.
+    return "package: example.com/bench\nimport:\n" + "".join(
+        f"  github.com/{name}: v{_version(rng)}\n" for name in _names(size, rng, "/"))
+
+def gogradle_lock(size, rng):
+    return json.dumps({"dependencies": {f"github.com/{name}": {"version": _sha(rng)}
+                                        for name in _names(size, rng, "/")}}, indent=2)
+
+def gopkg_lock(size, rng):
+    return "".join(f'[[projects]]\n  name = "github.com/{name}"\n  revision = "{_sha(rng)}"\n\n'
+                   for name in _names(size, rng, "/"))
+
+def godeps_lock(size, rng):
+    return "".join(f"github.com/{name} {_sha(rng)}\n" for name in _names(size, rng, "/"))
+
+def cmakelists_txt(size, rng):
+    lines = ["cmake_minimum_required(VERSION 3.20)", "project(bench)"]
+    lines += [f"find_package({name.replace('-', '_')} {_version(rng)} REQUIRED)" for name in _names(size, rng)]
+    return "\n".join(lines) + "\n"
+
+def makefile(size, rng):
+    return "".join(f"{name}: {name}.o\n\t$(CC) -o $@ $^\n\n" for name in _names(size, rng))
+
+def pubspec_yaml(size, rng):
+    return "name: bench\nenvironment:\n  sdk: '>=3.0.0 <4.0.0'\ndependencies:\n" + "".join(
+        f"  {name}: ^{_version(rng)}\n" for name in _names(size, rng, "_"))
+
+def podfile(size, rng):
+    return "platform :ios, '15.0'\n\ntarget 'Bench' do\n" + "".join(
+        f"  pod '{name}', '~> {_version(rng)}'\n" for name in _names(size, rng)) + "end\n"
+
+def podfile_lock(size, rng):
+    names = _names(size, rng)
+    lines = ["PODS:"]
+    for name in names:
+        lines.append(f"  - {name} ({_version(rng)}):")
+        lines += [f"    - {child} (~> {_version(rng)})" for child in rng.sample(names, min(len(names), rng.randint(0, 3)))]
+    lines += ["", "DEPENDENCIES:"] + [f"  - {name} (~> {_version(rng)})" for name in names[:20]]
+    return "\n".join(lines) + "\n\nCOCOAPODS: 1.15.2\n"
+
+def packages_swift(size, rng):
+    packages = ",\n".join(f'        .package(url: "https://github.com/bench/{name}.git", from: "{_version(rng)}")'
+                          for name in _names(size, rng))
+    return ('// swift-tools-version:5.9\nimport PackageDescription\n\nlet package = Package(\n'
+            f'    name: "Bench",\n    dependencies: [\n{packages}\n    ]\n)\n')
+
+def cartfile(size, rng):
+    return "".join(f'binary "https://bench.example.com/{name}.json" "{_version(rng)}"\n'
+                   for name in _names(size, rng))
+
+GENERATORS: Dict[str, Callable[[int, random.Random], str]] = {
+    "requirements.txt": requirements_txt,
+    "pyproject.toml": pyproject_toml,
+    "Pipfile": pipfile,
+    "pipfile.toml": pipfile,
+    "pipfile.lock": pipfile_lock,
+    "setup.py": setup_py,
+    "setup.cfg": setup_cfg,
+    "environment.yml": environment_yml,
+    "package.json": package_json,
+    "package-lock.json": package_lock_json,
+    "yarn.lock": yarn_lock,
+    "webpack.config.js": webpack_config_js,
+    "pnpm-lock.yaml": pnpm_lock_yaml,
+    "bower.json": bower_json,
+    "Gemfile": gemfile,
+    "Gemfile.lock": gemfile_lock,
+    "composer.json": composer_json,
+    "composer.lock": composer_lock,
+    "pom.xml": pom_xml,
+    "gradle.properties": gradle_properties,
+    "gradle.lockfile": gradle_lockfile,
+    "build.gradle": build_gradle,
+    "build.xml": build_xml,
+    "build.gradle.kts": build_gradle_kts,
+    "settings.gradle": settings_gradle,
+    "Cargo.toml": cargo_toml,
+    "Cargo.lock": cargo_lock,
+    "packages.config": packages_config,
+    "project.json": project_json,
+    ".csproj": csproj,
+    ".nuspec": nuspec,
+    "project.assets.json": project_assets_json,
+    "packages.lock.json": packages_lock_json,
+    ".paket": paket,
+    "paket.dependencies": paket,
+    "paket.lock": paket_lock,
+    "go.mod": go_mod,
+    "go.sum": go_sum,
+    "glide.lock": glide_lock,
+    "glide.yaml": glide_yaml,
+    "gogradle.lock": gogradle_lock,
+    "Gopkg.lock": gopkg_lock,
+    "Godeps.lock": godeps_lock,
+    "vendor.conf": godeps_lock,
+    "CMakeLists.txt": cmakelists_txt,
+    "Makefile": makefile,
+    "pubspec.yaml": pubspec_yaml,
+    "Podfile": podfile,
+    "Podfile.lock": podfile_lock,
+    "packages.swift": packages_swift,
+    "Cartfile": cartfile,
+}
+
+def generate(file_name: str, size: int, seed: int = 0) -> str:
+    """Returns a manifest of `file_name`'s format with roughly `size` entries."""
+    return GENERATORS[file_name](size, random.Random(f"{file_name}:{size}:{seed}"))
+
+def write_corpus(directory: str, size: int, seed: int = 0):
+    """Writes one manifest per supported format into `directory`."""
+    os.makedirs(directory, exist_ok=True)
+    for file_name in MANIFEST_PARSERS:
+        with open(os.path.join(directory, file_name), mode="w", encoding="utf-8") as file:
+            file.write(generate(file_name, size, seed))
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic manifest corpus.")
+    parser.add_argument("directory", help="Directory to write the manifests to")
+    parser.add_argument("--size", type=int, default=1000, help="Dependency entries per manifest")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    write_corpus(args.directory, args.size, args.seed)
+    print(f"Wrote {len(MANIFEST_PARSERS)} manifests with {args.size} entries each to {args.directory}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Measures throughput and memory of every manifest parser.
+
+Usage (from the repository root):
+
+    python -m benchmarks.parser_benchmarks --size 50000 --only package-lock.json,pnpm-lock.yaml
+
+Timing and memory are measured in separate passes because tracemalloc slows
+allocation-heavy parsers down considerably.
+"""
+import argparse
+import time
+import tracemalloc
+
+from utils.dependency_extractor import MANIFEST_PARSERS
+from benchmarks.manifest_corpus import generate
+
+def benchmark(file_name: str, content: str, repeat: int):
+    """Returns (best seconds, entries parsed, peak traced bytes) for one parser."""
+    parser = MANIFEST_PARSERS[file_name]
+    best = float("inf")
+    entries = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        entries = len(parser(content))
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    parser(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, entries, peak
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the manifest parsers.")
+    parser.add_argument("--size", type=int, default=10000, help="Dependency entries per manifest")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per parser; the best is kept")
+    parser.add_argument("--only", help="Comma-separated manifest names to benchmark")
+    args = parser.parse_args()
+
+    file_names = args.only.split(",") if args.only else list(MANIFEST_PARSERS)
+    print(f"{'manifest':<22}{'size MB':>9}{'entries':>10}{'seconds':>10}{'MB/s':>9}"
+          f"{'entries/s':>12}{'peak MB':>9}")
+    for file_name in file_names:
+        content = generate(file_name, args.size)
+        megabytes = len(content.encode("utf-8")) / 1e6
+        try:
+            seconds, entries, peak = benchmark(file_name, content, args.repeat)
+        except Exception as e:
+            print(f"{file_name:<22}{megabytes:>9.2f}  failed: {type(e).__name__}: {e}")
+            continue
+        print(f"{file_name:<22}{megabytes:>9.2f}{entries:>10}{seconds:>10.4f}"
+              f"{megabytes / seconds if seconds else 0:>9.1f}"
+              f"{entries / seconds if seconds else 0:>12.0f}{peak / 1e6:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Benchmarks the analyzer stages against a local fake GitHub server.
+
+Usage (from the repository root):
+
+    python -m benchmarks.run_benchmarks --repos 200 --latency 0.02
+
+Each stage runs in a fresh process so peak RSS is measured per stage.
+"""
+import argparse
+import contextlib
+import csv
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+from api.github_api import GitHubAPI
+from utils.csv_writer import CSVWriter
+from utils.background_writer import BackgroundWriter
+from utils.manifest_discovery import ManifestDiscovery
+from services.repository_service import RepositoryService
+from services.dependency_service import DependencyService, FETCH_MODES
+from services.vulnerability_service import VulnerabilityService
+from services.pipeline_service import PipelineService
+from benchmarks.fake_github import FakeGitHub
+from main import REPOSITORY_HEADERS, DEPENDENCY_HEADERS, VULNERABILITY_HEADERS
+
+STAGES = ["r", "d", "v", "a"]
+
+def count_repositories(file_name: str) -> int:
+    with open(file_name, mode="r", encoding="utf-8") as file:
+        return len({row["repo"] if "repo" in row else row["name"] for row in csv.DictReader(file)})
+
+def run_stage(stage: str, base_url: str, seed_url: str, directory: str, root_only: bool = False,
+              fetch_mode: str = "contents") -> int:
+    """Runs one stage inside `directory` and returns the number of repositories processed."""
+    github_api = GitHubAPI(token="benchmark", base_url=base_url)
+    discovery = None if root_only else ManifestDiscovery()
+    os.chdir(directory)
+
+    if stage == "r":
+        with BackgroundWriter(CSVWriter("repository_metadata.csv", REPOSITORY_HEADERS)) as writer:
+            RepositoryService(github_api, writer).process(seed_url)
+        return count_repositories("repository_metadata.csv")
+
+    if stage == "d":
+        with BackgroundWriter(CSVWriter("dependencies.csv", DEPENDENCY_HEADERS)) as writer:
+            service = DependencyService(github_api, writer, discovery=discovery, fetch_mode=fetch_mode)
+            with open("repository_metadata.csv", mode="r", encoding="utf-8") as file:
+                for row in csv.DictReader(file):
+                    service.analyze_dependencies(row["owner"], row["name"], row["url"], row.get("languages"))
+        return count_repositories("dependencies.csv")
+
+    if stage == "v":
+        with BackgroundWriter(CSVWriter("vulnerabilities.csv", VULNERABILITY_HEADERS)) as writer:
+            service = VulnerabilityService(github_api, writer)
+            with open("dependencies.csv", mode="r", encoding="utf-8") as file:
+                for row in csv.DictReader(file):
+                    service.process(row["repo"], row["ecosystem"], row["source_file"],
+                                    row["name"], row["version"])
+        return count_repositories("dependencies.csv")
+
+    writers = [
+        BackgroundWriter(CSVWriter("pipeline_repositories.csv", REPOSITORY_HEADERS)),
+        BackgroundWriter(CSVWriter("pipeline_dependencies.csv", DEPENDENCY_HEADERS)),
+        BackgroundWriter(CSVWriter("pipeline_vulnerabilities.csv", VULNERABILITY_HEADERS)),
+    ]
+    try:
+        PipelineService(github_api, *writers, discovery=discovery, fetch_mode=fetch_mode).run(seed_url)
+    finally:
+        for writer in writers:
+            writer.close()
+    return count_repositories("pipeline_dependencies.csv")
+
+def stage_process(stage, base_url, seed_url, directory, root_only, fetch_mode, results):
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        repositories = run_stage(stage, base_url, seed_url, directory, root_only, fetch_mode)
+        elapsed = time.perf_counter() - start
+    # ru_maxrss is reported in kilobytes on Linux.
+    results.put((repositories, elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark analyzer stages against a fake GitHub API.")
+    parser.add_argument("--repos", type=int, default=50, help="Number of synthetic repositories")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--rate-limit", type=int, default=1_000_000, help="Requests before 403s start")
+    parser.add_argument("--recorded", metavar="DIR", help="Serve files recorded as DIR/owner/repo/path")
+    parser.add_argument("--root-only", action="store_true",
+                        help="Probe manifests at the root instead of listing repository trees")
+    parser.add_argument("--fetch-mode", choices=FETCH_MODES, default="contents",
+                        help="How the dependency stages download manifests")
+    parser.add_argument("--stages", default=",".join(STAGES), help="Comma-separated stages to run")
+    args = parser.parse_args()
+
+    fake = FakeGitHub(args.repos, args.latency, args.rate_limit)
+    if args.recorded:
+        fake.load_recorded(args.recorded)
+    fake.start()
+
+    print(f"{'stage':<6}{'seconds':>10}{'requests':>10}{'req/s':>10}{'repos/s':>10}{'peak RSS MB':>14}")
+    with tempfile.TemporaryDirectory() as directory:
+        for stage in args.stages.split(","):
+            results = multiprocessing.Queue()
+            before = fake.requests
+            process = multiprocessing.Process(
+                target=stage_process,
+                args=(stage, fake.url, fake.seed_url, directory, args.root_only, args.fetch_mode, results)
+            )
+            process.start()
+            process.join()
+            if process.exitcode != 0:
+                print(f"-{stage:<5} failed with exit code {process.exitcode}")
+                continue
+            repositories, elapsed, peak_rss = results.get()
+            requests = fake.requests - before
+            print(f"-{stage:<5}{elapsed:>10.2f}{requests:>10}{requests / elapsed:>10.1f}"
+                  f"{repositories / elapsed:>10.1f}{peak_rss / 1024:>14.1f}")
+    fake.stop()
+
+if __name__ == "__main__":
+    main()
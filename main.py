@@ -1,99 +1,658 @@
 from api.github_api import GitHubAPI
 from utils.csv_writer import CSVWriter
+from utils.background_writer import BackgroundWriter
+from utils.job_journal import JobJournal
+from utils.sharding import Shard
+from utils.work_queue import WorkQueue
+from utils.graph_store import GraphStore
+from utils.dependency_index import DependencyIndex, IndexingWriter
+from utils.external_sort import ExternalSorter
+from utils.column_store import ColumnStoreReader, ColumnStoreWriter
+from utils.snapshot_diff import SnapshotDiff, DIFF_KEY
+from utils.manifest_discovery import ManifestDiscovery
+from utils.metadata_cache import MetadataCache, FIELD_GROUPS
+from utils.metrics import metrics
+from utils.profiler import profiler
 from services.repository_service import RepositoryService
-from services.dependency_service import DependencyService
+from services.dependency_service import DependencyService, FETCH_MODES
 from services.vulnerability_service import VulnerabilityService
+from services.pipeline_service import PipelineService
+from services.worker_service import WorkerService, run_worker
+from services.local_scan_service import LocalScanService
+from services.history_service import HistoryService, HISTORY_REFS
+from services.report_service import ReportService
 from dotenv import load_dotenv
+import argparse
 import csv
-import sys
+import json
+import multiprocessing
 import os
 
 load_dotenv()
 
+REPOSITORY_METADATA_CSV = "repository_metadata.csv"
+DEPENDENCIES_CSV = "dependencies.csv"
+DEPENDENCIES_COLUMNS = "dependencies.col"
+VULNERABILITIES_CSV = "vulnerabilities.csv"
+DEPENDENCY_HISTORY_CSV = "dependency_history.csv"
+DEPENDENCY_DIFF_CSV = "dependency_diff.csv"
+INCOMPLETE_FILES_CSV = "incomplete_files.csv"
+DEPENDENCY_INDEX_DB = "dependency_index.db"
+
+REPOSITORY_HEADERS = [
+    "owner",
+    "name",
+    "description",
+    "stars",
+    "forks",
+    "collaborators",
+    "languages",
+    "url"
+]
+DEPENDENCY_HEADERS = [
+    "repo",
+    "url",
+    "source_file",
+    "ecosystem",
+    "name",
+    "operator",
+    "version",
+    "scope",
+]
+HISTORY_HEADERS = [
+    "repo",
+    "ref",
+    "commit",
+    "date",
+    "source_file",
+    "ecosystem",
+    "name",
+    "version",
+    "previous_version",
+    "change"
+]
+INCOMPLETE_HEADERS = [
+    "repo",
+    "source_file",
+    "reason"
+]
+DIFF_HEADERS = [
+    *DIFF_KEY,
+    "old_version",
+    "new_version",
+    "change"
+]
+VULNERABILITY_HEADERS = [
+    "repo",
+    "ecosystem",
+    "source_file",
+    "name",
+    "version",
+    "severity",
+    "advisory",
+    "url"
+]
+
+def output_name(file_name, args):
+    """Returns the file a stage writes to, which is per-shard when sharding."""
+    return args.shard.file_name(file_name) if args.shard else file_name
+
+def input_name(file_name, args):
+    """Returns the file a stage reads from, preferring this shard's own output."""
+    sharded = output_name(file_name, args)
+    return sharded if os.path.exists(sharded) else file_name
+
+def dependencies_file(args):
+    """Returns the dependency table selected by --format."""
+    return DEPENDENCIES_COLUMNS if args.format == "columnar" else DEPENDENCIES_CSV
+
+def open_output(file_name, headers, resume, index_file=None):
+    """Opens a background CSV writer and its journal, resuming both if asked.
+    Files named *.col get a columnar writer instead.
+    With `index_file`, written rows are also added to the reverse-dependency index."""
+    if file_name.endswith(".col"):
+        journal = JobJournal(file_name)
+        writer = ColumnStoreWriter(file_name, headers)
+    else:
+        journal = JobJournal(file_name, resume=resume)
+        writer = CSVWriter(file_name, headers, journal.resume_offset)
+    if index_file:
+        writer = IndexingWriter(writer, index_file)
+    return BackgroundWriter(writer), journal
+
+def open_graph_store(args):
+    """Returns the store lockfile graphs are saved to, if --graphs was given."""
+    return GraphStore(args.graphs) if args.graphs else None
+
+def open_discovery(args):
+    """Returns how manifests are found: anywhere in the tree unless --root-only."""
+    if args.root_only:
+        return None
+    skip_dirs = args.skip_dirs.split(",") if args.skip_dirs is not None else None
+    return ManifestDiscovery(args.include, args.exclude, skip_dirs)
+
+def open_metadata_cache(args):
+    """Opens the --metadata-cache store, or returns None to always fetch metadata."""
+    if not args.metadata_cache:
+        return None
+    return MetadataCache(args.metadata_cache, dict(args.metadata_ttl or []))
+
+def parse_ttl(value):
+    group, _, seconds = value.partition("=")
+    if group not in FIELD_GROUPS or not seconds:
+        raise argparse.ArgumentTypeError(f"expected GROUP=SECONDS with GROUP one of {', '.join(FIELD_GROUPS)}")
+    return group, float(seconds)
+
+def open_incomplete(args):
+    """Opens the list of files skipped by --repo-budget or a timeout. It is
+    rewritten by every run: a resumed run retries those files anyway."""
+    return open_output(output_name(INCOMPLETE_FILES_CSV, args), INCOMPLETE_HEADERS, False)
+
+def read_rows(file_name, columns=None):
+    """Yields the rows of a CSV or columnar table as dictionaries."""
+    if ColumnStoreReader.is_column_store(file_name):
+        with ColumnStoreReader(file_name) as reader:
+            yield from reader.iter_dicts(columns)
+        return
+    with open(file_name, mode="r", encoding="utf-8") as file:
+        yield from csv.DictReader(file)
+
+def close_outputs(*outputs):
+    """Flushes the writers before their journals so every checkpoint lands."""
+    for writer, journal in outputs:
+        try:
+            writer.close()
+        finally:
+            journal.close()
+
+def read_repo_url(args):
+    """Asks for the README to start from, unless repositories are listed by owner."""
+    if args.owners:
+        return None
+    return input("Enter the GitHub repository URL: ").strip()
+
+def run_repository_search(github_api, args):
+    github_repo_url = read_repo_url(args)
+    repository_metadata_csv = output_name(REPOSITORY_METADATA_CSV, args)
+    output = open_output(repository_metadata_csv, REPOSITORY_HEADERS, args.resume)
+    metadata_cache = open_metadata_cache(args)
+    repository_service = RepositoryService(
+        github_api, *output, shard=args.shard, depth=args.depth,
+        workers=args.crawl_workers, max_repositories=args.max_repositories,
+        metadata_cache=metadata_cache, refresh_limit=args.metadata_refresh_limit
+    )
+
+    try:
+        repository_service.process(github_repo_url, args.owners)
+        close_outputs(output)
+        print(f"Repository information successfully written to {repository_metadata_csv}")
+    except KeyboardInterrupt:
+        print("Interrupted, flushing pending rows...")
+    except Exception as e:
+        print(f"Error: {e}")
+    finally:
+        close_outputs(output)
+        if metadata_cache:
+            metadata_cache.close()
+
+def iter_repository_rows(github_api, args):
+    """Yields the repositories to analyze: listed live from --owners, or read from the
+    repository metadata CSV."""
+    if args.owners:
+        yield from RepositoryService(github_api, None).iter_owner_repositories(args.owners)
+        return
+    with open(input_name(REPOSITORY_METADATA_CSV, args), mode="r", encoding="utf-8") as file:
+        yield from csv.DictReader(file)
+
+def run_dependency_search(github_api, args):
+    dependency_csv = output_name(dependencies_file(args), args)
+    output = open_output(dependency_csv, DEPENDENCY_HEADERS, args.resume, args.index)
+    incomplete = open_incomplete(args)
+    dependency_service = DependencyService(
+        github_api, *output, graph_store=open_graph_store(args),
+        discovery=open_discovery(args), fetch_workers=args.fetch_workers,
+        prune_by_language=not args.probe_all, probe_baseline=args.probe_baseline,
+        fetch_mode=args.fetch_mode, repo_budget=args.repo_budget, incomplete_writer=incomplete[0]
+    )
+
+    try:
+        for row in iter_repository_rows(github_api, args):
+            owner, repo = row.get("owner"), row.get("name")
+            url = row.get("url")
+
+            if owner and repo and (not args.shard or args.shard.contains(owner, repo)):
+                dependency_service.analyze_dependencies(owner, repo, url, row.get("languages"))
+        close_outputs(output, incomplete)
+        print(f"Dependency information successfully written to {dependency_csv}")
+    except KeyboardInterrupt:
+        print("Interrupted, flushing pending rows...")
+    except Exception as e:
+        print(f"Error: {e}")
+    finally:
+        close_outputs(output, incomplete)
+
+def run_local_scan(args):
+    dependency_csv = output_name(dependencies_file(args), args)
+    output = open_output(dependency_csv, DEPENDENCY_HEADERS, args.resume, args.index)
+    scan_service = LocalScanService(
+        *output, discovery=open_discovery(args), graphs_dir=args.graphs,
+        workers=args.workers, shard=args.shard
+    )
+
+    try:
+        scanned = scan_service.process(args.scan)
+        close_outputs(output)
+        print(f"Dependencies of {scanned} local repositories successfully written to {dependency_csv}")
+    except KeyboardInterrupt:
+        print("Interrupted, flushing pending rows...")
+    except Exception as e:
+        print(f"Error: {e}")
+    finally:
+        close_outputs(output)
+
+def run_history(github_api, args):
+    history_csv = output_name(DEPENDENCY_HISTORY_CSV, args)
+    output = open_output(history_csv, HISTORY_HEADERS, args.resume)
+    history_service = HistoryService(
+        github_api, *output, discovery=open_discovery(args), refs=args.history_refs,
+        limit=args.history_limit, every=args.history_every, fetch_workers=args.fetch_workers
+    )
+
+    try:
+        with open(input_name(REPOSITORY_METADATA_CSV, args), mode="r", encoding="utf-8") as file:
+            for row in csv.DictReader(file):
+                owner, repo = row.get("owner"), row.get("name")
+                if owner and repo and (not args.shard or args.shard.contains(owner, repo)):
+                    try:
+                        changes = history_service.process(owner, repo)
+                    except Exception as e:
+                        print(f"Error recording the history of {owner}/{repo}, it will be retried: {e}")
+                        continue
+                    print(f"Recorded {changes} dependency changes for {owner}/{repo}")
+        close_outputs(output)
+        print(f"Dependency history successfully written to {history_csv}")
+    except KeyboardInterrupt:
+        print("Interrupted, flushing pending rows...")
+    except Exception as e:
+        print(f"Error: {e}")
+    finally:
+        close_outputs(output)
+
+def run_diff(args):
+    old_file, new_file = args.diff
+    sorter = ExternalSorter(chunk_rows=args.sort_chunk_rows, temp_dir=args.temp_dir)
+    writer = BackgroundWriter(CSVWriter(DEPENDENCY_DIFF_CSV, DIFF_HEADERS))
+    changes = {"added": 0, "removed": 0, "changed": 0}
+    try:
+        for row in SnapshotDiff(sorter).diff(old_file, new_file):
+            writer.append_row(row)
+            changes[row["change"]] += 1
+    finally:
+        writer.close()
+    print(f"{changes['added']} added, {changes['removed']} removed and {changes['changed']} changed "
+          f"dependencies written to {DEPENDENCY_DIFF_CSV}")
+
+def run_report(args):
+    report_service = ReportService(args.top)
+    reports = {}
+    for name, file_name, report in (
+        ("dependencies", dependencies_file(args), report_service.dependency_report),
+        ("vulnerabilities", VULNERABILITIES_CSV, report_service.vulnerability_report),
+    ):
+        file_name = input_name(file_name, args)
+        if not os.path.exists(file_name):
+            continue
+        reports[name] = report(file_name)
+        print(f"\n{file_name}")
+        for line in ReportService.format(reports[name]):
+            print(f"  {line}")
+    if not reports:
+        print("Nothing to report; run -d or -v first")
+    elif args.report_file:
+        with open(args.report_file, mode="w", encoding="utf-8") as file:
+            json.dump(reports, file, indent=2)
+        print(f"Report written to {args.report_file}")
+
+def run_vulnerability_search(github_api, args):
+    vulnerabilities_csv = output_name(VULNERABILITIES_CSV, args)
+    output = open_output(vulnerabilities_csv, VULNERABILITY_HEADERS, args.resume)
+    vulnerability_service = VulnerabilityService(github_api, *output)
+
+    try:
+        columns = ["repo", "ecosystem", "source_file", "name", "version"]
+        for row in read_rows(input_name(dependencies_file(args), args), columns):
+            repo, ecosystem, source_file, name, version = row.get("repo"), \
+                row.get("ecosystem"), row.get("source_file"), \
+                row.get("name"), row.get("version")
+            if args.shard:
+                owner, _, repo_name = (repo or "").rpartition("/")
+                if not args.shard.contains(owner, repo_name):
+                    continue
+            vulnerability_service.process(repo, ecosystem, source_file, name, version)
+        close_outputs(output)
+        print(f"Vulnerability information successfully written to {vulnerabilities_csv}")
+    except KeyboardInterrupt:
+        print("Interrupted, flushing pending rows...")
+    except Exception as e:
+        print(f"Error: {e}")
+    finally:
+        close_outputs(output)
+
+def run_pipeline(github_api, args):
+    github_repo_url = read_repo_url(args)
+    repository_metadata_csv = output_name(REPOSITORY_METADATA_CSV, args)
+    dependency_csv = output_name(dependencies_file(args), args)
+    vulnerabilities_csv = output_name(VULNERABILITIES_CSV, args)
+    outputs = [
+        open_output(repository_metadata_csv, REPOSITORY_HEADERS, args.resume),
+        open_output(dependency_csv, DEPENDENCY_HEADERS, args.resume, args.index),
+        open_output(vulnerabilities_csv, VULNERABILITY_HEADERS, args.resume)
+    ]
+    (repository_writer, repository_journal), (dependency_writer, dependency_journal), \
+        (vulnerability_writer, vulnerability_journal) = outputs
+    outputs.append(open_incomplete(args))
+    metadata_cache = open_metadata_cache(args)
+    pipeline_service = PipelineService(
+        github_api,
+        repository_writer,
+        dependency_writer,
+        vulnerability_writer,
+        repository_journal=repository_journal,
+        dependency_journal=dependency_journal,
+        vulnerability_journal=vulnerability_journal,
+        shard=args.shard,
+        graph_store=open_graph_store(args),
+        discovery=open_discovery(args),
+        fetch_workers=args.fetch_workers,
+        prune_by_language=not args.probe_all,
+        probe_baseline=args.probe_baseline,
+        fetch_mode=args.fetch_mode,
+        repo_budget=args.repo_budget,
+        incomplete_writer=outputs[-1][0],
+        crawl_depth=args.depth,
+        crawl_workers=args.crawl_workers,
+        max_repositories=args.max_repositories,
+        metadata_cache=metadata_cache,
+        refresh_limit=args.metadata_refresh_limit
+    )
+
+    try:
+        pipeline_service.run(github_repo_url, dependency_csv if args.resume else None, args.owners)
+        close_outputs(*outputs)
+        print(f"Results successfully written to {repository_metadata_csv}, "
+              f"{dependency_csv} and {vulnerabilities_csv}")
+    except KeyboardInterrupt:
+        print("Interrupted, flushing pending rows...")
+    except Exception as e:
+        print(f"Error: {e}")
+    finally:
+        close_outputs(*outputs)
+        if metadata_cache:
+            metadata_cache.close()
+
+def run_enqueue(args):
+    queue = WorkQueue(args.queue)
+    with open(input_name(REPOSITORY_METADATA_CSV, args), mode="r", encoding="utf-8") as file:
+        added = queue.enqueue(
+            (row["owner"], row["name"], row.get("url"))
+            for row in csv.DictReader(file)
+            if row.get("owner") and row.get("name")
+            and (not args.shard or args.shard.contains(row["owner"], row["name"]))
+        )
+    print(f"Queued {added} repositories in {args.queue}: {queue.counts()}")
+    queue.close()
+
+def run_workers(args):
+    token = os.environ.get("GITHUB_TOKEN", None)
+    base_url = os.environ.get("GITHUB_API_URL", "https://api.github.com")
+    base_id = f"{os.uname().nodename}-{os.getpid()}"
+    workers = [
+        multiprocessing.Process(
+            target=run_worker,
+            args=(token, base_url, args.queue, DEPENDENCIES_CSV, DEPENDENCY_HEADERS,
+                  f"{base_id}-{index}", args.metrics_file, args.graphs,
+                  open_discovery(args), args.fetch_workers, not args.probe_all, args.probe_baseline,
+                  args.fetch_mode, args.repo_budget, (args.connect_timeout, args.read_timeout),
+                  INCOMPLETE_FILES_CSV, INCOMPLETE_HEADERS)
+        )
+        for index in range(args.workers or 1)
+    ]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        print("Interrupted, waiting for workers to flush pending rows...")
+        for worker in workers:
+            worker.join()
+    queue = WorkQueue(args.queue)
+    print(f"Queue status: {queue.counts()}")
+    queue.close()
+
+def run_merge(args):
+    merged = WorkerService.merge(args.queue, DEPENDENCIES_CSV, DEPENDENCY_HEADERS, args.index)
+    print(f"Merged {merged} dependency rows into {DEPENDENCIES_CSV}")
+
+def run_why(args):
+    if not args.graphs or not os.path.isdir(args.graphs):
+        print("No stored graphs; run -d, -a or --work with --graphs DIR first")
+        return
+    found = 0
+    for repo, source_file, path in GraphStore(args.graphs).why(args.why):
+        print(f"{repo} ({source_file}): {' -> '.join(path)}")
+        found += 1
+    print(f"Found {found} paths to {args.why}")
+
+def run_build_index(args):
+    index_file = args.index or DEPENDENCY_INDEX_DB
+    index = DependencyIndex(index_file)
+    indexed = 0
+    batch = []
+    for row in read_rows(input_name(dependencies_file(args), args)):
+        batch.append(row)
+        if len(batch) == 10000:
+            index.add(batch)
+            indexed += len(batch)
+            batch = []
+    index.add(batch)
+    indexed += len(batch)
+    index.close()
+    print(f"Indexed {indexed} dependency rows into {index_file}")
+
+def run_who_uses(args):
+    index_file = args.index or DEPENDENCY_INDEX_DB
+    if not os.path.exists(index_file):
+        print(f"No index at {index_file}; run --build-index or pass --index to -d, -a or --merge first")
+        return
+    index = DependencyIndex(index_file)
+    usages = index.query(args.who_uses, args.ecosystem, args.range)
+    index.close()
+    for usage in usages:
+        print(f"{usage['repo']}\t{usage['ecosystem']}\t{usage['name']}\t{usage['version']}\t{usage['source_file']}")
+    print(f"{len(set(usage['repo'] for usage in usages))} repositories use {args.who_uses}")
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Analyze GitHub repositories and their dependencies.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("-r", dest="mode", action="store_const", const="r", help="Repository Search")
+    mode.add_argument("-d", dest="mode", action="store_const", const="d", help="Dependency Search")
+    mode.add_argument("-v", dest="mode", action="store_const", const="v", help="Vulnerability Search")
+    mode.add_argument("-a", dest="mode", action="store_const", const="a",
+                      help="All stages, streamed in one run")
+    mode.add_argument("--enqueue", dest="mode", action="store_const", const="enqueue",
+                      help="Load repository_metadata.csv into the work queue")
+    mode.add_argument("--work", dest="mode", action="store_const", const="work",
+                      help="Run dependency workers that pull repositories from the work queue")
+    mode.add_argument("--merge", dest="mode", action="store_const", const="merge",
+                      help="Combine per-worker outputs into dependencies.csv")
+    mode.add_argument("--scan", metavar="DIR",
+                      help="Analyze the dependencies of every working copy or bare repository under DIR")
+    mode.add_argument("--build-index", dest="mode", action="store_const", const="build-index",
+                      help="Build the reverse-dependency index from dependencies.csv")
+    mode.add_argument("--who-uses", metavar="PACKAGE",
+                      help="List the repositories that depend on PACKAGE, from the reverse-dependency index")
+    mode.add_argument("--why", metavar="PACKAGE",
+                      help="Show which direct dependencies pull in PACKAGE, from the graphs in --graphs")
+    mode.add_argument("--history", dest="mode", action="store_const", const="history",
+                      help="Track how the dependencies of each repository changed across its history")
+    mode.add_argument("--diff", nargs=2, metavar=("OLD", "NEW"),
+                      help="Compare two dependencies.csv snapshots into dependency_diff.csv")
+    mode.add_argument("--report", dest="mode", action="store_const", const="report",
+                      help="Summarize dependencies.csv and vulnerabilities.csv: top packages, "
+                           "version fragmentation and severities per repository")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted run from its journal instead of starting over")
+    parser.add_argument("--shard", type=Shard.parse, metavar="i/N",
+                        help="Only process repositories whose owner/repo hash falls in shard i of N")
+    parser.add_argument("--queue", default="work_queue.db",
+                        help="SQLite work queue shared by --enqueue, --work and --merge")
+    parser.add_argument("--workers", type=int,
+                        help="Number of worker processes started by --work (default 1) "
+                             "or --scan (default one per CPU)")
+    parser.add_argument("--owners", type=lambda value: value.split(","), metavar="LOGINS",
+                        help="Comma-separated organizations or users whose repositories are listed "
+                             "instead of reading a README (-r, -a) or repository_metadata.csv (-d)")
+    parser.add_argument("--depth", type=int, default=0, metavar="N",
+                        help="With -r or -a, also crawl the READMEs of linked repositories N levels deep")
+    parser.add_argument("--crawl-workers", type=int, default=8, metavar="N",
+                        help="Repositories fetched concurrently while crawling")
+    parser.add_argument("--max-repositories", type=int, metavar="N",
+                        help="Stop discovering repositories once N have been found")
+    parser.add_argument("--metadata-cache", metavar="PATH",
+                        help="SQLite store of repository metadata reused across runs (-r, -a)")
+    parser.add_argument("--metadata-ttl", type=parse_ttl, action="append", metavar="GROUP=SECONDS",
+                        help="How long cached metadata stays fresh, per field group: "
+                             + ", ".join(f"{group} ({', '.join(fields)})" for group, fields in FIELD_GROUPS.items()))
+    parser.add_argument("--metadata-refresh-limit", type=int, metavar="N",
+                        help="Refresh at most N stale cached repositories per run, most recently pushed first")
+    parser.add_argument("--root-only", action="store_true",
+                        help="Only probe manifests at the repository root instead of listing the whole tree")
+    parser.add_argument("--include", action="append", metavar="GLOB",
+                        help="Only analyze manifests whose path matches GLOB (repeatable)")
+    parser.add_argument("--exclude", action="append", metavar="GLOB",
+                        help="Skip manifests whose path matches GLOB (repeatable)")
+    parser.add_argument("--skip-dirs", metavar="NAMES",
+                        help="Comma-separated directory names to ignore at any depth "
+                             "(default: node_modules, vendor, test fixtures and similar)")
+    parser.add_argument("--fetch-mode", choices=FETCH_MODES, default="contents",
+                        help="How manifests are downloaded: one contents call each, one streamed "
+                             "tarball per repository, or the tarball only for repositories with "
+                             f"more than {DependencyService.ARCHIVE_THRESHOLD} manifests")
+    parser.add_argument("--repo-budget", type=float, metavar="SECONDS",
+                        help="Time allowed per repository; files not fetched by then are skipped "
+                             f"and listed in {INCOMPLETE_FILES_CSV}")
+    parser.add_argument("--connect-timeout", type=float, default=10.0, metavar="SECONDS",
+                        help="Timeout for connecting to the GitHub API")
+    parser.add_argument("--read-timeout", type=float, default=60.0, metavar="SECONDS",
+                        help="Timeout for each read from the GitHub API")
+    parser.add_argument("--fetch-workers", type=int, default=8,
+                        help="Manifests fetched concurrently per repository")
+    parser.add_argument("--probe-all", action="store_true",
+                        help="When probing the root, try every manifest instead of only those "
+                             "matching the repository's languages")
+    parser.add_argument("--probe-baseline", type=lambda value: value.split(","), default=[],
+                        metavar="FILES",
+                        help="Comma-separated manifests always probed at the root, whatever the languages")
+    parser.add_argument("--history-refs", choices=HISTORY_REFS, default="tags",
+                        help="Points in history followed by --history: tags, or commits of the default branch")
+    parser.add_argument("--history-limit", type=int, default=50, metavar="N",
+                        help="Number of tags or sampled commits followed per repository")
+    parser.add_argument("--history-every", type=int, default=1, metavar="N",
+                        help="With --history-refs commits, only follow every Nth commit")
+    parser.add_argument("--format", choices=("csv", "columnar"), default="csv",
+                        help="Format of the dependency table written by -d, -a and --scan and read "
+                             "by -v, --report and --build-index: dependencies.csv, or the "
+                             "dictionary-encoded dependencies.col")
+    parser.add_argument("--sort-chunk-rows", type=int, default=500000, metavar="N",
+                        help="Rows --diff sorts in memory before spilling a sorted run to disk")
+    parser.add_argument("--temp-dir", metavar="DIR",
+                        help="Where --diff spills sorted runs (default: the system temp directory)")
+    parser.add_argument("--top", type=int, default=20, metavar="N",
+                        help="Entries listed in each ranking of --report")
+    parser.add_argument("--report-file", metavar="PATH",
+                        help="Also write the --report results to PATH as JSON")
+    parser.add_argument("--index", metavar="PATH",
+                        help=f"Reverse-dependency index to update while writing dependencies "
+                             f"(queries default to {DEPENDENCY_INDEX_DB})")
+    parser.add_argument("--ecosystem", help="Limit --who-uses to one ecosystem, e.g. NPM")
+    parser.add_argument("--range", metavar="SPEC",
+                        help="Limit --who-uses to PIP versions matching a PEP 440 specifier such as '>=1.0,<2.0'")
+    parser.add_argument("--graphs", metavar="DIR",
+                        help="Save the dependency graph of every lockfile to DIR and fill in the scope "
+                             "(direct or transitive) of lockfile dependencies")
+    parser.add_argument("--metrics-file", metavar="PATH",
+                        help="Write Prometheus textfile metrics to PATH during and after the run")
+    parser.add_argument("--profile", metavar="DIR",
+                        help="Write per-stage pstats dumps and collapsed stacks to DIR")
+    parser.add_argument("--profile-every", type=int, default=1, metavar="N",
+                        help="Only profile every Nth repository to keep the overhead low")
+    args = parser.parse_args()
+    if args.resume and args.format == "columnar":
+        parser.error("--resume is not supported with --format columnar")
+    if args.mode in ("work", "merge") and args.format == "columnar":
+        # Workers append to per-worker CSVs, and merge writes dependencies.csv.
+        parser.error("--work and --merge only write --format csv")
+    if args.why:
+        args.mode = "why"
+    if args.who_uses:
+        args.mode = "who-uses"
+    if args.scan:
+        args.mode = "scan"
+    if args.diff:
+        args.mode = "diff"
+    return args
+
+def run(github_api, args):
+    if args.mode == "r":
+        run_repository_search(github_api, args)
+    elif args.mode == "d":
+        run_dependency_search(github_api, args)
+    elif args.mode == "v":
+        run_vulnerability_search(github_api, args)
+    elif args.mode == "a":
+        run_pipeline(github_api, args)
+    elif args.mode == "enqueue":
+        run_enqueue(args)
+    elif args.mode == "work":
+        run_workers(args)
+    elif args.mode == "merge":
+        run_merge(args)
+    elif args.mode == "why":
+        run_why(args)
+    elif args.mode == "report":
+        run_report(args)
+    elif args.mode == "diff":
+        run_diff(args)
+    elif args.mode == "history":
+        run_history(github_api, args)
+    elif args.mode == "scan":
+        run_local_scan(args)
+    elif args.mode == "build-index":
+        run_build_index(args)
+    elif args.mode == "who-uses":
+        run_who_uses(args)
+
 if __name__ == "__main__":
     GITHUB_TOKEN = os.environ.get("GITHUB_TOKEN", None)
-    github_api = GitHubAPI(token=GITHUB_TOKEN)
-    arguments = sys.argv
+    GITHUB_API_URL = os.environ.get("GITHUB_API_URL", "https://api.github.com")
+    args = parse_arguments()
+    github_api = GitHubAPI(GITHUB_TOKEN, GITHUB_API_URL, args.connect_timeout, args.read_timeout)
 
-    if len(arguments) >= 3 or len(arguments) == 1:
+    if not args.mode:
         print("""\nPlease select the following options:
               \n-r -> Repository Search\n-d -> Dependency Search
+              \n-v -> Vulnerability Search\n-a -> All stages, streamed in one run
               """)
-    elif len(arguments) == 2 and arguments[1] == "-r":    
-        github_repo_url = input("Enter the GitHub repository URL: ").strip()
-        repository_metadata_csv = "repository_metadata.csv"
-        headers=[
-            "owner",
-            "name", 
-            "description", 
-            "stars", 
-            "forks", 
-            "collaborators", 
-            "url"
-        ]
-        csv_writer = CSVWriter(repository_metadata_csv, headers)
-        repository_service = RepositoryService(github_api, csv_writer)
-
-        try:
-            repository_service.process(github_repo_url)
-            print(f"Repository information successfully written to {repository_metadata_csv}")
-        except Exception as e:
-            print(f"Error: {e}")
-
-    elif len(arguments) == 2 and arguments[1] == "-d":
-        repository_metadata_csv = "repository_metadata.csv"
-        dependency_csv = "dependencies.csv"
-        headers = [
-            "repo", 
-            "url",
-            "source_file",
-            "ecosystem",
-            "name",
-            "operator", 
-            "version", 
-        ]
-        csv_writer = CSVWriter(dependency_csv, headers)
-        dependency_service = DependencyService(github_api, csv_writer)
-
-        # Read repository list from input CSV
-        try:
-            with open(repository_metadata_csv, mode="r", encoding="utf-8") as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    owner, repo = row.get("owner"), row.get("name")  
-                    url = row.get("url")
-
-                    if owner and repo:
-                        dependency_service.analyze_dependencies(owner, repo, url)
-            print(f"Dependency information successfully written to {dependency_csv}")
-        except Exception as e:
-            print(f"Error: {e}")
-
-    elif len(arguments) == 2 and arguments[1] == "-v":
-        dependencies_csv = "dependencies.csv"
-        vulnerabilities_csv = "vulnerabilities.csv"
-        headers = [
-            "repo", 
-            "ecosystem", 
-            "source_file", 
-            "name", 
-            "version", 
-            "severity", 
-            "advisory", 
-            "url"
-        ]
-        csv_writer = CSVWriter(vulnerabilities_csv, headers)
-        vulnerability_service = VulnerabilityService(github_api, csv_writer)
-        
+    else:
+        if args.metrics_file:
+            metrics.export_periodically(args.metrics_file)
+        if args.profile:
+            profiler.configure(args.profile, args.profile_every)
         try:
-            with open(dependencies_csv, mode="r", encoding="utf-8") as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    repo, ecosystem, source_file, name, version = row.get("repo"), \
-                        row.get("ecosystem"), row.get("source_file"), \
-                        row.get("name"), row.get("version")
-                    vulnerability_service.process(repo, ecosystem, source_file, name, version)
-                    break
-            print(f"Vulnerability information successfully written to {vulnerabilities_csv}")
-        except Exception as e:
-            print(f"Error: {e}")
\ No newline at end of file
+            run(github_api, args)
+        finally:
+            profiler.dump()
+            print(metrics.summary())
+            if args.metrics_file:
+                metrics.write_textfile(args.metrics_file)
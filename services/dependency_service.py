@@ -1,196 +1,338 @@
 import requests
 import base64
-from typing import List, Dict
+import tarfile
+from collections import deque
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from utils.budget import Budget
 from utils.csv_writer import CSVWriter
-from utils.dependency_extractor import DependencyExtractor
+from utils.dependency_extractor import MANIFEST_PARSERS
+from utils.manifest_discovery import ManifestDiscovery
+from utils.language_probes import LanguageProbes
+from utils.lockfile_graphs import GRAPH_PARSERS
+from utils.graph_store import GraphStore
+from utils.job_journal import JobJournal
+from utils.metrics import metrics
+from utils.workspace_resolver import WorkspaceResolver
+from utils.profiler import profiler
 from api.github_api import GitHubAPI
 
+FETCH_MODES = ("contents", "archive", "auto")
+
+class IncompleteRepository(Exception):
+    """Raised after a repository's rows are yielded when some of its files could
+    not be read, so callers do not checkpoint or complete it as done."""
+
 class DependencyService:
-    def __init__(self, github_api: GitHubAPI, csv_writer: CSVWriter):
+    # In "auto" mode, repositories with more manifests than this are read
+    # from one tarball instead of one contents call per manifest.
+    ARCHIVE_THRESHOLD = 30
+    # Archive members larger than this are skipped rather than read into memory.
+    MAX_ARCHIVE_FILE_SIZE = 64 * 1024 * 1024
+
+    def __init__(self, github_api: GitHubAPI, csv_writer: CSVWriter, journal: JobJournal = None,
+                 graph_store: GraphStore = None, discovery: ManifestDiscovery = None, fetch_workers: int = 8,
+                 prune_by_language: bool = True, probe_baseline: List[str] = None,
+                 fetch_mode: str = "contents", repo_budget: float = None, incomplete_writer: CSVWriter = None):
         self.github_api = github_api
         self.csv_writer = csv_writer
+        self.journal = journal
+        self.graph_store = graph_store
+        self.discovery = discovery
+        self.fetch_workers = fetch_workers
+        self.prune_by_language = prune_by_language
+        self.probe_baseline = probe_baseline or []
+        self.fetch_mode = fetch_mode
+        # Seconds a repository may take before its remaining files are skipped.
+        self.repo_budget = repo_budget
+        self.incomplete_writer = incomplete_writer
 
-    def analyze_dependencies(self, owner: str, repo: str, url: str):
+    def analyze_dependencies(self, owner: str, repo: str, url: str, languages: str = None):
         """Fetches and analyzes dependencies from a GitHub repository."""
-        files = [
-            "requirements.txt", # Python Projects
-            "pyproject.toml", 
-            "Pipfile",
-            "pipfile.toml",
-            "pipfile.lock",
-            "setup.py",
-            "setup.cfg",
-            "environment.yml",
-            "pyproject.toml",
-            "package.json", # JavaScript Projects
-            "package-lock.json",
-            "yarn.lock",
-            "webpack.config.js",
-            "pnpm-lock.yaml",
-            "bower.json",
-            "Gemfile",  # Ruby Projects
-            "Gemfile.lock",
-            "composer.json",    # PHP Projects
-            "composer.lock",
-            "pom.xml",  # Java Projects
-            "gradle.properties",
-            "gradle.lockfile",
-            "build.gradle",
-            "build.xml",
-            "build.gradle.kts", # Java and Kotlin Projects
-            "settings.gradle",
-            "Cargo.toml",   # Rust Projects
-            "Cargo.lock",
-            "packages.config", # .NET Projects
-            "project.json",
-            ".csproj",
-            ".nuspec",
-            "project.assets.json",
-            "packages.lock.json",
-            ".paket",
-            "paket.dependencies",
-            "paket.lock",
-            "go.mod", # Go Projects
-            "go.sum",
-            "glide.lock",
-            "glide.yaml",
-            "gogradle.lock",
-            "Gopkg.lock",
-            "Godeps.lock",
-            "vendor.conf",
-            "CMakeLists.txt", # C/C++ Projects
-            "Makefile",
-            "pubspec.yaml",
-            "Podfile",  # Swift Projects
-            "Podfile.lock",
-            "packages.swift",
-            "Cartfile"
-        ]
-
-        for file_name in files:
-            try:
-                print(f"Fetching {file_name} from {owner}/{repo}...")
-                content = self.github_api.fetch_file_content(owner, repo, file_name)
+        try:
+            for dep in self.iter_dependencies(owner, repo, url, languages):
+                self.csv_writer.append_row(dep)
+        except IncompleteRepository as e:
+            print(f"{e}; a resumed run retries them")
 
-                if not content:
+    def iter_dependencies(self, owner: str, repo: str, url: str, languages: str = None) -> Iterator[Dict]:
+        """Yields dependency rows as each manifest of a repository is parsed.
+
+        `languages` is the ";"-separated list recorded with the repository
+        metadata; it is fetched when needed and not given. Raises
+        `IncompleteRepository` at the end if any file failed to fetch, timed
+        out or was cut off by the budget or a broken archive stream.
+        """
+        budget = Budget(self.repo_budget)
+        pending = fetches = None
+        manifest_paths = None
+        if self.fetch_mode == "archive":
+            files = self.fetch_archive(owner, repo, self.archive_parser_name, budget)
+        else:
+            manifests = self.discover_manifests(owner, repo)
+            if manifests is None:
+                manifests = [(file_name, file_name) for file_name in self.probe_files(owner, repo, languages)]
+            parsers = dict(manifests)
+            manifest_paths = list(parsers)
+            if self.fetch_mode == "auto" and len(parsers) > self.ARCHIVE_THRESHOLD:
+                files = self.fetch_archive(owner, repo, parsers.get, budget)
+            else:
+                # Shallow manifests first, so parent POMs and workspace roots are
+                # usually parsed before the modules that inherit from them.
+                pending = sorted(
+                    (path for path in parsers if not self.is_done(owner, repo, path)),
+                    key=lambda path: path.count("/")
+                )
+                fetches = self.fetch_manifests(owner, repo, pending, budget)
+                files = ((path, parsers[path], future) for path, future in fetches)
+
+        # Parents and workspace roots that are not fetched yet are read on demand.
+        workspace = WorkspaceResolver(
+            lambda path: self.fetch_file(owner, repo, path, budget), manifest_paths
+        )
+        finished = set()
+        incomplete = []
+        try:
+            for path, file_name, future in files:
+                try:
+                    content = future.result(timeout=budget.remaining())
+                except (FutureTimeout, CancelledError):
+                    break
+                except requests.Timeout as e:
+                    print(f"Timed out fetching {path}: {e}")
+                    self.mark_incomplete(owner, repo, path, "timeout")
+                    incomplete.append(path)
+                    finished.add(path)
+                    continue
+                except Exception as e:
+                    print(f"Error processing {path}: {e}")
+                    self.mark_incomplete(owner, repo, path, "error")
+                    incomplete.append(path)
+                    finished.add(path)
                     continue
 
-                dependencies = self.extract_dependencies(file_name, content)
-                
-                for dep in dependencies:
-                    dep["repo"] = f"{owner}/{repo}"
-                    dep["url"] = url
-                    dep["source_file"] = file_name
-                    self.csv_writer.append_row(dep)
-
-                print(f"Extracted dependencies from {file_name}: {len(dependencies)}")
+                try:
+                    if content:
+                        dependencies = self.parse_manifest(f"{owner}/{repo}", url, path, file_name, content,
+                                                           workspace)
+                        yield from dependencies
+                        print(f"Extracted dependencies from {path}: {len(dependencies)}")
+                    self.checkpoint(owner, repo, path)
+                except Exception as e:
+                    print(f"Error processing {path}: {e}")
+                finished.add(path)
+                if budget.expired():
+                    break
+        except Exception as e:
+            # The archive stream or the listing broke off; whatever was not
+            # reached yet is missing.
+            print(f"Error reading the files of {owner}/{repo}: {e}")
+            self.mark_incomplete(owner, repo, "", "error")
+            incomplete.append("")
+        finally:
+            expired = budget.expired()
+            # Stops queued fetches or the archive stream, also when the
+            # consumer goes away early.
+            budget.cancel()
+            files.close()
+            if fetches is not None:
+                fetches.close()
+
+        if expired:
+            skipped = [path for path in pending if path not in finished] if pending is not None else [""]
+            print(f"Time budget of {self.repo_budget}s exhausted for {owner}/{repo}, "
+                  f"skipping {len(skipped) if pending is not None else 'the rest of the archive'}")
+            for path in skipped:
+                self.mark_incomplete(owner, repo, path, "budget")
+            incomplete.extend(skipped)
+        if incomplete:
+            raise IncompleteRepository(f"{len(incomplete)} files of {owner}/{repo} could not be read")
+
+    def mark_incomplete(self, owner: str, repo: str, path: str, reason: str):
+        """Records a file that was skipped, so it is neither lost silently nor
+        checkpointed; a resumed run tries it again. An empty path stands for
+        whatever was left of a repository archive."""
+        metrics.inc("files_incomplete_total", reason=reason)
+        if self.incomplete_writer is not None:
+            self.incomplete_writer.append_row({"repo": f"{owner}/{repo}", "source_file": path, "reason": reason})
+
+    def is_done(self, owner: str, repo: str, path: str) -> bool:
+        return bool(self.journal and self.journal.is_done(f"{owner}/{repo}", path))
+
+    def archive_parser_name(self, path: str) -> Optional[str]:
+        """Returns the parser for an archive member, applying the same rules as
+        tree discovery, or only accepting root manifests without discovery."""
+        if self.discovery is None and "/" in path:
+            return None
+        discovery = self.discovery or ManifestDiscovery()
+        file_name = discovery.parser_name(path)
+        return file_name if file_name and discovery.wanted(path) else None
+
+    def fetch_archive(self, owner: str, repo: str, parser_name: Callable[[str], Optional[str]],
+                      budget: Budget = None) -> Iterator[Tuple[str, str, Future]]:
+        """Streams the repository tarball and yields `(path, parser name, future)`
+        for each wanted manifest.
+
+        Members are read straight off the gzip stream; everything that is not
+        a wanted manifest is skipped as the stream passes it, so memory stays
+        bounded by the largest manifest whatever the size of the repository.
+        The stream is abandoned as soon as `budget` runs out; a failed or
+        broken stream raises.
+        """
+        budget = budget or Budget()
+        print(f"Streaming the archive of {owner}/{repo}...")
+        response = self.github_api.fetch_tarball(owner, repo, timeout=budget.remaining())
+        try:
+            with tarfile.open(fileobj=response.raw, mode="r|gz") as archive:
+                for member in archive:
+                    if budget.expired():
+                        return
+                    if not member.isfile():
+                        continue
+                    # Members live under a "<owner>-<repo>-<sha>/" directory.
+                    path = member.name.split("/", 1)[-1]
+                    file_name = parser_name(path)
+                    if file_name is None or self.is_done(owner, repo, path):
+                        continue
+                    future = Future()
+                    if member.size > self.MAX_ARCHIVE_FILE_SIZE:
+                        future.set_exception(Exception(f"{path} is larger than {self.MAX_ARCHIVE_FILE_SIZE} bytes"))
+                    else:
+                        future.set_result(archive.extractfile(member).read().decode("utf-8", errors="replace"))
+                    yield path, file_name, future
+        except (tarfile.TarError, OSError, requests.RequestException) as e:
+            # Raised so the repository is not taken for complete.
+            raise Exception(f"Error reading the archive of {owner}/{repo}: {e}") from e
+        finally:
+            response.close()
+
+    def discover_manifests(self, owner: str, repo: str) -> Optional[List[Tuple[str, str]]]:
+        """Lists `(path, parser name)` for the manifests anywhere in the repository
+        tree, or returns None when only the root should be probed."""
+        if self.discovery is None:
+            return None
+        try:
+            with profiler.stage("tree", f"{owner}/{repo}"):
+                paths = [path for path, _ in self.list_tree(owner, repo, "HEAD", "")]
+        except Exception as e:
+            print(f"Error listing the tree of {owner}/{repo}, probing the root instead: {e}")
+            return None
+        return list(self.discovery.manifests(paths))
+
+    def probe_files(self, owner: str, repo: str, languages: str = None) -> List[str]:
+        """Returns the root manifests to probe, pruned to the ecosystems the
+        repository's languages make plausible."""
+        if not self.prune_by_language:
+            return list(MANIFEST_PARSERS)
+        if languages is None:
+            try:
+                languages = ";".join(self.github_api.fetch_languages(owner, repo))
             except Exception as e:
-                print(f"Error processing {file_name}: {e}")
+                print(f"Error fetching languages of {owner}/{repo}, probing every manifest: {e}")
+                return list(MANIFEST_PARSERS)
+        file_names = LanguageProbes.manifests(filter(None, languages.split(";")), self.probe_baseline)
+        metrics.inc("probes_skipped_total", len(MANIFEST_PARSERS) - len(file_names))
+        return file_names
+
+    def list_tree(self, owner: str, repo: str, tree_sha: str, prefix: str) -> Iterator[Tuple[str, str]]:
+        """Yields `(path, blob SHA)` for the files of a tree with one recursive
+        listing, splitting it per directory only where GitHub truncates it."""
+        tree = self.github_api.fetch_tree(owner, repo, tree_sha)
+        if tree is None:
+            return
+        if not tree.get("truncated"):
+            for entry in tree.get("tree", []):
+                if entry.get("type") == "blob":
+                    yield prefix + entry["path"], entry.get("sha", "")
+            return
+
+        tree = self.github_api.fetch_tree(owner, repo, tree_sha, recursive=False) or {}
+        for entry in tree.get("tree", []):
+            path = prefix + entry["path"]
+            if entry.get("type") == "blob":
+                yield path, entry.get("sha", "")
+            elif entry.get("type") == "tree" and not (self.discovery and self.discovery.skip_directory(path)):
+                yield from self.list_tree(owner, repo, entry["sha"], f"{path}/")
+
+    def fetch_manifests(self, owner: str, repo: str, paths: Iterable[str],
+                        budget: Budget = None) -> Iterator[Tuple[str, Future]]:
+        """Fetches files on a thread pool and yields `(path, future)` in order.
+
+        At most two fetches per worker are in flight ahead of the consumer, so
+        a monorepo with thousands of manifests is not held in memory at once.
+        Nothing new is submitted once `budget` runs out, and closing the
+        generator cancels the fetches that have not started.
+        """
+        budget = budget or Budget()
+        executor = ThreadPoolExecutor(max_workers=self.fetch_workers, thread_name_prefix="fetch")
+        try:
+            in_flight = deque()
+            for path in paths:
+                if budget.expired():
+                    break
+                in_flight.append((path, executor.submit(self.fetch_file, owner, repo, path, budget)))
+                if len(in_flight) >= 2 * self.fetch_workers:
+                    yield in_flight.popleft()
+            while in_flight:
+                yield in_flight.popleft()
+        finally:
+            # Fetches already running end within their own timeout.
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def fetch_file(self, owner: str, repo: str, path: str, budget: Budget = None) -> str:
+        budget = budget or Budget()
+        if budget.expired():
+            raise CancelledError()
+        print(f"Fetching {path} from {owner}/{repo}...")
+        with profiler.stage("fetch", f"{owner}/{repo}"):
+            return self.github_api.fetch_file_content(owner, repo, path, timeout=budget.remaining())
+
+    def parse_manifest(self, repo: str, url: str, path: str, file_name: str, content: str,
+                       workspace: WorkspaceResolver = None) -> List[Dict]:
+        """Parses one manifest into dependency rows attributed to `repo` and `path`.
+
+        With a `workspace` of the repository, versions inherited from parent
+        POMs and workspace roots are resolved. Lockfiles are only decoded a
+        second time into a graph, which fills in each row's scope, when there
+        is a graph store to save it to.
+        """
+        with metrics.timer("parse_duration_seconds", parser=file_name), profiler.stage("parse", repo):
+            if workspace is not None and file_name in WorkspaceResolver.FILE_NAMES:
+                dependencies = workspace.resolve(path, file_name, content)
+            else:
+                dependencies = self.extract_dependencies(file_name, content)
+            scopes = self.extract_graph(repo, file_name, content, path) if self.graph_store else {}
+
+        for dep in dependencies:
+            dep["repo"] = repo
+            dep["url"] = url
+            dep["source_file"] = path
+            if scopes:
+                dep["scope"] = scopes.get(dep["name"], "")
+        return dependencies
+
+    def checkpoint(self, owner: str, repo: str, file_name: str):
+        """Records a manifest as done once the rows yielded for it are written."""
+        if self.journal:
+            self.journal.checkpoint(self.csv_writer, f"{owner}/{repo}", file_name)
+
+    def extract_graph(self, repo: str, file_name: str, content: str, source_file: str = None) -> Dict[str, str]:
+        """Builds and stores the graph of a lockfile; returns each package's scope by name."""
+        parser = GRAPH_PARSERS.get(file_name)
+        graph = parser(content) if parser else None
+        if graph is None:
+            return {}
+        if self.graph_store:
+            self.graph_store.save(repo, source_file or file_name, graph)
+        scopes = {}
+        for row in graph.rows():
+            if scopes.get(row["name"]) != "direct":
+                scopes[row["name"]] = row["scope"]
+        return scopes
 
     def extract_dependencies(self, file_name: str, content: str) -> List[Dict]:
         """Extracts dependencies from a given file content."""
-        if file_name == "requirements.txt":
-            return DependencyExtractor.parse_requirements_txt(content)
-        elif file_name == "pyproject.toml":
-            return DependencyExtractor.parse_pyproject_toml(content)
-        elif file_name == "Pipfile":
-            return DependencyExtractor.parse_pipfile(content)
-        elif file_name == "pipfile.toml":
-            return DependencyExtractor.parse_pipfile_toml(content)
-        elif file_name == "pipfile.lock":
-            return DependencyExtractor.parse_pipfile_lock(content)
-        elif file_name == "setup.py":
-            return DependencyExtractor.parse_setup_py(content)
-        elif file_name == "setup.cfg":
-            return DependencyExtractor.parse_setup_cfg(content)
-        elif file_name == "environment.yml":
-            return DependencyExtractor.parse_environment_yml(content)
-        elif file_name == "pyproject.toml":
-            return DependencyExtractor.parse_pyproject_toml(content)
-        elif file_name == "package.json":
-            return DependencyExtractor.parse_package_json(content)
-        elif file_name == "package-lock.json":
-            return DependencyExtractor.parse_package_lock_json(content)
-        elif file_name == "yarn.lock":
-            return DependencyExtractor.parse_yarn_lock(content)
-        elif file_name == "webpack.config.js":
-            return DependencyExtractor.parse_webpack_config_js(content)
-        elif file_name == "pnpm-lock.yaml":
-            return DependencyExtractor.parse_pnpm_lock_yaml(content)
-        elif file_name == "bower.json":
-            return DependencyExtractor.parse_bower_json(content)
-        elif file_name == "Gemfile":
-            return DependencyExtractor.parse_gemfile(content)
-        elif file_name == "Gemfile.lock":
-            return DependencyExtractor.parse_gemfile_lock(content)
-        elif file_name == "composer.json":
-            return DependencyExtractor.parse_composer_json(content)
-        elif file_name == "composer.lock":
-            return DependencyExtractor.parse_composer_lock_json(content)
-        elif file_name == "pom.xml":
-            return DependencyExtractor.parse_pom_xml(content)
-        elif file_name == "gradle.properties":
-            return DependencyExtractor.parse_gradle_properties(content)
-        elif file_name == "gradle.lockfile":
-            return DependencyExtractor.parse_gradle_lockfile(content)
-        elif file_name == "build.gradle":
-            return DependencyExtractor.build_gradle(content)
-        elif file_name == "build.xml":
-            return DependencyExtractor.parse_build_xml(content)
-        elif file_name == "build.gradle.kts":
-            return DependencyExtractor.build_gradle_kts(content)
-        elif file_name == "settings.gradle":
-            return DependencyExtractor.settings_gradle(content)
-        elif file_name == "Cargo.toml":
-            return DependencyExtractor.parse_cargo_toml(content)
-        elif file_name == "Cargo.lock":
-            return DependencyExtractor.parse_cargo_lock(content)
-        elif file_name == "packages.config":
-            return DependencyExtractor.parse_packages_config_json(content)
-        elif file_name == "project.json":
-            return DependencyExtractor.parse_project_json(content)
-        elif file_name == ".csproj":
-            return DependencyExtractor.parse_csproj(content)
-        elif file_name == ".nuspec":
-            return DependencyExtractor.parse_nuspec(content)
-        elif file_name == "project.assets.json":
-            return DependencyExtractor.parse_project_assets_json(content)
-        elif file_name == "packages.lock.json":
-            return DependencyExtractor.parse_packages_lock_json(content)
-        elif file_name == ".paket":
-            return DependencyExtractor.parse_paket(content)
-        elif file_name == "paket.dependencies":
-            return DependencyExtractor.parse_paket_dependencies(content)
-        elif file_name == "paket.lock":
-            return DependencyExtractor.parse_paket_lock(content)
-        elif file_name == "go.mod":
-            return DependencyExtractor.parse_go_mod(content)
-        elif file_name == "go.sum":
-            return DependencyExtractor.parse_go_sum(content)
-        elif file_name == "glide.lock":
-            return DependencyExtractor.parse_glide_lock(content)
-        elif file_name == "glide.yaml":
-            return DependencyExtractor.parse_glide_yaml(content)
-        elif file_name == "gogradle.lock":
-            return DependencyExtractor.parse_gogradle_lock(content)
-        elif file_name == "Gopkg.lock":
-            return DependencyExtractor.parse_gopkg_lock(content)
-        elif file_name == "Godeps.lock":
-            return DependencyExtractor.parse_godeps_lock(content)
-        elif file_name == "vendor.conf":
-            return DependencyExtractor.parse_vendor_conf(content)
-        elif file_name == "CMakeLists.txt":
-            return DependencyExtractor.parse_cmakelists_txt(content)
-        elif file_name == "Makefile":
-            return DependencyExtractor.parse_makefile(content)
-        elif file_name == "pubspec.yaml":
-            return DependencyExtractor.parse_pubsec_yaml(content)
-        elif file_name == "Podfile":
-            return DependencyExtractor.parse_podfile(content)
-        elif file_name == "Podfile.lock":
-            return DependencyExtractor.parse_podfile_lock(content)
-        elif file_name == "packages.swift":
-            return DependencyExtractor.parse_packages_swift(content)
-        elif file_name == "Cartfile":
-            return DependencyExtractor.parse_cartfile(content)
-        return []
\ No newline at end of file
+        parser = MANIFEST_PARSERS.get(file_name)
+        if parser is None:
+            return []
+        return parser(content)
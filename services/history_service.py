@@ -0,0 +1,156 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Tuple
+from utils.csv_writer import CSVWriter
+from utils.job_journal import JobJournal
+from utils.manifest_discovery import ManifestDiscovery
+from utils.profiler import profiler
+from services.dependency_service import DependencyService
+from api.github_api import GitHubAPI
+
+HISTORY_REFS = ("tags", "commits")
+
+class HistoryService:
+    """Follows the dependencies of a repository across its tags or commits.
+
+    Each point in history costs one tree listing. Manifests are compared by
+    blob SHA with the previous point, and only blobs that changed are fetched
+    and parsed; a blob seen before (e.g. after a revert) is not parsed again.
+    The output is one row per dependency that was added, removed or changed
+    version, so the number of fetches and rows follows the number of manifest
+    changes rather than points times manifests.
+    """
+    def __init__(self, github_api: GitHubAPI, csv_writer: CSVWriter, journal: JobJournal = None,
+                 discovery: ManifestDiscovery = None, refs: str = "tags", limit: int = 50,
+                 every: int = 1, fetch_workers: int = 8):
+        self.github_api = github_api
+        self.csv_writer = csv_writer
+        self.journal = journal
+        self.discovery = discovery
+        self.refs = refs
+        self.limit = limit
+        self.every = max(every, 1)
+        self.fetch_workers = fetch_workers
+        # Reused for tree listing and parsing only; it never writes rows itself.
+        self.dependency_service = DependencyService(github_api, None, discovery=discovery)
+
+    def process(self, owner: str, repo: str) -> int:
+        """Writes the dependency history of one repository and returns how many rows it produced."""
+        if self.journal and self.journal.is_done(f"{owner}/{repo}"):
+            return 0
+        with profiler.stage("history", f"{owner}/{repo}"):
+            # Collected first so a repository that fails part way writes
+            # nothing and, not being checkpointed, is retried whole.
+            rows = list(self.iter_changes(owner, repo))
+        for row in rows:
+            self.csv_writer.append_row(row)
+        if self.journal:
+            self.journal.checkpoint(self.csv_writer, f"{owner}/{repo}")
+        return len(rows)
+
+    def iter_changes(self, owner: str, repo: str) -> Iterator[Dict]:
+        """Yields a change row for every dependency that differs from the previous point."""
+        summaries: Dict[str, Dict[Tuple[str, str], str]] = {}
+        previous_tree = None
+        previous: Dict[str, Tuple[str, str]] = {}
+        previous_summaries: Dict[str, Dict[Tuple[str, str], str]] = {}
+
+        with ThreadPoolExecutor(max_workers=self.fetch_workers) as executor:
+            for ref, commit, date, tree_sha in self.points(owner, repo):
+                if tree_sha == previous_tree:
+                    continue
+                previous_tree = tree_sha
+                manifests = self.list_manifests(owner, repo, tree_sha)
+
+                changed = [
+                    (path, file_name, sha) for path, (file_name, sha) in manifests.items()
+                    if previous.get(path, (None, None))[1] != sha
+                ]
+                missing = [(path, file_name, sha) for path, file_name, sha in changed if sha not in summaries]
+                for (path, file_name, sha), summary in zip(missing, executor.map(
+                        lambda manifest: self.summarize(owner, repo, *manifest), missing)):
+                    summaries[sha] = summary
+
+                current_summaries = {
+                    path: summaries[sha] for path, (_, sha) in manifests.items() if sha in summaries
+                }
+                point = {"repo": f"{owner}/{repo}", "ref": ref, "commit": commit, "date": date}
+                for path, _, _ in changed:
+                    yield from self.diff(point, path, previous_summaries.get(path, {}), current_summaries.get(path, {}))
+                for path in previous.keys() - manifests.keys():
+                    yield from self.diff(point, path, previous_summaries.get(path, {}), {})
+
+                previous = manifests
+                previous_summaries = current_summaries
+
+    def points(self, owner: str, repo: str) -> List[Tuple[str, str, str, str]]:
+        """Returns `(ref, commit SHA, date, tree SHA)` for each point, oldest first."""
+        points = []
+        if self.refs == "tags":
+            seen = set()
+            for tag in self.github_api.fetch_tags(owner, repo, self.limit):
+                sha = tag["commit"]["sha"]
+                if sha in seen:
+                    continue
+                seen.add(sha)
+                commit = self.github_api.fetch_commit(owner, repo, sha)
+                points.append((tag["name"], sha, commit["committer"]["date"], commit["tree"]["sha"]))
+        else:
+            commits = self.github_api.fetch_commits(owner, repo, self.limit * self.every)
+            for commit in commits[::self.every]:
+                details = commit["commit"]
+                points.append((commit["sha"][:7], commit["sha"], details["committer"]["date"], details["tree"]["sha"]))
+        # Tags are not listed by date, and commits come newest first.
+        return sorted(points, key=lambda point: point[2])
+
+    def list_manifests(self, owner: str, repo: str, tree_sha: str) -> Dict[str, Tuple[str, str]]:
+        """Maps each wanted manifest path of a tree to `(parser name, blob SHA)`."""
+        if self.discovery is None:
+            tree = self.github_api.fetch_tree(owner, repo, tree_sha, recursive=False) or {}
+            discovery = ManifestDiscovery()
+            return {
+                entry["path"]: (file_name, entry["sha"])
+                for entry in tree.get("tree", []) if entry.get("type") == "blob"
+                for file_name in [discovery.parser_name(entry["path"])] if file_name
+            }
+        blobs = dict(self.dependency_service.list_tree(owner, repo, tree_sha, ""))
+        return {path: (file_name, blobs[path]) for path, file_name in self.discovery.manifests(blobs)}
+
+    def summarize(self, owner: str, repo: str, path: str, file_name: str, sha: str) -> Dict[Tuple[str, str], str]:
+        """Parses one blob into `{(ecosystem, name): versions}`.
+
+        A failed fetch raises: an empty summary would be cached for the blob
+        and diffed as every dependency being removed. A blob that cannot be
+        parsed will never parse, so it counts as having no dependencies.
+        """
+        content = self.github_api.fetch_blob(owner, repo, sha)
+        try:
+            rows = self.dependency_service.parse_manifest(f"{owner}/{repo}", "", path, file_name, content)
+        except Exception as e:
+            print(f"Error processing {owner}/{repo}/{path}@{sha[:7]}: {e}")
+            return {}
+        versions: Dict[Tuple[str, str], set] = {}
+        for row in rows:
+            version = f"{row.get('operator') or ''}{row.get('version') or ''}"
+            # Parsers can report a missing name as None, which would not sort
+            # against the other keys in `diff`.
+            key = (row.get("ecosystem") or "", row.get("name") or "")
+            versions.setdefault(key, set()).add(version)
+        return {key: ";".join(sorted(values)) for key, values in versions.items()}
+
+    @staticmethod
+    def diff(point: Dict, path: str, old: Dict[Tuple[str, str], str],
+             new: Dict[Tuple[str, str], str]) -> Iterator[Dict]:
+        for key in sorted(old.keys() | new.keys()):
+            before, after = old.get(key), new.get(key)
+            if before == after:
+                continue
+            change = "added" if before is None else "removed" if after is None else "changed"
+            yield {
+                **point,
+                "source_file": path,
+                "ecosystem": key[0],
+                "name": key[1],
+                "version": after or "",
+                "previous_version": before or "",
+                "change": change,
+            }
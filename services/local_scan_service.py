@@ -0,0 +1,89 @@
+import multiprocessing
+import os
+from typing import Dict, List, Tuple
+from utils.csv_writer import CSVWriter
+from utils.graph_store import GraphStore
+from utils.job_journal import JobJournal
+from utils.local_repository import LocalRepository
+from utils.manifest_discovery import ManifestDiscovery
+from utils.sharding import Shard
+from utils.workspace_resolver import WorkspaceResolver
+from services.dependency_service import DependencyService
+
+# Parser state of each scan process, set up once by `_start_scanner`.
+_scanner = None
+
+def _start_scanner(discovery: ManifestDiscovery, graphs_dir: str):
+    global _scanner
+    graph_store = GraphStore(graphs_dir) if graphs_dir else None
+    _scanner = (DependencyService(None, None, graph_store=graph_store), discovery)
+
+def _scan(repository: LocalRepository) -> Tuple[str, List[Dict], int]:
+    """Parses every manifest of one repository inside a scan process.
+
+    Returns the repository's rows and how many manifests, or whole scans,
+    failed; a repository with failures is left for a resumed run.
+    """
+    service, discovery = _scanner
+    rows = []
+    failures = 0
+    workspace = WorkspaceResolver(repository.load)
+    try:
+        for path, file_name, content in repository.manifests(discovery):
+            try:
+                rows.extend(service.parse_manifest(repository.name, repository.url, path, file_name, content,
+                                                   workspace))
+            except Exception as e:
+                print(f"Error processing {repository.name}/{path}: {e}")
+                failures += 1
+    except Exception as e:
+        print(f"Error scanning {repository.name}: {e}")
+        failures += 1
+    return repository.name, rows, failures
+
+class LocalScanService:
+    """Analyzes the dependencies of repositories already on disk.
+
+    Working copies and bare repositories found below a directory are parsed
+    by a pool of processes, one repository per task, with the same parsers
+    as the API path; only the rows travel back to be written here.
+    """
+    def __init__(self, csv_writer: CSVWriter, journal: JobJournal = None, discovery: ManifestDiscovery = None,
+                 graphs_dir: str = None, workers: int = None, shard: Shard = None):
+        self.csv_writer = csv_writer
+        self.journal = journal
+        self.discovery = discovery
+        self.graphs_dir = graphs_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.shard = shard
+
+    def process(self, root: str) -> int:
+        """Scans every repository below `root` and returns how many were written."""
+        repositories = [
+            repository for repository in LocalRepository.find(root)
+            if self.wanted(repository.name)
+        ]
+        print(f"Found {len(repositories)} repositories under {root}.")
+
+        scanned = 0
+        with multiprocessing.Pool(self.workers, _start_scanner, (self.discovery, self.graphs_dir)) as pool:
+            for name, rows, failures in pool.imap_unordered(_scan, repositories):
+                if failures:
+                    # Nothing is written or checkpointed, so --resume scans it again.
+                    print(f"Skipping {name}: {failures} manifests could not be read; a resumed run retries it")
+                    continue
+                for row in rows:
+                    self.csv_writer.append_row(row)
+                if self.journal:
+                    self.journal.checkpoint(self.csv_writer, name)
+                scanned += 1
+                print(f"Extracted {len(rows)} dependencies from {name}")
+        return scanned
+
+    def wanted(self, name: str) -> bool:
+        if self.journal and self.journal.is_done(name):
+            return False
+        if self.shard:
+            owner, _, repo = name.rpartition("/")
+            return self.shard.contains(owner, repo)
+        return True
@@ -0,0 +1,110 @@
+import csv
+import os
+from typing import Dict, Iterator, List
+from api.github_api import GitHubAPI
+from utils.csv_writer import CSVWriter
+from utils.job_journal import JobJournal
+from utils.graph_store import GraphStore
+from utils.manifest_discovery import ManifestDiscovery
+from utils.metadata_cache import MetadataCache
+from utils.sharding import Shard
+from utils.stream import buffered
+from services.repository_service import RepositoryService
+from services.dependency_service import DependencyService, IncompleteRepository
+from services.vulnerability_service import VulnerabilityService
+
+class PipelineService:
+    """Runs repository discovery, dependency extraction and vulnerability
+    matching as one streaming pipeline.
+
+    Each stage runs on its own thread and hands records to the next through a
+    bounded buffer, so vulnerabilities for the first repositories are reported
+    while later repositories are still being discovered.
+    """
+    def __init__(
+            self,
+            github_api: GitHubAPI,
+            repository_writer: CSVWriter,
+            dependency_writer: CSVWriter,
+            vulnerability_writer: CSVWriter,
+            buffer_size: int = 100,
+            repository_journal: JobJournal = None,
+            dependency_journal: JobJournal = None,
+            vulnerability_journal: JobJournal = None,
+            shard: Shard = None,
+            graph_store: GraphStore = None,
+            discovery: ManifestDiscovery = None,
+            fetch_workers: int = 8,
+            prune_by_language: bool = True,
+            probe_baseline: List[str] = None,
+            fetch_mode: str = "contents",
+            repo_budget: float = None,
+            incomplete_writer: CSVWriter = None,
+            crawl_depth: int = 0,
+            crawl_workers: int = 8,
+            max_repositories: int = None,
+            metadata_cache: MetadataCache = None,
+            refresh_limit: int = None
+        ):
+        self.repository_service = RepositoryService(
+            github_api, repository_writer, repository_journal, shard,
+            crawl_depth, crawl_workers, max_repositories, metadata_cache, refresh_limit
+        )
+        self.dependency_service = DependencyService(
+            github_api, dependency_writer, dependency_journal, graph_store, discovery, fetch_workers,
+            prune_by_language, probe_baseline, fetch_mode, repo_budget, incomplete_writer
+        )
+        self.vulnerability_service = VulnerabilityService(
+            github_api, vulnerability_writer, vulnerability_journal
+        )
+        self.repository_writer = repository_writer
+        self.dependency_writer = dependency_writer
+        self.repository_journal = repository_journal
+        self.buffer_size = buffer_size
+
+    def run(self, repo_url: str, resume_from: str = None, owners: List[str] = None):
+        """Streams every repository linked from `repo_url`, or of `owners`, through all stages.
+
+        When resuming, dependencies already recorded in `resume_from` are
+        checked first, since their repositories will not be revisited.
+        """
+        if resume_from and os.path.exists(resume_from):
+            with open(resume_from, mode="r", encoding="utf-8") as file:
+                for dep in csv.DictReader(file):
+                    self.match(dep)
+
+        repositories = buffered(
+            self.repository_service.iter_source(repo_url, owners),
+            self.buffer_size
+        )
+        for dep in buffered(self.iter_dependencies(repositories), self.buffer_size):
+            self.match(dep)
+
+    def match(self, dep: Dict):
+        """Checks a single dependency row against the advisory database."""
+        self.vulnerability_service.process(
+            dep["repo"],
+            dep["ecosystem"],
+            dep["source_file"],
+            dep["name"],
+            dep["version"]
+        )
+
+    def iter_dependencies(self, repositories: Iterator[Dict]) -> Iterator[Dict]:
+        """Records each repository and yields its dependencies as they are extracted."""
+        for metadata in repositories:
+            owner, repo, url = metadata["owner"], metadata["name"], metadata["url"]
+            languages = metadata.get("languages")
+            try:
+                for dep in self.dependency_service.iter_dependencies(owner, repo, url, languages):
+                    self.dependency_writer.append_row(dep)
+                    yield dep
+            except IncompleteRepository as e:
+                # Left unrecorded so a resumed run visits it again; the
+                # manifests that did succeed are checkpointed on their own.
+                print(f"{e}; a resumed run retries them")
+                continue
+            # A repository only counts as done once all of its manifests are.
+            self.repository_writer.append_row(metadata)
+            if self.repository_journal:
+                self.repository_journal.checkpoint(self.repository_writer, metadata["url"])
@@ -0,0 +1,181 @@
+import csv
+import heapq
+from collections import Counter
+from operator import itemgetter
+from typing import Dict, List
+from utils.column_store import ColumnStoreReader
+from utils.hyperloglog import HyperLogLog
+from utils.profiler import profiler
+
+# Advisory severities as reported by GitHub, most severe first.
+SEVERITIES = ["CRITICAL", "HIGH", "MODERATE", "LOW"]
+
+class ReportService:
+    """Aggregates dependency and vulnerability outputs in one streaming pass each.
+
+    Only counters, one set of versions per package and fixed-size sketches
+    are kept, so memory follows the number of distinct packages rather than
+    the number of rows. Distinct counts over repositories and advisories,
+    which can be very large, are HyperLogLog estimates.
+    """
+    def __init__(self, top: int = 20):
+        self.top = top
+
+    def dependency_report(self, file_name: str) -> Dict:
+        """Summarizes a dependencies.csv: top packages, version fragmentation and ecosystems.
+
+        A package is counted once per repository as long as each repository's
+        rows are contiguous, which holds for every writer in this project.
+        Column stores are summarized from their codes instead of row by row.
+        """
+        if ColumnStoreReader.is_column_store(file_name):
+            return self.column_dependency_report(file_name)
+        rows = 0
+        repositories = HyperLogLog()
+        usages = Counter()
+        last_repo = {}
+        versions = {}
+        ecosystems = Counter()
+        with profiler.stage("report"), open(file_name, mode="r", newline="", encoding="utf-8",
+                                            buffering=1024 * 1024) as file:
+            reader = csv.reader(file)
+            headers = next(reader, [])
+            fields = itemgetter(*(headers.index(column) for column in ("repo", "ecosystem", "name", "version")))
+            for row in reader:
+                try:
+                    repo, ecosystem, name, version = fields(row)
+                except IndexError:
+                    continue
+                rows += 1
+                repositories.add(repo)
+                package = (ecosystem, name)
+                if last_repo.get(package) != repo:
+                    last_repo[package] = repo
+                    usages[package] += 1
+                package_versions = versions.get(package)
+                if package_versions is None:
+                    package_versions = versions[package] = set()
+                package_versions.add(version)
+                ecosystems[ecosystem] += 1
+
+        return {
+            "rows": rows,
+            "repositories": repositories.count(),
+            "packages": len(usages),
+            "ecosystems": dict(ecosystems.most_common()),
+            "most_used": [
+                {"ecosystem": ecosystem, "name": name, "repositories": count}
+                for (ecosystem, name), count in usages.most_common(self.top)
+            ],
+            "most_fragmented": [
+                {"ecosystem": ecosystem, "name": name, "versions": len(package_versions)}
+                for (ecosystem, name), package_versions in heapq.nlargest(
+                    self.top, versions.items(), key=lambda item: len(item[1]))
+            ],
+        }
+
+    def column_dependency_report(self, file_name: str) -> Dict:
+        """Computes `dependency_report` over a column store.
+
+        Everything is counted on the integer codes of each row group, set and
+        Counter operations running over zero-copy views, and strings are only
+        looked up for the final rankings. Distinct repositories are exact here:
+        they are the size of the repo dictionary.
+        """
+        with profiler.stage("report"), ColumnStoreReader(file_name) as reader:
+            usages = Counter()
+            package_versions = set()
+            ecosystems = Counter()
+            # Package -> code of the last repository counted for it, as in
+            # `dependency_report`.
+            last_repo = {}
+            for repos, ecosystem_codes, names, versions in zip(
+                    *(reader.codes(column) for column in ("repo", "ecosystem", "name", "version"))):
+                if not len(repos):
+                    continue
+                ecosystems.update(ecosystem_codes)
+                current = set(zip(ecosystem_codes, names, repos))
+                usages.update(
+                    (ecosystem, name) for ecosystem, name, repo in current
+                    if last_repo.get((ecosystem, name)) != repo
+                )
+                # A repository's rows are contiguous, so only the group's last
+                # repository can continue into the next groups.
+                final = repos[-1]
+                last_repo.update(((ecosystem, name), repo) for ecosystem, name, repo in current if repo == final)
+                package_versions.update(zip(ecosystem_codes, names, versions))
+            fragmentation = Counter((ecosystem, name) for ecosystem, name, _ in package_versions)
+
+            ecosystem_names, package_names = reader.dictionary("ecosystem"), reader.dictionary("name")
+            return {
+                "rows": reader.rows,
+                "repositories": len(reader.dictionary("repo")),
+                "packages": len(usages),
+                "ecosystems": {ecosystem_names[code]: count for code, count in ecosystems.most_common()},
+                "most_used": [
+                    {"ecosystem": ecosystem_names[ecosystem], "name": package_names[name], "repositories": count}
+                    for (ecosystem, name), count in usages.most_common(self.top)
+                ],
+                "most_fragmented": [
+                    {"ecosystem": ecosystem_names[ecosystem], "name": package_names[name], "versions": count}
+                    for (ecosystem, name), count in fragmentation.most_common(self.top)
+                ],
+            }
+
+    def vulnerability_report(self, file_name: str) -> Dict:
+        """Summarizes a vulnerabilities.csv: severity totals and the most exposed repositories."""
+        rows = 0
+        advisories = HyperLogLog()
+        severities = Counter()
+        by_repo = {}
+        with profiler.stage("report"), open(file_name, mode="r", newline="", encoding="utf-8",
+                                            buffering=1024 * 1024) as file:
+            reader = csv.reader(file)
+            headers = next(reader, [])
+            fields = itemgetter(*(headers.index(column) for column in ("repo", "severity", "advisory")))
+            for row in reader:
+                try:
+                    repo, severity, advisory = fields(row)
+                except IndexError:
+                    continue
+                rows += 1
+                advisories.add(advisory)
+                severities[severity] += 1
+                counts = by_repo.get(repo)
+                if counts is None:
+                    counts = by_repo[repo] = Counter()
+                counts[severity] += 1
+
+        # Repositories rank by their critical count, then high, and so on.
+        ranked = heapq.nlargest(
+            self.top, by_repo.items(),
+            key=lambda item: tuple(item[1][severity] for severity in SEVERITIES)
+        )
+        return {
+            "rows": rows,
+            "advisories": advisories.count(),
+            "repositories": len(by_repo),
+            "severities": {severity: severities[severity] for severity in SEVERITIES if severities[severity]},
+            "most_exposed": [
+                {"repo": repo, **{severity.lower(): counts[severity] for severity in SEVERITIES}}
+                for repo, counts in ranked
+            ],
+        }
+
+    @staticmethod
+    def format(report: Dict) -> List[str]:
+        """Renders a report as printable lines."""
+        lines = []
+        for key, value in report.items():
+            title = key.replace("_", " ").capitalize()
+            if isinstance(value, list):
+                lines.append(f"{title}:")
+                for entry in value:
+                    lines.append("  " + "  ".join(
+                        f"{field} {item}" if isinstance(item, int) else item for field, item in entry.items()
+                    ))
+            elif isinstance(value, dict):
+                lines.append(f"{title}: " + ", ".join(f"{name} {count}" for name, count in value.items()))
+            else:
+                lines.append(f"{title}: {value}")
+        return lines
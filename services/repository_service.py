@@ -1,27 +1,212 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
 from utils.url_parser import URLParser
 from api.github_api import GitHubAPI
 from utils.csv_writer import CSVWriter
+from utils.job_journal import JobJournal
+from utils.metadata_cache import MetadataCache, FIELD_GROUPS
+from utils.metrics import metrics
+from utils.sharding import Shard
+from utils.profiler import profiler
 
 class RepositoryService:
-    def __init__(self, github_api: GitHubAPI, csv_writer: CSVWriter):
+    """Collects metadata for the repositories linked from a README, or for
+    every repository of a list of organizations and users.
+
+    With `depth` above zero the READMEs of linked repositories are crawled
+    too, breadth first, so curated lists that link to other lists are
+    followed that many levels down. Each level is fetched by `workers`
+    threads with a bounded window in flight, and every repository, keyed by
+    its lower-cased `owner/repo`, is visited at most once. `max_repositories`
+    caps how many are discovered, which bounds the visited set and frontier.
+
+    With a `metadata_cache`, only the stale field groups of a known
+    repository are refetched. Stale repositories are refreshed most
+    recently pushed first, and past `refresh_limit` refreshes per run the
+    rest are served from the cache as they are.
+    """
+    def __init__(self, github_api: GitHubAPI, csv_writer: CSVWriter, journal: JobJournal = None,
+                 shard: Shard = None, depth: int = 0, workers: int = 8, max_repositories: int = None,
+                 metadata_cache: MetadataCache = None, refresh_limit: int = None):
         self.github_api = github_api
         self.csv_writer = csv_writer
+        self.journal = journal
+        self.shard = shard
+        self.depth = depth
+        self.workers = workers
+        self.max_repositories = max_repositories
+        self.metadata_cache = metadata_cache
+        self.refresh_limit = refresh_limit
+        self.refreshes = 0
 
-    def process(self, repo_url):
+    def process(self, repo_url, owners: List[str] = None):
         """Main process to extract and save repository data."""
-        owner, repo = repo_url.rstrip("/").split("/")[-2:]
+        for metadata in self.iter_source(repo_url, owners):
+            self.csv_writer.append_row(metadata)
+            print(f"Appended data for repository: {metadata['name']}")
+            if self.journal:
+                self.journal.checkpoint(self.csv_writer, metadata["url"])
+
+    def iter_source(self, repo_url, owners: List[str] = None) -> Iterator[Dict]:
+        """Yields the repositories of `owners` when given, else those linked from `repo_url`."""
+        if owners:
+            return self.iter_owner_repositories(owners)
+        return self.iter_repositories(repo_url)
+
+    def iter_owner_repositories(self, owners: List[str]) -> Iterator[Dict]:
+        """Yields metadata for every repository of the given organizations and users.
+
+        The listing already carries the metadata, so no per-repository call is
+        made; repositories outside the shard or already journaled are skipped.
+        """
+        for login in dict.fromkeys(owner.strip() for owner in owners if owner.strip()):
+            print(f"Listing repositories of {login}...")
+            count = 0
+            try:
+                for metadata in self.github_api.iter_owner_repositories(login):
+                    if self.wanted(metadata["owner"], metadata["name"]):
+                        count += 1
+                        yield metadata
+            except Exception as e:
+                print(f"Error listing repositories of {login}: {e}")
+            print(f"Found {count} repositories for {login}.")
+
+    def iter_repositories(self, repo_url) -> Iterator[Dict]:
+        """Yields metadata for every repository linked from the README of `repo_url`,
+        and from the READMEs of those repositories down to `depth` levels."""
+        repository = URLParser.parse_repository(repo_url)
+        if not repository:
+            raise Exception(f"Not a GitHub repository URL: {repo_url}")
+        owner, repo = repository
         print(f"Fetching README for {repo_url}...")
         readme_content = self.github_api.fetch_readme(owner, repo)
 
         print("Extracting repository URLs...")
-        repo_urls = URLParser.extract_github_urls(readme_content)
-        print(f"Found {len(repo_urls)} repositories.")
+        visited = {f"{owner}/{repo}".lower()}
+        frontier = self.unvisited(URLParser.extract_repositories(readme_content), visited)
+        print(f"Found {len(frontier)} repositories.")
+
+        level = 1
+        while frontier:
+            expand = level <= self.depth
+            next_frontier = []
+            for metadata, links in self.visit_all(frontier, expand):
+                if metadata:
+                    yield metadata
+                next_frontier.extend(self.unvisited(links, visited))
+            if next_frontier:
+                print(f"Found {len(next_frontier)} more repositories at depth {level}.")
+            frontier = next_frontier
+            level += 1
+
+    def unvisited(self, repositories: List[Tuple[str, str]], visited: set) -> List[Tuple[str, str]]:
+        """Returns the `(owner, repo)` pairs not seen yet and marks them seen."""
+        found = []
+        for owner, repo in repositories:
+            if self.max_repositories is not None and len(visited) > self.max_repositories:
+                break
+            key = f"{owner}/{repo}".lower()
+            if key not in visited:
+                visited.add(key)
+                found.append((owner, repo))
+        return found
 
-        for url in repo_urls:
-            owner, repo = url.rstrip("/").split("/")[-2:]
+    def visit_all(self, repositories: List[Tuple[str, str]], expand: bool) -> Iterator[Tuple[Optional[Dict], List[Tuple[str, str]]]]:
+        """Visits repositories on a thread pool, with at most two per worker in flight."""
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="crawl")
+        try:
+            in_flight: deque = deque()
+            for owner, repo, cached, refresh in self.prioritize(repositories):
+                in_flight.append(executor.submit(self.visit, owner, repo, expand, cached, refresh))
+                if len(in_flight) >= 2 * self.workers:
+                    yield in_flight.popleft().result()
+            while in_flight:
+                yield in_flight.popleft().result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def prioritize(self, repositories: List[Tuple[str, str]]) -> List[Tuple[str, str, Optional[Tuple], bool]]:
+        """Orders a level for visiting as `(owner, repo, cached entry, refresh)`.
+
+        Fresh cache entries come first as they cost nothing, then unknown
+        repositories, then stale ones by latest push, of which only the first
+        `refresh_limit` (over the whole run) may be refreshed.
+        """
+        if self.metadata_cache is None:
+            return [(owner, repo, None, True) for owner, repo in repositories]
+        entries = self.metadata_cache.entries(repositories)
+        fresh, unknown, stale = [], [], []
+        for owner, repo in repositories:
+            entry = entries.get(f"{owner}/{repo}".lower())
+            if entry is None:
+                unknown.append((owner, repo, None, True))
+            elif entry[1]:
+                stale.append((owner, repo, entry, True))
+            else:
+                fresh.append((owner, repo, entry, False))
+        # pushed_at is an ISO 8601 timestamp, so string order is time order.
+        stale.sort(key=lambda item: item[2][2] or "", reverse=True)
+        for index, (owner, repo, entry, _) in enumerate(stale):
+            refresh = self.refresh_limit is None or self.refreshes < self.refresh_limit
+            if refresh:
+                self.refreshes += 1
+            stale[index] = (owner, repo, entry, refresh)
+        return fresh + unknown + stale
+
+    def visit(self, owner: str, repo: str, expand: bool, cached: Tuple = None,
+              refresh: bool = True) -> Tuple[Optional[Dict], List[Tuple[str, str]]]:
+        """Fetches the metadata of one repository and, when expanding, the links in its README."""
+        metadata = None
+        if self.wanted(owner, repo):
+            try:
+                with profiler.stage("discovery", f"{owner}/{repo}"):
+                    metadata = self.fetch_metadata(owner, repo, cached, refresh)
+            except Exception as e:
+                print(f"Error fetching metadata for https://github.com/{owner}/{repo}: {e}")
+        links = []
+        if expand:
             try:
-                metadata = self.github_api.fetch_repo_metadata(owner, repo)
-                self.csv_writer.append_row(metadata)
-                print(f"Appended data for repository: {metadata['name']}")
+                links = URLParser.extract_repositories(self.github_api.fetch_readme(owner, repo))
             except Exception as e:
-                print(f"Error fetching metadata for {url}: {e}")
\ No newline at end of file
+                print(f"Error fetching README for {owner}/{repo}: {e}")
+        return metadata, links
+
+    def fetch_metadata(self, owner: str, repo: str, cached: Tuple = None, refresh: bool = True) -> Dict:
+        """Returns a repository's metadata, fetching only the field groups the cache lacks."""
+        if self.metadata_cache is None:
+            return self.github_api.fetch_repo_metadata(owner, repo)
+        if cached:
+            metadata, stale, _ = cached
+        else:
+            metadata, stale = {"owner": owner, "url": f"https://github.com/{owner}/{repo}"}, list(FIELD_GROUPS)
+        if not refresh:
+            stale = []
+        for group in FIELD_GROUPS:
+            metrics.inc("cache_misses_total" if group in stale else "cache_hits_total", cache=f"metadata_{group}")
+        if not stale:
+            return metadata
+
+        metadata = dict(metadata)
+        pushed_at = None
+        if "repository" in stale:
+            data = self.github_api.fetch_repository(owner, repo)
+            metadata.update(GitHubAPI.repository_fields(data))
+            pushed_at = data.get("pushed_at")
+        if "collaborators" in stale:
+            metadata["collaborators"] = self.github_api.fetch_collaborator_count(owner, repo)
+        if "languages" in stale:
+            try:
+                metadata["languages"] = ";".join(self.github_api.fetch_languages(owner, repo))
+            except Exception as e:
+                # Only a probing hint: keep what is cached, and refetch next time.
+                print(f"Error fetching languages of {owner}/{repo}: {e}")
+                metadata.setdefault("languages", "")
+                stale = [group for group in stale if group != "languages"]
+        self.metadata_cache.store(owner, repo, metadata, stale, pushed_at)
+        return metadata
+
+    def wanted(self, owner: str, repo: str) -> bool:
+        if self.shard and not self.shard.contains(owner, repo):
+            return False
+        return not (self.journal and self.journal.is_done(f"https://github.com/{owner}/{repo}"))
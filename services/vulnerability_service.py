@@ -1,15 +1,27 @@
 import requests
 from api.github_api import GitHubAPI
 from utils.csv_writer import CSVWriter
+from utils.job_journal import JobJournal
+from utils.metrics import metrics
+from utils.profiler import profiler
 
 class VulnerabilityService:
+    # Ecosystems accepted by the GitHub Advisory Database GraphQL API.
+    SUPPORTED_ECOSYSTEMS = {
+        "COMPOSER", "ERLANG", "GO", "MAVEN", "NPM", "NUGET",
+        "PIP", "PUB", "RUBYGEMS", "RUST", "SWIFT", "ACTIONS"
+    }
+
     def __init__(
             self, 
             github_api: GitHubAPI, 
-            csv_writer: CSVWriter
+            csv_writer: CSVWriter,
+            journal: JobJournal = None
         ):
         self.github_api = github_api
         self.csv_writer = csv_writer
+        self.journal = journal
+        self.advisories = {}
 
     def process(
             self,
@@ -19,20 +31,47 @@ class VulnerabilityService:
             dependency_name: str, 
             dependency_version: str
         ):
+        unit = (repo, source_file, ecosystem, dependency_name, dependency_version)
+        if ecosystem not in self.SUPPORTED_ECOSYSTEMS or not dependency_name:
+            return
+        if self.journal and self.journal.is_done(*unit):
+            return
+
         try:
-            vulnerabilities = self.github_api.check_vulnerabilities(
-                ecosystem,
-                dependency_name,
-                dependency_version
-            )
+            with profiler.stage("match", repo):
+                vulnerabilities = self.github_api.filter_vulnerabilities(
+                    self.fetch_advisories(ecosystem, dependency_name),
+                    dependency_version
+                )
             
             for vuln in vulnerabilities:
-                vuln["repo"] = repo
-                vuln["ecosystem"] = ecosystem
-                vuln["source_file"] = source_file
-                self.csv_writer.append_row(vuln)
+                self.csv_writer.append_row({
+                    "repo": repo,
+                    "ecosystem": ecosystem,
+                    "source_file": source_file,
+                    "name": dependency_name,
+                    "version": dependency_version,
+                    "severity": vuln["severity"],
+                    "advisory": vuln["description"],
+                    "url": vuln["advisory_link"]
+                })
             print(f"Found {len(vulnerabilities)} vulnerabilities for \
                   {dependency_name}@{dependency_version}")
+            if self.journal:
+                self.journal.checkpoint(self.csv_writer, *unit)
         except Exception as e:
             print(f"Error checking vulnerabilities for \
-                  {dependency_name}@{dependency_version}: {e}")
\ No newline at end of file
+                  {dependency_name}@{dependency_version}: {e}")
+
+    def fetch_advisories(self, ecosystem: str, dependency_name: str):
+        """Returns the advisories for a package, querying each package only once."""
+        key = (ecosystem, dependency_name)
+        if key in self.advisories:
+            metrics.inc("cache_hits_total", cache="advisories")
+        else:
+            metrics.inc("cache_misses_total", cache="advisories")
+            self.advisories[key] = self.github_api.fetch_security_vulnerabilities(
+                ecosystem,
+                dependency_name
+            )
+        return self.advisories[key]
@@ -0,0 +1,160 @@
+import csv
+import glob
+import os
+import socket
+from itertools import islice
+from typing import List, Tuple
+from api.github_api import GitHubAPI
+from utils.csv_writer import CSVWriter
+from utils.background_writer import BackgroundWriter
+from utils.work_queue import WorkQueue
+from utils.graph_store import GraphStore
+from utils.dependency_index import IndexingWriter
+from utils.manifest_discovery import ManifestDiscovery
+from utils.metrics import metrics
+from services.dependency_service import DependencyService
+
+class WorkerService:
+    """Pulls repositories from a shared `WorkQueue` and analyzes their dependencies.
+
+    Every worker writes to its own `<output>.worker-<id>.csv`, so workers never
+    contend on a file; `merge` combines them once the queue is drained.
+    """
+    def __init__(self, github_api: GitHubAPI, queue_file: str, output_file: str, headers: List[str],
+                 worker_id: str = None, graph_store: GraphStore = None,
+                 discovery: ManifestDiscovery = None, fetch_workers: int = 8,
+                 prune_by_language: bool = True, probe_baseline: List[str] = None,
+                 fetch_mode: str = "contents", repo_budget: float = None,
+                 incomplete_file: str = None, incomplete_headers: List[str] = None):
+        self.github_api = github_api
+        self.queue_file = queue_file
+        self.output_file = output_file
+        self.headers = headers
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.graph_store = graph_store
+        self.discovery = discovery
+        self.fetch_workers = fetch_workers
+        self.prune_by_language = prune_by_language
+        self.probe_baseline = probe_baseline
+        self.fetch_mode = fetch_mode
+        self.repo_budget = repo_budget
+        self.incomplete_file = incomplete_file
+        self.incomplete_headers = incomplete_headers
+
+    @staticmethod
+    def worker_file(output_file: str, worker_id: str) -> str:
+        base, dot, extension = output_file.rpartition(".")
+        if not dot or "/" in extension:
+            # No extension to keep, as in `--metrics-file metrics`.
+            return f"{output_file}.worker-{worker_id}"
+        return f"{base}.worker-{worker_id}.{extension}"
+
+    def run(self) -> int:
+        """Processes jobs until the queue is empty and returns how many were completed."""
+        queue = WorkQueue(self.queue_file)
+        writer = BackgroundWriter(
+            CSVWriter(self.worker_file(self.output_file, self.worker_id), self.headers)
+        )
+        # Skipped files are listed per worker, like the rows themselves.
+        incomplete_writer = None
+        if self.incomplete_file:
+            incomplete_writer = BackgroundWriter(
+                CSVWriter(self.worker_file(self.incomplete_file, self.worker_id), self.incomplete_headers)
+            )
+        dependency_service = DependencyService(
+            self.github_api, writer, graph_store=self.graph_store,
+            discovery=self.discovery, fetch_workers=self.fetch_workers,
+            prune_by_language=self.prune_by_language, probe_baseline=self.probe_baseline,
+            fetch_mode=self.fetch_mode, repo_budget=self.repo_budget,
+            incomplete_writer=incomplete_writer
+        )
+        self.completion_queue = None
+        completed = 0
+
+        try:
+            while True:
+                job = queue.claim(self.worker_id)
+                if not job:
+                    break
+                try:
+                    # Held back until the whole repository succeeded, so a
+                    # failed attempt leaves no rows behind to be merged twice.
+                    rows = list(dependency_service.iter_dependencies(job["owner"], job["repo"], job["url"]))
+                except Exception as e:
+                    print(f"Worker {self.worker_id} releasing {job['key']} for a retry: {e}")
+                    queue.release(job["key"], self.worker_id)
+                    continue
+                for row in rows:
+                    writer.append_row(row)
+                # Rows must be on disk before the job is reported as done, so
+                # completion happens on the writer thread after they are written.
+                writer.mark(lambda key=job["key"]: self.complete(key))
+                completed += 1
+        finally:
+            writer.mark(self.close_completion_queue)
+            writer.close()
+            if incomplete_writer is not None:
+                incomplete_writer.close()
+            queue.close()
+        return completed
+
+    def complete(self, key: str):
+        # SQLite connections are bound to their thread, so the writer thread
+        # keeps its own.
+        if self.completion_queue is None:
+            self.completion_queue = WorkQueue(self.queue_file)
+        if not self.completion_queue.complete(key, self.worker_id):
+            print(f"Worker {self.worker_id} lost the lease on {key}")
+
+    def close_completion_queue(self):
+        if self.completion_queue is not None:
+            self.completion_queue.close()
+
+    @staticmethod
+    def merge(queue_file: str, output_file: str, headers: List[str], index_file: str = None) -> int:
+        """Combines per-worker outputs, keeping each repository's rows from the
+        worker that completed it so abandoned attempts are not duplicated.
+        Only merged rows are indexed, so abandoned attempts never reach the index."""
+        queue = WorkQueue(queue_file)
+        owners = queue.completed_by()
+        queue.close()
+
+        writer = CSVWriter(output_file, headers)
+        if index_file:
+            writer = IndexingWriter(writer, index_file)
+        merged = 0
+        prefix, suffix = WorkerService.worker_file(output_file, "*").split("*")
+        for worker_file in sorted(glob.glob(f"{prefix}*{suffix}")):
+            worker_id = worker_file[len(prefix):len(worker_file) - len(suffix)]
+            with open(worker_file, mode="r", encoding="utf-8") as file:
+                rows = (row for row in csv.DictReader(file) if owners.get(row["repo"]) == worker_id)
+                # Streamed in batches so a worker file never has to fit in memory.
+                for batch in iter(lambda: list(islice(rows, 10000)), []):
+                    writer.write_rows(batch)
+                    merged += len(batch)
+        if index_file:
+            writer.close()
+        return merged
+
+def run_worker(token: str, base_url: str, queue_file: str, output_file: str, headers: List[str],
+               worker_id: str, metrics_file: str = None, graphs_dir: str = None,
+               discovery: ManifestDiscovery = None, fetch_workers: int = 8,
+               prune_by_language: bool = True, probe_baseline: List[str] = None,
+               fetch_mode: str = "contents", repo_budget: float = None,
+               timeouts: Tuple[float, float] = (10.0, 60.0), incomplete_file: str = None,
+               incomplete_headers: List[str] = None):
+    """Entry point for a worker process."""
+    service = WorkerService(
+        GitHubAPI(token, base_url, *timeouts), queue_file, output_file, headers, worker_id,
+        GraphStore(graphs_dir) if graphs_dir else None, discovery, fetch_workers,
+        prune_by_language, probe_baseline, fetch_mode, repo_budget,
+        incomplete_file, incomplete_headers
+    )
+    try:
+        completed = service.run()
+        print(f"Worker {service.worker_id} completed {completed} repositories")
+    finally:
+        print(metrics.summary())
+        if metrics_file:
+            # Each process has its own registry, so each exports its own file.
+            metrics.write_textfile(WorkerService.worker_file(metrics_file, worker_id))
@@ -0,0 +1,106 @@
+import atexit
+import queue
+import threading
+from typing import Callable, Dict
+from utils.profiler import profiler
+
+_STOP = object()
+
+class BackgroundWriter:
+    """Writes rows on a dedicated thread fed by a bounded queue.
+
+    Producers call `append_row` exactly as they would on a `CSVWriter`; the
+    call only blocks when the queue is full, which throttles producers to the
+    speed of the disk instead of letting memory grow without bound.
+    """
+    def __init__(self, writer, max_queue_size: int = 10000, batch_size: int = 500):
+        self.writer = writer
+        self.batch_size = batch_size
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.rows_written = 0
+        self.error = None
+        self.closed = False
+        self.thread = threading.Thread(
+            target=self._run,
+            name=f"writer:{getattr(writer, 'file_name', type(writer).__name__)}",
+            daemon=True
+        )
+        self.thread.start()
+        # Flush whatever is still queued if the caller never closes us.
+        atexit.register(self.close)
+
+    def append_row(self, row: Dict):
+        """Queues a row for writing, blocking while the queue is full."""
+        self._put(("row", row))
+
+    def mark(self, callback: Callable[[], None]):
+        """Runs `callback` on the writer thread once every row queued before it is written."""
+        self._put(("mark", callback))
+
+    def close(self):
+        """Flushes all queued rows and stops the writer thread."""
+        if self.closed:
+            return
+        self.closed = True
+        atexit.unregister(self.close)
+        self.queue.put((None, _STOP))
+        self.thread.join()
+        if self.error:
+            raise Exception(f"Background writer failed: {self.error}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _put(self, item):
+        if self.error:
+            raise Exception(f"Background writer failed: {self.error}")
+        if self.closed:
+            raise Exception("Background writer is closed")
+        self.queue.put(item)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            rows = []
+            for kind, payload in batch:
+                if payload is _STOP:
+                    stopping = True
+                elif kind == "row":
+                    rows.append(payload)
+                elif kind == "mark":
+                    self._write(rows)
+                    rows = []
+                    self._call(payload)
+            self._write(rows)
+        # Writers holding resources of their own release them on this thread.
+        if hasattr(self.writer, "close"):
+            self._call(self.writer.close)
+
+    def _write(self, rows):
+        # After a failure keep draining the queue so producers never deadlock.
+        if not rows or self.error:
+            return
+        try:
+            with profiler.stage("write"):
+                self.writer.write_rows(rows)
+            self.rows_written += len(rows)
+        except Exception as e:
+            self.error = e
+
+    def _call(self, callback):
+        if self.error:
+            return
+        try:
+            callback()
+        except Exception as e:
+            self.error = e
@@ -0,0 +1,28 @@
+import threading
+import time
+from typing import Optional
+
+class Budget:
+    """Time allowance for one unit of work, shared with the threads doing it.
+
+    Work checks `expired` between steps and caps blocking calls at
+    `remaining`; `cancel` ends the budget early, e.g. when the consumer
+    stops, so every thread sees the same signal.
+    """
+    def __init__(self, seconds: float = None):
+        self.deadline = time.monotonic() + seconds if seconds else None
+        self.cancelled = threading.Event()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, or None when there is no deadline."""
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        if self.cancelled.is_set():
+            return True
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def cancel(self):
+        self.cancelled.set()
@@ -0,0 +1,213 @@
+import json
+import mmap
+import os
+import struct
+from array import array
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
+from utils.metrics import metrics
+
+MAGIC = b"DEPCOL1\0"
+# Narrowest array type for the codes of a row group, by largest code.
+CODE_TYPES = [(0xFF, "B"), (0xFFFF, "H"), (0xFFFFFFFF, "I")]
+
+class ColumnStoreWriter:
+    """Writes rows as a dictionary-encoded columnar file.
+
+    Every column is stored as integer codes into a per-column dictionary of
+    distinct strings. Codes are buffered and flushed about every
+    `group_rows` rows as one contiguous array per column, each in the
+    narrowest of 8, 16 or 32 bits that fits, so low-cardinality columns such
+    as the ecosystem and operator take a byte per row. Memory holds one row
+    group plus the dictionaries. The dictionaries and a
+    JSON footer locating everything are written by `close`; a file that was
+    never closed cannot be read and resuming into one is not supported.
+
+    Layout: MAGIC, row groups (one array per column, 8-byte aligned),
+    dictionaries (an array of end offsets and the UTF-8 bytes of all
+    values), the footer, then the footer offset and MAGIC again.
+    """
+    def __init__(self, file_name: str, headers: List[str], group_rows: int = 65536):
+        self.file_name = file_name
+        self.headers = headers
+        self.group_rows = group_rows
+        self.dictionaries = [{} for _ in headers]
+        self.codes = [array("I") for _ in headers]
+        self.groups = []
+        self.rows = 0
+        self.file = open(file_name, mode="wb")
+        self.file.write(MAGIC)
+
+    def append_row(self, row: Dict):
+        self.write_rows([row])
+
+    def write_rows(self, rows: List[Dict]):
+        """Encodes a batch of rows column by column, then flushes a full row group."""
+        for column, dictionary, codes in zip(self.headers, self.dictionaries, self.codes):
+            get = dictionary.get
+            for value in [row.get(column) for row in rows]:
+                code = get(value)
+                if code is None:
+                    value = "" if value is None else str(value)
+                    code = get(value)
+                    if code is None:
+                        code = dictionary[value] = len(dictionary)
+                codes.append(code)
+        self.rows += len(rows)
+        if len(self.codes[0]) >= self.group_rows:
+            self._flush_group()
+        metrics.inc("rows_written_total", len(rows), file=self.file_name)
+
+    def close(self):
+        """Writes the last row group, the dictionaries and the footer."""
+        if self.file.closed:
+            return
+        self._flush_group()
+        dictionaries = []
+        for dictionary in self.dictionaries:
+            values = [value.encode("utf-8") for value in dictionary]
+            ends = array("Q")
+            end = 0
+            for value in values:
+                end += len(value)
+                ends.append(end)
+            dictionaries.append({"count": len(values), "ends": self._write_array(ends)})
+            dictionaries[-1]["values"] = self.file.tell()
+            self.file.write(b"".join(values))
+        footer = json.dumps({
+            "columns": [
+                {"name": column, "dictionary": dictionary}
+                for column, dictionary in zip(self.headers, dictionaries)
+            ],
+            "groups": self.groups,
+            "rows": self.rows,
+        }).encode("utf-8")
+        footer_offset = self.file.tell()
+        self.file.write(footer)
+        self.file.write(struct.pack("<Q", footer_offset))
+        self.file.write(MAGIC)
+        self.file.close()
+
+    def _flush_group(self):
+        rows = len(self.codes[0])
+        if not rows:
+            return
+        offsets, typecodes = [], []
+        for codes in self.codes:
+            largest = max(codes)
+            typecode = next(typecode for limit, typecode in CODE_TYPES if largest <= limit)
+            offsets.append(self._write_array(array(typecode, codes)))
+            typecodes.append(typecode)
+        self.groups.append({"rows": rows, "offsets": offsets, "typecodes": typecodes})
+        self.codes = [array("I") for _ in self.headers]
+        # Keep the footprint on disk visible to the journal as rows are flushed.
+        self.file.flush()
+
+    def _write_array(self, values: array) -> int:
+        padding = -self.file.tell() % 8
+        if padding:
+            self.file.write(b"\0" * padding)
+        offset = self.file.tell()
+        values.tofile(self.file)
+        return offset
+
+class ColumnStoreReader:
+    """Reads a file written by `ColumnStoreWriter` through a memory map.
+
+    `codes` hands out each row group of a column as a memoryview straight
+    over the mapped file, so scans never copy the data; dictionaries are
+    decoded on first use. Views must not be kept past `close`.
+    """
+    @staticmethod
+    def is_column_store(file_name: str) -> bool:
+        """Checks whether a file starts like a column store rather than a CSV."""
+        with open(file_name, mode="rb") as file:
+            return file.read(len(MAGIC)) == MAGIC
+
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        with open(file_name, mode="rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size < 2 * len(MAGIC) + 8:
+                raise Exception(f"{file_name} is not a complete column store")
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self.map)
+        try:
+            if bytes(view[:len(MAGIC)]) != MAGIC or bytes(view[-len(MAGIC):]) != MAGIC:
+                raise Exception(f"{file_name} is not a complete column store")
+            footer_offset, = struct.unpack("<Q", view[-len(MAGIC) - 8:-len(MAGIC)])
+            footer = json.loads(bytes(view[footer_offset:-len(MAGIC) - 8]))
+        finally:
+            view.release()
+        self.headers = [column["name"] for column in footer["columns"]]
+        self.columns = {column["name"]: (index, column) for index, column in enumerate(footer["columns"])}
+        self.groups = footer["groups"]
+        self.rows = footer["rows"]
+        self.dictionaries = {}
+        self.views = []
+
+    def dictionary(self, column: str) -> List[str]:
+        """Returns the distinct values of a column, indexed by code."""
+        values = self.dictionaries.get(column)
+        if values is None:
+            meta = self.columns[column][1]["dictionary"]
+            ends = array("Q")
+            ends.frombytes(self.map[meta["ends"]:meta["ends"] + 8 * meta["count"]])
+            blob = self.map[meta["values"]:meta["values"] + (ends[-1] if ends else 0)]
+            start = 0
+            values = []
+            for end in ends:
+                values.append(blob[start:end].decode("utf-8"))
+                start = end
+            self.dictionaries[column] = values
+        return values
+
+    def codes(self, column: str) -> Iterator[memoryview]:
+        """Yields the codes of a column, one zero-copy view per row group."""
+        index = self.columns[column][0]
+        for group in self.groups:
+            offset, typecode = group["offsets"][index], group["typecodes"][index]
+            size = group["rows"] * array(typecode).itemsize
+            view = memoryview(self.map)[offset:offset + size].cast(typecode)
+            self.views.append(view)
+            yield view
+
+    def column(self, column: str) -> Iterator[str]:
+        """Yields the decoded values of a column in row order."""
+        values = self.dictionary(column)
+        for codes in self.codes(column):
+            yield from map(values.__getitem__, codes)
+
+    def value_counts(self, column: str) -> Counter:
+        """Counts the rows holding each value of a column without decoding any row."""
+        counts = Counter()
+        for codes in self.codes(column):
+            counts.update(codes)
+        values = self.dictionary(column)
+        return Counter({values[code]: count for code, count in counts.items()})
+
+    def iter_rows(self, columns: Optional[List[str]] = None) -> Iterator[Tuple[str, ...]]:
+        """Yields tuples of the requested columns (all by default), row by row."""
+        columns = columns or self.headers
+        dictionaries = [self.dictionary(column) for column in columns]
+        for group in zip(*(self.codes(column) for column in columns)):
+            decoded = [map(values.__getitem__, codes) for values, codes in zip(dictionaries, group)]
+            yield from zip(*decoded)
+
+    def iter_dicts(self, columns: Optional[List[str]] = None) -> Iterator[Dict]:
+        """Yields rows as dictionaries, like `csv.DictReader` over the CSV output."""
+        columns = columns or self.headers
+        for row in self.iter_rows(columns):
+            yield dict(zip(columns, row))
+
+    def close(self):
+        for view in self.views:
+            view.release()
+        self.views = []
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
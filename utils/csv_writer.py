@@ -1,11 +1,20 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
 import csv
+import os
+from utils.metrics import metrics
 
 class CSVWriter:
-    def __init__(self, file_name: str, headers: List[str]):
+    def __init__(self, file_name: str, headers: List[str], resume_offset: Optional[int] = None):
         self.file_name = file_name
         self.headers = headers
 
+        if resume_offset is not None and os.path.exists(self.file_name):
+            # Drop rows written after the last checkpoint so a resumed run
+            # does not duplicate them.
+            with open(self.file_name, mode="r+b") as file:
+                file.truncate(resume_offset)
+            return
+
         # Create the CSV file with headers if it doesn't exist
         with open(self.file_name, mode="w", newline="", encoding="utf-8") as file:
             writer = csv.DictWriter(file, fieldnames=self.headers)
@@ -13,6 +22,11 @@ class CSVWriter:
 
     def append_row(self, row: Dict):
         """Appends a single row to the CSV file."""
+        self.write_rows([row])
+
+    def write_rows(self, rows: List[Dict]):
+        """Appends a batch of rows to the CSV file with a single open."""
         with open(self.file_name, mode="a", newline="", encoding="utf-8") as file:
             writer = csv.DictWriter(file, fieldnames=self.headers)
-            writer.writerow(row)
+            writer.writerows(rows)
+        metrics.inc("rows_written_total", len(rows), file=self.file_name)
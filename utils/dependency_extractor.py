@@ -1,9 +1,100 @@
+import os
 import re
 import json
 import yaml
 import tomli
 import xml.etree.ElementTree as ET
-from typing import List, Dict
+from typing import Callable, Dict, Iterator, List
+
+# libyaml's C loader is an order of magnitude faster than the pure-Python one
+# and accepts the same documents, so use it whenever PyYAML was built with it.
+YAMLLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+def _load_orjson() -> Callable:
+    import orjson
+    # orjson.JSONDecodeError already subclasses json.JSONDecodeError.
+    return orjson.loads
+
+def _load_ujson() -> Callable:
+    import ujson
+
+    def loads(content):
+        try:
+            return ujson.loads(content)
+        except ValueError as e:
+            raise json.JSONDecodeError(str(e), content, 0)
+    return loads
+
+# Faster JSON decoders in order of preference; the standard library is the
+# fallback. Each raises json.JSONDecodeError so parsers need not care which
+# one is active.
+JSON_BACKENDS = {
+    "orjson": _load_orjson,
+    "ujson": _load_ujson,
+    "json": lambda: json.loads,
+}
+
+def use_json_backend(name: str = None) -> str:
+    """Selects the JSON decoder by name, or the fastest one installed."""
+    global json_loads
+    for candidate in [name] if name else JSON_BACKENDS:
+        try:
+            json_loads = JSON_BACKENDS[candidate]()
+            return candidate
+        except ImportError:
+            continue
+    raise ImportError(f"JSON backend {name} is not installed")
+
+json_loads = json.loads
+try:
+    use_json_backend(os.environ.get("DEPENDENCY_ANALYZER_JSON"))
+except (KeyError, ImportError) as e:
+    # A bad environment setting must not stop the package from importing.
+    print(f"Cannot use JSON backend {os.environ.get('DEPENDENCY_ANALYZER_JSON')} ({e!r}), falling back to json")
+    json_loads = json.loads
+
+def load_yaml(content: str):
+    """Parses YAML with the fastest available safe loader."""
+    return yaml.load(content, Loader=YAMLLoader)
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+def iter_xml_elements(content: str, name: str, chunk_size: int = 1 << 16) -> Iterator[ET.Element]:
+    """Streams the elements called `name`, in any namespace, as they close.
+
+    The document is fed to the parser in chunks and never built as a full
+    tree: every element is dropped from its parent once it has closed and
+    the caller has read it, unless it sits inside a matching element that
+    is still open.
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    # Elements that are open, and how many of them match `name`.
+    open_elements = []
+    matching = 0
+    for start in range(0, len(content) + 1, chunk_size):
+        if start < len(content):
+            parser.feed(content[start:start + chunk_size])
+        else:
+            parser.close()
+        for event, element in parser.read_events():
+            matches = _local_name(element.tag) == name
+            if event == "start":
+                open_elements.append(element)
+                matching += matches
+                continue
+            open_elements.pop()
+            matching -= matches
+            if matches:
+                yield element
+            if matching == 0:
+                element.clear()
+                if open_elements:
+                    open_elements[-1].remove(element)
+
+def xml_children(element: ET.Element) -> Dict[str, str]:
+    """Maps the local names of an element's children to their text."""
+    return {_local_name(child.tag): (child.text or "").strip() for child in element}
 
 class DependencyExtractor:
     @staticmethod
@@ -89,7 +180,7 @@ class DependencyExtractor:
         """Parses a Pipfile.lock file content."""
         dependencies = []
         try:
-            data = json.loads(content)
+            data = json_loads(content)
             for dep, info in data.get("_meta", {}).get("requires", {}).items():
                 dependencies.append({
                     "ecosystem": "PIP",
@@ -135,7 +226,7 @@ class DependencyExtractor:
         """Parses a environment.yml file content."""
         dependencies = []
         try:
-            data = yaml.safe_load(content)
+            data = load_yaml(content)
             deps = data.get("dependencies", [])
             for dep in deps:
                 if isinstance(dep, str):
@@ -202,7 +293,7 @@ class DependencyExtractor:
         """Parses a package.json file content."""
         dependencies = []
         try:
-            data = json.loads(content)
+            data = json_loads(content)
             deps = data.get("dependencies", {})
             for dep, version in deps.items():
                 dependencies.append({
@@ -220,7 +311,21 @@ class DependencyExtractor:
         """Parses a package-lock.json file content."""
         dependencies = []
         try:
-            data = json.loads(content)
+            data = json_loads(content)
+            # Lockfile v2/v3 list every installed package under "packages",
+            # keyed by install path; v1 only has the "dependencies" map.
+            packages = data.get("packages")
+            if packages:
+                for path, info in packages.items():
+                    if "node_modules/" not in path or info.get("link"):
+                        continue
+                    dependencies.append({
+                        "ecosystem": "NPM",
+                        "name": info.get("name") or path.rsplit("node_modules/", 1)[-1],
+                        "operator": "",
+                        "version": info.get("version", "")
+                    })
+                return dependencies
             deps = data.get("dependencies", {})
             for dep, info in deps.items():
                 dependencies.append({
@@ -284,7 +389,7 @@ class DependencyExtractor:
         dependencies = []
 
         try:
-            data = yaml.safe_load(content)
+            data = load_yaml(content)
         except yaml.YAMLError as e:
             print(f"Error loading YAML: {e}")
             return dependencies
@@ -314,7 +419,7 @@ class DependencyExtractor:
         """Parses a bower.json file content."""
         dependencies = []
         try:
-            data = json.loads(content)
+            data = json_loads(content)
             deps = data.get("dependencies", {})
             for dep, version in deps.items():
                 dependencies.append({
@@ -363,7 +468,7 @@ class DependencyExtractor:
         """Parses a composer.json file content."""
         dependencies = []
         try:
-            data = json.loads(content)
+            data = json_loads(content)
             deps = data.get("require", {})
             for dep, version in deps.items():
                 dependencies.append({
@@ -381,7 +486,7 @@ class DependencyExtractor:
         """Parses a composer.lock file content."""
         dependencies = []
         try:
-            data = json.loads(content)
+            data = json_loads(content)
             packages = data.get("packages", [])
             for package in packages:
                 name = package.get("name", "")
@@ -400,10 +505,10 @@ class DependencyExtractor:
     def parse_pom_xml(content: str) -> List[Dict]:
         """Parses a pom.xml file content."""
         dependencies = []
-        root = ET.fromstring(content)
-        for dep in root.findall(".//dependency"):
-            name = dep.findtext("artifactId")
-            version = dep.findtext("version")
+        for dep in iter_xml_elements(content, "dependency"):
+            fields = xml_children(dep)
+            name = fields.get("artifactId")
+            version = fields.get("version")
             dependencies.append({
                 "ecosystem": "MAVEN",
                 "name": name, 
@@ -431,7 +536,7 @@ class DependencyExtractor:
         """Parses a gradle.lockfile content."""
         dependencies = []
         try:
-            data = json.loads(content)
+            data = json_loads(content)
             for dep, info in data.get("dependencies", {}).items():
                 dependencies.append({
                     "ecosystem": "MAVEN",
@@ -540,8 +645,7 @@ class DependencyExtractor:
     def parse_packages_config_json(content: str) -> List[Dict]:
         """Parses a Packages.config file content."""
         dependencies = []
-        root = ET.fromstring(content)
-        for dep in root.findall(".//package"):
+        for dep in iter_xml_elements(content, "package"):
             name = dep.get("id")
             version = dep.get("version")
             dependencies.append({
@@ -557,7 +661,7 @@ class DependencyExtractor:
         """Parses a project.json file content."""
         dependencies = []
         try:
-            data = json.loads(content)
+            data = json_loads(content)
             deps = data.get("dependencies", {})
             for dep, version in deps.items():
                 dependencies.append({
@@ -588,8 +692,7 @@ class DependencyExtractor:
     def parse_nuspec(content: str) -> List[Dict]:
         """Parses a .nuspec file content."""
         dependencies = []
-        root = ET.fromstring(content)
-        for dep in root.findall(".//dependency"):
+        for dep in iter_xml_elements(content, "dependency"):
             name = dep.get("id")
             version = dep.get("version")
             dependencies.append({
@@ -605,7 +708,7 @@ class DependencyExtractor:
         """Parses a project.assets.json file content."""
         dependencies = []
         try:
-            data = json.loads(content)
+            data = json_loads(content)
             targets = data.get("targets", {})
             for target in targets.values():
                 libs = target.get("libraries", {})
@@ -625,7 +728,7 @@ class DependencyExtractor:
         """Parses a packages.lock.json file content."""
         dependencies = []
         try:
-            data = json.loads(content)
+            data = json_loads(content)
             for dep, info in data.get("dependencies", {}).items():
                 dependencies.append({
                     "ecosystem": "NUGET",
@@ -734,7 +837,7 @@ class DependencyExtractor:
         """Parses a glide.yaml file content."""
         dependencies = []
         try:
-            data = yaml.safe_load(content)
+            data = load_yaml(content)
             for dep, version in data.get("import", {}).items():
                 dependencies.append({
                     "ecosystem": "GO",
@@ -751,7 +854,7 @@ class DependencyExtractor:
         """Parses a gogradle.lock file content."""
         dependencies = []
         try:
-            data = json.loads(content)
+            data = json_loads(content)
             for dep, info in data.get("dependencies", {}).items():
                 dependencies.append({
                     "ecosystem": "GO",
@@ -838,7 +941,7 @@ class DependencyExtractor:
         """Parses a pubspec.yaml file content."""
         dependencies = []
         try:
-            data = yaml.safe_load(content)
+            data = load_yaml(content)
             deps = data.get("dependencies", {})
             for dep, version in deps.items():
                 dependencies.append({
@@ -905,4 +1008,60 @@ class DependencyExtractor:
                 "operator": "==", 
                 "version": version
             })
-        return dependencies
\ No newline at end of file
+        return dependencies
+
+# Maps every supported manifest file name to its parser, in the order
+# manifests are probed. Grouped by ecosystem.
+MANIFEST_PARSERS = {
+    "requirements.txt": DependencyExtractor.parse_requirements_txt,  # Python Projects
+    "pyproject.toml": DependencyExtractor.parse_pyproject_toml,
+    "Pipfile": DependencyExtractor.parse_pipfile,
+    "pipfile.toml": DependencyExtractor.parse_pipfile_toml,
+    "pipfile.lock": DependencyExtractor.parse_pipfile_lock,
+    "setup.py": DependencyExtractor.parse_setup_py,
+    "setup.cfg": DependencyExtractor.parse_setup_cfg,
+    "environment.yml": DependencyExtractor.parse_environment_yml,
+    "package.json": DependencyExtractor.parse_package_json,  # JavaScript Projects
+    "package-lock.json": DependencyExtractor.parse_package_lock_json,
+    "yarn.lock": DependencyExtractor.parse_yarn_lock,
+    "webpack.config.js": DependencyExtractor.parse_webpack_config_js,
+    "pnpm-lock.yaml": DependencyExtractor.parse_pnpm_lock_yaml,
+    "bower.json": DependencyExtractor.parse_bower_json,
+    "Gemfile": DependencyExtractor.parse_gemfile,  # Ruby Projects
+    "Gemfile.lock": DependencyExtractor.parse_gemfile_lock,
+    "composer.json": DependencyExtractor.parse_composer_json,  # PHP Projects
+    "composer.lock": DependencyExtractor.parse_composer_lock,
+    "pom.xml": DependencyExtractor.parse_pom_xml,  # Java Projects
+    "gradle.properties": DependencyExtractor.parse_gradle_properties,
+    "gradle.lockfile": DependencyExtractor.parse_gradle_lockfile,
+    "build.gradle": DependencyExtractor.build_gradle,
+    "build.xml": DependencyExtractor.parse_build_xml,
+    "build.gradle.kts": DependencyExtractor.build_gradle_kts,  # Java and Kotlin Projects
+    "settings.gradle": DependencyExtractor.settings_gradle,
+    "Cargo.toml": DependencyExtractor.parse_cargo_toml,  # Rust Projects
+    "Cargo.lock": DependencyExtractor.parse_cargo_lock,
+    "packages.config": DependencyExtractor.parse_packages_config_json,  # .NET Projects
+    "project.json": DependencyExtractor.parse_project_json,
+    ".csproj": DependencyExtractor.parse_csproj,
+    ".nuspec": DependencyExtractor.parse_nuspec,
+    "project.assets.json": DependencyExtractor.parse_project_assets_json,
+    "packages.lock.json": DependencyExtractor.parse_packages_lock_json,
+    ".paket": DependencyExtractor.parse_paket,
+    "paket.dependencies": DependencyExtractor.parse_paket_dependencies,
+    "paket.lock": DependencyExtractor.parse_paket_lock,
+    "go.mod": DependencyExtractor.parse_go_mod,  # Go Projects
+    "go.sum": DependencyExtractor.parse_go_sum,
+    "glide.lock": DependencyExtractor.parse_glide_lock,
+    "glide.yaml": DependencyExtractor.parse_glide_yaml,
+    "gogradle.lock": DependencyExtractor.parse_gogradle_lock,
+    "Gopkg.lock": DependencyExtractor.parse_gopkg_lock,
+    "Godeps.lock": DependencyExtractor.parse_godeps_lock,
+    "vendor.conf": DependencyExtractor.parse_vendor_conf,
+    "CMakeLists.txt": DependencyExtractor.parse_cmakelists_txt,  # C/C++ Projects
+    "Makefile": DependencyExtractor.parse_makefile,
+    "pubspec.yaml": DependencyExtractor.parse_pubsec_yaml,
+    "Podfile": DependencyExtractor.parse_podfile,  # Swift Projects
+    "Podfile.lock": DependencyExtractor.parse_podfile_lock,
+    "packages.swift": DependencyExtractor.parse_packages_swift,
+    "Cartfile": DependencyExtractor.parse_cartfile,
+}
@@ -0,0 +1,154 @@
+from array import array
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Tuple
+
+class DependencyGraph:
+    """Dependency graph of one lockfile, stored compactly.
+
+    Each `(name, version)` pair is interned to an integer node ID. While the
+    graph is built, edges are appended to two parallel integer arrays; `freeze`
+    turns them into CSR adjacency arrays (`offsets`, `targets`) so the
+    children of node `n` are `targets[offsets[n]:offsets[n + 1]]`.
+
+    Lockfiles often name a child before its own entry appears, or only by
+    name, so edges may be added by name and are resolved when frozen.
+    """
+    def __init__(self, ecosystem: str):
+        self.ecosystem = ecosystem
+        self.ids: Dict[Tuple[str, str], int] = {}
+        self.by_name: Dict[str, int] = {}
+        self.names: List[str] = []
+        self.versions: List[str] = []
+        self.direct = bytearray()
+        self.sources = array("I")
+        self.destinations = array("I")
+        self.unresolved: List[Tuple[int, str, Optional[str]]] = []
+        self.offsets: Optional[array] = None
+        self.targets: Optional[array] = None
+
+    def __len__(self):
+        return len(self.names)
+
+    def node(self, name: str, version: str = "") -> int:
+        """Returns the ID of `name@version`, adding the node if needed."""
+        key = (name, version or "")
+        node_id = self.ids.get(key)
+        if node_id is None:
+            node_id = self.ids[key] = len(self.names)
+            self.names.append(name)
+            self.versions.append(version or "")
+            self.direct.append(0)
+            self.by_name.setdefault(name, node_id)
+        return node_id
+
+    def mark_direct(self, node_id: int):
+        self.direct[node_id] = 1
+
+    def add_edge(self, parent: int, child: int):
+        self.sources.append(parent)
+        self.destinations.append(child)
+
+    def add_edge_by_name(self, parent: int, name: str, version: str = None):
+        """Adds an edge to a child that may not have been seen yet."""
+        self.unresolved.append((parent, name, version))
+
+    def resolve(self, name: str, version: str = None) -> int:
+        """Finds the node for `name`, preferring an exact version match."""
+        if version is not None and (name, version) in self.ids:
+            return self.ids[(name, version)]
+        if name in self.by_name:
+            return self.by_name[name]
+        return self.node(name, version or "")
+
+    def freeze(self) -> "DependencyGraph":
+        """Resolves pending edges and builds the CSR adjacency arrays."""
+        for parent, name, version in self.unresolved:
+            self.add_edge(parent, self.resolve(name, version))
+        self.unresolved = []
+
+        node_count = len(self.names)
+        edges = sorted(set(zip(self.sources, self.destinations)))
+        self.offsets = array("I", [0]) * (node_count + 1)
+        for source, _ in edges:
+            self.offsets[source + 1] += 1
+        for index in range(node_count):
+            self.offsets[index + 1] += self.offsets[index]
+        self.targets = array("I", (destination for _, destination in edges))
+        self.sources = array("I")
+        self.destinations = array("I")
+
+        # Without explicit information, packages nothing depends on are the
+        # ones the project asked for.
+        if not any(self.direct):
+            for destination in self.targets:
+                self.direct[destination] = 2
+            for index in range(node_count):
+                self.direct[index] = 1 if self.direct[index] == 0 else 0
+        return self
+
+    def children(self, node_id: int) -> array:
+        return self.targets[self.offsets[node_id]:self.offsets[node_id + 1]]
+
+    def label(self, node_id: int) -> str:
+        version = self.versions[node_id]
+        return f"{self.names[node_id]}@{version}" if version else self.names[node_id]
+
+    def paths_to(self, name: str) -> Iterator[List[str]]:
+        """Yields, for each direct dependency that pulls in `name`, the
+        shortest chain of packages leading to it."""
+        goals = {index for index, node_name in enumerate(self.names) if node_name == name}
+        if not goals:
+            return
+        for start in range(len(self.names)):
+            if not self.direct[start]:
+                continue
+            parents = {start: None}
+            queue = deque([start])
+            while queue:
+                current = queue.popleft()
+                if current in goals:
+                    path = []
+                    while current is not None:
+                        path.append(self.label(current))
+                        current = parents[current]
+                    yield list(reversed(path))
+                    break
+                for child in self.children(current):
+                    if child not in parents:
+                        parents[child] = current
+                        queue.append(child)
+
+    def rows(self) -> Iterator[Dict]:
+        """Yields one dependency row per node with its direct/transitive scope."""
+        for index, name in enumerate(self.names):
+            yield {
+                "ecosystem": self.ecosystem,
+                "name": name,
+                "version": self.versions[index],
+                "scope": "direct" if self.direct[index] else "transitive",
+            }
+
+    def to_dict(self) -> Dict:
+        return {
+            "ecosystem": self.ecosystem,
+            "names": self.names,
+            "versions": self.versions,
+            "direct": [index for index, flag in enumerate(self.direct) if flag],
+            "offsets": list(self.offsets),
+            "targets": list(self.targets),
+        }
+
+    @staticmethod
+    def from_dict(data: Dict) -> "DependencyGraph":
+        graph = DependencyGraph(data["ecosystem"])
+        graph.names = data["names"]
+        graph.versions = data["versions"]
+        graph.ids = {(name, version): index for index, (name, version) in enumerate(zip(graph.names, graph.versions))}
+        for index, name in enumerate(graph.names):
+            graph.by_name.setdefault(name, index)
+        graph.direct = bytearray(len(graph.names))
+        for index in data["direct"]:
+            graph.direct[index] = 1
+        graph.offsets = array("I", data["offsets"])
+        graph.targets = array("I", data["targets"])
+        return graph
@@ -0,0 +1,186 @@
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from packaging.specifiers import InvalidSpecifier, SpecifierSet
+from packaging.version import InvalidVersion, Version
+
+class DependencyIndex:
+    """Persistent inverted index from `(ecosystem, name)` to the repositories,
+    versions and manifests that use a package.
+
+    Repository and package names are interned into their own tables, and
+    usages are clustered by package ID, so a lookup reads one contiguous
+    range of the table however many rows the index holds. The first batch
+    that mentions a manifest of a repository replaces what was indexed for
+    that manifest before, so a rescan drops the usages it no longer finds,
+    while a resumed run keeps the manifests it does not rewrite.
+
+    Version ranges are PEP 440 specifiers, so they only apply to ecosystems
+    in `RANGE_ECOSYSTEMS`.
+    """
+    RANGE_ECOSYSTEMS = ("PIP",)
+
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        self.connection = sqlite3.connect(file_name, timeout=60, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS packages (
+                id INTEGER PRIMARY KEY,
+                ecosystem TEXT NOT NULL,
+                name TEXT NOT NULL COLLATE NOCASE,
+                UNIQUE (ecosystem, name)
+            );
+            CREATE INDEX IF NOT EXISTS packages_name ON packages (name);
+            CREATE TABLE IF NOT EXISTS repositories (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE
+            );
+            CREATE TABLE IF NOT EXISTS usages (
+                package_id INTEGER NOT NULL,
+                repository_id INTEGER NOT NULL,
+                source_file TEXT NOT NULL,
+                version TEXT NOT NULL,
+                PRIMARY KEY (package_id, repository_id, source_file, version)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS usages_repository ON usages (repository_id, source_file);
+        """)
+        self.package_ids: Dict[tuple, int] = {}
+        self.repository_ids: Dict[str, int] = {}
+        # (repo, source_file) pairs whose old usages this connection has
+        # already dropped; their rows may arrive over several batches.
+        self.replaced: Set[Tuple[str, str]] = set()
+
+    def add(self, rows: Iterable[Dict]):
+        """Indexes a batch of dependency rows in one transaction."""
+        rows = [row for row in rows if row.get("name")]
+        replacing = {(row.get("repo") or "", row.get("source_file") or "") for row in rows} - self.replaced
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            self.connection.executemany(
+                "DELETE FROM usages WHERE repository_id = ? AND source_file = ?",
+                [(self.repository_id(repo), source_file) for repo, source_file in replacing]
+            )
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO usages VALUES (?, ?, ?, ?)",
+                [
+                    (self.package_id(row.get("ecosystem") or "", row.get("name") or ""),
+                     self.repository_id(row.get("repo") or ""),
+                     row.get("source_file") or "", row.get("version") or "")
+                    for row in rows
+                ]
+            )
+            self.connection.execute("COMMIT")
+        except Exception:
+            self.connection.execute("ROLLBACK")
+            # IDs handed out inside the failed transaction no longer exist.
+            self.package_ids.clear()
+            self.repository_ids.clear()
+            raise
+        self.replaced |= replacing
+
+    def package_id(self, ecosystem: str, name: str) -> int:
+        key = (ecosystem, name.lower())
+        if key not in self.package_ids:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO packages (ecosystem, name) VALUES (?, ?)", (ecosystem, name)
+            )
+            self.package_ids[key] = self.connection.execute(
+                "SELECT id FROM packages WHERE ecosystem = ? AND name = ?", (ecosystem, name)
+            ).fetchone()[0]
+        return self.package_ids[key]
+
+    def repository_id(self, repo: str) -> int:
+        if repo not in self.repository_ids:
+            self.connection.execute("INSERT OR IGNORE INTO repositories (name) VALUES (?)", (repo,))
+            self.repository_ids[repo] = self.connection.execute(
+                "SELECT id FROM repositories WHERE name = ?", (repo,)
+            ).fetchone()[0]
+        return self.repository_ids[repo]
+
+    def query(self, name: str, ecosystem: str = None, version_range: str = None) -> List[Dict]:
+        """Returns the usages of a package, optionally limited to versions in
+        `version_range` (a PEP 440 specifier such as ">=1.0,<2.0"). A range
+        only matches ecosystems in `RANGE_ECOSYSTEMS`."""
+        sql = """
+            SELECT packages.ecosystem, packages.name, repositories.name, usages.source_file, usages.version
+            FROM packages
+            JOIN usages ON usages.package_id = packages.id
+            JOIN repositories ON repositories.id = usages.repository_id
+            WHERE packages.name = ?
+        """
+        parameters = [name]
+        if ecosystem:
+            sql += " AND packages.ecosystem = ?"
+            parameters.append(ecosystem)
+        specifier = None
+        if version_range:
+            if ecosystem and ecosystem not in self.RANGE_ECOSYSTEMS:
+                raise Exception(f"Version ranges are only supported for {', '.join(self.RANGE_ECOSYSTEMS)} packages")
+            if not ecosystem:
+                sql += f" AND packages.ecosystem IN ({', '.join('?' * len(self.RANGE_ECOSYSTEMS))})"
+                parameters.extend(self.RANGE_ECOSYSTEMS)
+            try:
+                specifier = SpecifierSet(version_range)
+            except InvalidSpecifier:
+                raise Exception(f"Invalid version range: {version_range}")
+
+        results = []
+        for ecosystem, name, repo, source_file, version in self.connection.execute(sql, parameters):
+            if specifier is not None and not self.in_range(version, specifier):
+                continue
+            results.append({
+                "ecosystem": ecosystem,
+                "name": name,
+                "repo": repo,
+                "source_file": source_file,
+                "version": version,
+            })
+        return results
+
+    @staticmethod
+    def in_range(version: str, specifier: SpecifierSet) -> bool:
+        """Checks a recorded version, ignoring operators such as "^" or "==" in front of it."""
+        parsed = DependencyIndex.parse_version(version)
+        return parsed is not None and specifier.contains(parsed, prereleases=True)
+
+    @staticmethod
+    def parse_version(version: str) -> Optional[Version]:
+        version = (version or "").lstrip("^~=<>!v ").split(",")[0].strip()
+        try:
+            return Version(version)
+        except InvalidVersion:
+            return None
+
+    def close(self):
+        self.connection.close()
+
+class IndexingWriter:
+    """Writer that indexes every batch it forwards to the wrapped writer.
+
+    Meant to sit inside a `BackgroundWriter`, so the index is updated on the
+    writer thread, in the same batches, right after the rows reach disk. The
+    index is opened lazily because SQLite connections are bound to the thread
+    that creates them.
+    """
+    def __init__(self, writer, index_file: str):
+        self.writer = writer
+        self.file_name = writer.file_name
+        self.index_file = index_file
+        self.index = None
+
+    def write_rows(self, rows: List[Dict]):
+        self.writer.write_rows(rows)
+        if self.index is None:
+            self.index = DependencyIndex(self.index_file)
+        self.index.add(rows)
+
+    def append_row(self, row: Dict):
+        self.write_rows([row])
+
+    def close(self):
+        if self.index is not None:
+            self.index.close()
+            self.index = None
+        if hasattr(self.writer, "close"):
+            self.writer.close()
@@ -0,0 +1,83 @@
+import heapq
+import os
+import shutil
+import tempfile
+from typing import Iterable, Iterator, List
+
+class ExternalSorter:
+    """Sorts more records than fit in memory.
+
+    Records are strings without newlines; callers encode multi-column rows
+    into one string whose plain string order is the order they want (e.g.
+    fields joined with "\\0"), which sorts several times faster than tuples.
+    Records are buffered up to `chunk_rows`, sorted and spilled to a
+    temporary run file, one per line; the runs are then streamed back
+    through a k-way merge. Input that fits in a single chunk never touches
+    the disk. At most `fan_in` runs are opened at once, merging intermediate
+    runs first when there are more.
+    """
+    def __init__(self, chunk_rows: int = 500000, fan_in: int = 64, temp_dir: str = None):
+        self.chunk_rows = chunk_rows
+        self.fan_in = fan_in
+        self.temp_dir = temp_dir
+
+    def sort(self, records: Iterable[str]) -> Iterator[str]:
+        """Yields `records` in sorted order."""
+        directory = None
+        runs = []
+        chunk = []
+        try:
+            for record in records:
+                chunk.append(record)
+                if len(chunk) >= self.chunk_rows:
+                    if directory is None:
+                        directory = tempfile.mkdtemp(prefix="sort-", dir=self.temp_dir)
+                    runs.append(self._spill(chunk, directory, len(runs)))
+                    chunk = []
+            if not runs:
+                chunk.sort()
+                yield from chunk
+                return
+            if chunk:
+                runs.append(self._spill(chunk, directory, len(runs)))
+            chunk = []
+
+            while len(runs) > self.fan_in:
+                merged = []
+                for start in range(0, len(runs), self.fan_in):
+                    group = runs[start:start + self.fan_in]
+                    merged.append(self._merge_to_run(group, directory, f"m{len(runs)}-{start}"))
+                runs = merged
+            for line in self._merge(runs):
+                yield line[:-1]
+        finally:
+            if directory:
+                shutil.rmtree(directory, ignore_errors=True)
+
+    @staticmethod
+    def _spill(chunk: List[str], directory: str, index) -> str:
+        chunk.sort()
+        path = os.path.join(directory, f"run-{index}")
+        with open(path, mode="w", encoding="utf-8", newline="\n") as file:
+            file.write("\n".join(chunk))
+            file.write("\n")
+        return path
+
+    def _merge_to_run(self, runs: List[str], directory: str, index) -> str:
+        path = os.path.join(directory, f"run-{index}")
+        with open(path, mode="w", encoding="utf-8", newline="\n", buffering=1024 * 1024) as file:
+            file.writelines(self._merge(runs))
+        for run in runs:
+            os.remove(run)
+        return path
+
+    @staticmethod
+    def _merge(runs: List[str]) -> Iterator[str]:
+        """Merges run files line by line; lines keep their newline, which sorts
+        below every printable character and so leaves the order intact."""
+        files = [open(run, mode="r", encoding="utf-8", newline="\n", buffering=1024 * 1024) for run in runs]
+        try:
+            yield from heapq.merge(*files)
+        finally:
+            for file in files:
+                file.close()
@@ -0,0 +1,44 @@
+import json
+import os
+from urllib.parse import quote
+from typing import Iterator, List, Tuple
+from utils.dependency_graph import DependencyGraph
+
+class GraphStore:
+    """Keeps one JSON file per (repository, lockfile) dependency graph.
+
+    Files are written atomically and never shared between repositories, so
+    several workers can save into the same directory.
+    """
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, repo: str, source_file: str) -> str:
+        # Both parts are fully quoted, so neither contains "/" or the "+"
+        # between them, and distinct (repo, source_file) pairs never share a file.
+        return os.path.join(self.directory, f"{quote(repo, safe='')}+{quote(source_file, safe='')}.json")
+
+    def save(self, repo: str, source_file: str, graph: DependencyGraph):
+        data = graph.to_dict()
+        data["repo"] = repo
+        data["source_file"] = source_file
+        path = self.path(repo, source_file)
+        with open(f"{path}.tmp", mode="w", encoding="utf-8") as file:
+            json.dump(data, file, separators=(",", ":"))
+        os.replace(f"{path}.tmp", path)
+
+    def iter_graphs(self) -> Iterator[Tuple[str, str, DependencyGraph]]:
+        """Yields (repo, source_file, graph) for every stored graph."""
+        for entry in sorted(os.scandir(self.directory), key=lambda entry: entry.name):
+            if not entry.name.endswith(".json"):
+                continue
+            with open(entry.path, mode="r", encoding="utf-8") as file:
+                data = json.load(file)
+            yield data["repo"], data["source_file"], DependencyGraph.from_dict(data)
+
+    def why(self, name: str) -> Iterator[Tuple[str, str, List[str]]]:
+        """Yields (repo, source_file, path) for each direct dependency that pulls in `name`."""
+        for repo, source_file, graph in self.iter_graphs():
+            for path in graph.paths_to(name):
+                yield repo, source_file, path
@@ -0,0 +1,35 @@
+import math
+
+class HyperLogLog:
+    """Approximate count of distinct strings in fixed memory.
+
+    With the default precision of 14 it uses 16 KB and estimates within
+    about 1% (standard error 1.04 / sqrt(2 ** precision)). Values are hashed
+    with the built-in `hash`, so estimates are only meaningful within one
+    process and sketches are not merged across processes.
+    """
+    def __init__(self, precision: int = 14):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(self.size)
+        self.mask = self.size - 1
+        self.width = 64 - precision
+
+    def add(self, value: str):
+        hashed = hash(value) & 0xFFFFFFFFFFFFFFFF
+        index = hashed & self.mask
+        rest = hashed >> self.precision
+        # Position of the leftmost 1 bit among the remaining bits.
+        rank = self.width - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self) -> int:
+        size = self.size
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * size and zeros:
+            # Linear counting is more accurate while many registers are empty.
+            estimate = size * math.log(size / zeros)
+        return int(round(estimate))
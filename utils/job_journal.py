@@ -0,0 +1,66 @@
+import json
+import os
+import time
+from typing import Optional
+
+class JobJournal:
+    """Durable record of the work units whose output rows have been written.
+
+    The journal lives next to the output file (`<output>.journal`) and stores
+    one JSON line per completed unit together with the size of the output file
+    at that point. On resume the output is truncated back to the last recorded
+    size, so rows of a unit that was interrupted half-way are dropped and then
+    rewritten exactly once.
+    """
+    def __init__(self, output_file: str, resume: bool = False, sync_interval: float = 1.0):
+        self.output_file = output_file
+        self.file_name = f"{output_file}.journal"
+        self.sync_interval = sync_interval
+        self.completed = set()
+        self.resume_offset: Optional[int] = None
+
+        if resume and os.path.exists(self.file_name):
+            self._load()
+        self.file = open(self.file_name, mode="a" if resume else "w", encoding="utf-8")
+        self.last_sync = time.monotonic()
+        if resume:
+            print(f"Resuming {output_file}: {len(self.completed)} units already completed")
+
+    def is_done(self, *unit) -> bool:
+        """Returns True if `unit` was completed by a previous run."""
+        return tuple(unit) in self.completed
+
+    def checkpoint(self, writer, *unit):
+        """Records `unit` as completed once every row queued on `writer` is on disk."""
+        if hasattr(writer, "mark"):
+            writer.mark(lambda: self.mark_done(*unit))
+        else:
+            self.mark_done(*unit)
+
+    def mark_done(self, *unit):
+        """Appends a completed unit and the current output size to the journal."""
+        offset = os.path.getsize(self.output_file)
+        self.file.write(json.dumps({"unit": list(unit), "offset": offset}) + "\n")
+        self.file.flush()
+        if time.monotonic() - self.last_sync >= self.sync_interval:
+            os.fsync(self.file.fileno())
+            self.last_sync = time.monotonic()
+
+    def close(self):
+        """Flushes the journal to disk."""
+        if self.file.closed:
+            return
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+
+    def _load(self):
+        with open(self.file_name, mode="r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash; everything before it is valid.
+                    break
+                self.completed.add(tuple(entry["unit"]))
+                self.resume_offset = entry["offset"]
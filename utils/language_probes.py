@@ -0,0 +1,78 @@
+from typing import Iterable, List
+from utils.dependency_extractor import MANIFEST_PARSERS
+
+# Manifest registry names grouped by the ecosystem that uses them.
+ECOSYSTEM_MANIFESTS = {
+    "python": ["requirements.txt", "pyproject.toml", "Pipfile", "pipfile.toml", "pipfile.lock",
+               "setup.py", "setup.cfg", "environment.yml"],
+    "javascript": ["package.json", "package-lock.json", "yarn.lock", "webpack.config.js",
+                   "pnpm-lock.yaml", "bower.json"],
+    "ruby": ["Gemfile", "Gemfile.lock"],
+    "php": ["composer.json", "composer.lock"],
+    "java": ["pom.xml", "gradle.properties", "gradle.lockfile", "build.gradle", "build.xml",
+             "build.gradle.kts", "settings.gradle"],
+    "rust": ["Cargo.toml", "Cargo.lock"],
+    "dotnet": ["packages.config", "project.json", ".csproj", ".nuspec", "project.assets.json",
+               "packages.lock.json", ".paket", "paket.dependencies", "paket.lock"],
+    "go": ["go.mod", "go.sum", "glide.lock", "glide.yaml", "gogradle.lock", "Gopkg.lock",
+           "Godeps.lock", "vendor.conf"],
+    "c": ["CMakeLists.txt", "Makefile"],
+    "dart": ["pubspec.yaml"],
+    "swift": ["Podfile", "Podfile.lock", "packages.swift", "Cartfile"],
+}
+
+# GitHub linguist language names mapped to the ecosystems they imply.
+LANGUAGE_ECOSYSTEMS = {
+    "Python": ["python"],
+    "Jupyter Notebook": ["python"],
+    "Cython": ["python"],
+    "JavaScript": ["javascript"],
+    "TypeScript": ["javascript"],
+    "CoffeeScript": ["javascript"],
+    "Vue": ["javascript"],
+    "Svelte": ["javascript"],
+    "Astro": ["javascript"],
+    "Ruby": ["ruby"],
+    "PHP": ["php"],
+    "Blade": ["php"],
+    "Hack": ["php"],
+    "Java": ["java"],
+    "Kotlin": ["java"],
+    "Groovy": ["java"],
+    "Scala": ["java"],
+    "Clojure": ["java"],
+    "Rust": ["rust"],
+    "C#": ["dotnet"],
+    "F#": ["dotnet"],
+    "Visual Basic .NET": ["dotnet"],
+    "Go": ["go"],
+    "C": ["c"],
+    "C++": ["c"],
+    "CMake": ["c"],
+    "Makefile": ["c"],
+    "Dart": ["dart"],
+    "Swift": ["swift"],
+    "Objective-C": ["swift"],
+    "Objective-C++": ["swift"],
+}
+
+class LanguageProbes:
+    @staticmethod
+    def manifests(languages: Iterable[str], baseline: Iterable[str] = ()) -> List[str]:
+        """Returns the root manifests worth probing for a repository's languages,
+        in registry order, plus the `baseline` names that are always probed.
+
+        When none of the languages is recognised, every manifest is probed
+        rather than risk missing an unfamiliar stack.
+        """
+        ecosystems = {
+            ecosystem
+            for language in languages
+            for ecosystem in LANGUAGE_ECOSYSTEMS.get(language, [])
+        }
+        if not ecosystems:
+            return list(MANIFEST_PARSERS)
+        wanted = set(baseline)
+        for ecosystem in ecosystems:
+            wanted.update(ECOSYSTEM_MANIFESTS[ecosystem])
+        return [file_name for file_name in MANIFEST_PARSERS if file_name in wanted]
@@ -0,0 +1,149 @@
+import mmap
+import os
+import subprocess
+from typing import Iterator, Optional, Tuple
+from utils.manifest_discovery import ManifestDiscovery
+
+class LocalRepository:
+    """A repository on disk: a working copy, or a bare repository read at HEAD."""
+    # Files at least this large are memory-mapped instead of read into a buffer.
+    MMAP_THRESHOLD = 1024 * 1024
+
+    def __init__(self, name: str, path: str, bare: bool = False):
+        self.name = name
+        self.path = path
+        self.bare = bare
+
+    @property
+    def url(self) -> str:
+        return f"file://{os.path.abspath(self.path)}"
+
+    @staticmethod
+    def find(root: str) -> Iterator["LocalRepository"]:
+        """Yields every repository below `root`, named by its path relative to it.
+
+        The walk stops at each repository, so nothing inside a checkout is
+        visited here.
+        """
+        root = os.path.abspath(root)
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as scan:
+                    entries = sorted(scan, key=lambda entry: entry.name, reverse=True)
+            except OSError as e:
+                print(f"Error scanning {directory}: {e}")
+                continue
+            names = {entry.name for entry in entries}
+            bare = {"HEAD", "objects", "refs"} <= names
+            if ".git" in names or bare:
+                name = os.path.relpath(directory, root).replace(os.sep, "/")
+                if name == ".":
+                    name = os.path.basename(root)
+                yield LocalRepository(name[:-len(".git")] if name.endswith(".git") else name, directory, bare)
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False) and not entry.name.startswith("."):
+                    stack.append(entry.path)
+
+    def manifests(self, discovery: Optional[ManifestDiscovery]) -> Iterator[Tuple[str, str, str]]:
+        """Yields `(path, parser name, content)` for every wanted manifest.
+
+        Without `discovery` only manifests at the repository root are read.
+        """
+        if self.bare:
+            yield from self._bare_manifests(discovery)
+            return
+        for path, file_name in self._walk(discovery):
+            yield path, file_name, self.read_file(os.path.join(self.path, path))
+
+    def _wanted(self, path: str, discovery: Optional[ManifestDiscovery]) -> Optional[str]:
+        if discovery is None:
+            return None if "/" in path else ManifestDiscovery().parser_name(path)
+        file_name = discovery.parser_name(path)
+        return file_name if file_name and discovery.wanted(path) else None
+
+    def _walk(self, discovery: Optional[ManifestDiscovery]) -> Iterator[Tuple[str, str]]:
+        """Walks the working copy with os.scandir, pruning skipped directories."""
+        stack = [""]
+        while stack:
+            prefix = stack.pop()
+            try:
+                with os.scandir(os.path.join(self.path, prefix)) as scan:
+                    entries = sorted(scan, key=lambda entry: entry.name)
+            except OSError as e:
+                print(f"Error scanning {self.name}/{prefix}: {e}")
+                continue
+            for entry in entries:
+                path = f"{prefix}{entry.name}"
+                if entry.is_file(follow_symlinks=False):
+                    file_name = self._wanted(path, discovery)
+                    if file_name:
+                        yield path, file_name
+                elif (discovery is not None and entry.name != ".git"
+                      and entry.is_dir(follow_symlinks=False) and not discovery.skip_directory(path)):
+                    stack.append(f"{path}/")
+
+    def load(self, path: str) -> str:
+        """Reads one file at HEAD by its repository path, or returns "" if there is none."""
+        if self.bare:
+            result = subprocess.run(
+                ["git", "--git-dir", self.path, "cat-file", "blob", f"HEAD:{path}"],
+                capture_output=True, check=False
+            )
+            return result.stdout.decode("utf-8", errors="replace") if result.returncode == 0 else ""
+        full_path = os.path.join(self.path, path)
+        return self.read_file(full_path) if os.path.isfile(full_path) else ""
+
+    @staticmethod
+    def read_file(path: str) -> str:
+        """Reads a text file, memory-mapping large ones so they are decoded
+        straight from the page cache without an intermediate copy."""
+        with open(path, mode="rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size < LocalRepository.MMAP_THRESHOLD:
+                return file.read().decode("utf-8", errors="replace")
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    return str(view, "utf-8", "replace")
+                finally:
+                    # The map cannot close while a view still exports it.
+                    view.release()
+
+    def _bare_manifests(self, discovery: Optional[ManifestDiscovery]) -> Iterator[Tuple[str, str, str]]:
+        """Lists HEAD with one `git ls-tree` and reads the wanted blobs through a
+        single `git cat-file --batch` process."""
+        listing = subprocess.run(
+            ["git", "--git-dir", self.path, "ls-tree", "-r", "-z", "--name-only", "HEAD"],
+            capture_output=True, check=False
+        )
+        if listing.returncode != 0:
+            # An empty repository has no HEAD to list.
+            return
+        wanted = [
+            (path, file_name)
+            for path in listing.stdout.decode("utf-8", errors="replace").split("\0") if path
+            for file_name in [self._wanted(path, discovery)] if file_name
+        ]
+        if not wanted:
+            return
+
+        batch = subprocess.Popen(
+            ["git", "--git-dir", self.path, "cat-file", "--batch"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE
+        )
+        try:
+            for path, file_name in wanted:
+                batch.stdin.write(f"HEAD:{path}\n".encode("utf-8"))
+                batch.stdin.flush()
+                header = batch.stdout.readline().split()
+                if len(header) != 3:
+                    continue
+                content = batch.stdout.read(int(header[2]))
+                batch.stdout.read(1)
+                yield path, file_name, content.decode("utf-8", errors="replace")
+        finally:
+            batch.stdin.close()
+            batch.wait()
@@ -0,0 +1,282 @@
+import re
+import tomli
+import yaml
+from typing import Dict, List, Optional, Tuple
+from utils import dependency_extractor
+from utils.dependency_graph import DependencyGraph
+
+NPM_DEPENDENCY_FIELDS = ("dependencies", "devDependencies", "optionalDependencies", "peerDependencies")
+YARN_DEPENDENCY_LINE = re.compile(r'^"?([^"\s:]+)"?:?\s+"?(.*?)"?$')
+GEM_SPEC_LINE = re.compile(r"^(\S+?)!?(?: \((.*)\))?$")
+POD_SPEC_LINE = re.compile(r"^(.+?)(?: \((.*)\))?$")
+
+class LockfileGraphs:
+    """Builds the full dependency graph recorded in a lockfile.
+
+    Every builder returns a frozen `DependencyGraph` whose direct flags mark
+    what the project itself asked for, or None when the content cannot be
+    parsed.
+    """
+    @staticmethod
+    def package_lock_json(content: str) -> Optional[DependencyGraph]:
+        """Builds the graph of a package-lock.json (lockfile v1, v2 or v3)."""
+        try:
+            data = dependency_extractor.json_loads(content)
+        except ValueError:
+            return None
+        graph = DependencyGraph("NPM")
+        if data.get("packages"):
+            LockfileGraphs._npm_packages(graph, data["packages"])
+        else:
+            LockfileGraphs._npm_dependencies(graph, data.get("dependencies") or {}, [])
+        return graph.freeze()
+
+    @staticmethod
+    def _npm_packages(graph: DependencyGraph, packages: Dict):
+        """Reads the v2/v3 `packages` map keyed by install path."""
+        ids = {}
+        for path, info in packages.items():
+            if "node_modules/" in path and not info.get("link"):
+                name = info.get("name") or path.rsplit("node_modules/", 1)[-1]
+                ids[path] = graph.node(name, info.get("version", ""))
+
+        def locate(path: str, name: str) -> Optional[int]:
+            # Node's resolution: the nearest node_modules walking up the tree.
+            while True:
+                candidate = f"{path}/node_modules/{name}" if path else f"node_modules/{name}"
+                if candidate in ids:
+                    return ids[candidate]
+                if not path:
+                    return None
+                index = path.rfind("/node_modules/")
+                path = path[:index] if index >= 0 else ""
+
+        for path, info in packages.items():
+            if info.get("link"):
+                continue
+            # The root ("") and workspace folders are the project itself.
+            project = "node_modules/" not in path
+            for field in NPM_DEPENDENCY_FIELDS:
+                for name in info.get(field) or {}:
+                    child = locate(path, name)
+                    if child is None:
+                        continue
+                    if project:
+                        graph.mark_direct(child)
+                    else:
+                        graph.add_edge(ids[path], child)
+
+    @staticmethod
+    def _npm_dependencies(graph: DependencyGraph, dependencies: Dict, scopes: List[Dict]):
+        """Reads the nested v1 `dependencies` map, resolving `requires` upwards."""
+        scopes = scopes + [dependencies]
+        for name, info in dependencies.items():
+            node = graph.node(name, info.get("version", ""))
+            nested = info.get("dependencies") or {}
+            lookup = scopes + [nested]
+            for child in info.get("requires") or {}:
+                for scope in reversed(lookup):
+                    if child in scope:
+                        graph.add_edge(node, graph.node(child, scope[child].get("version", "")))
+                        break
+            if nested:
+                LockfileGraphs._npm_dependencies(graph, nested, scopes)
+
+    @staticmethod
+    def pnpm_lock_yaml(content: str) -> Optional[DependencyGraph]:
+        """Builds the graph of a pnpm-lock.yaml (lockfile v5 to v9)."""
+        try:
+            data = dependency_extractor.load_yaml(content) or {}
+        except yaml.YAMLError:
+            return None
+        try:
+            legacy = int(str(data.get("lockfileVersion", "5")).split(".")[0]) < 6
+        except ValueError:
+            legacy = False
+
+        graph = DependencyGraph("NPM")
+        # v9 moved the dependency lists from `packages` to `snapshots`.
+        for key, info in (data.get("snapshots") or data.get("packages") or {}).items():
+            node = graph.node(*LockfileGraphs._pnpm_key(key, legacy))
+            for field in ("dependencies", "optionalDependencies"):
+                for name, version in ((info or {}).get(field) or {}).items():
+                    graph.add_edge_by_name(node, name, LockfileGraphs._pnpm_version(version, legacy))
+
+        for project in (data.get("importers") or {}).values() or [data]:
+            for field in ("dependencies", "devDependencies", "optionalDependencies"):
+                for name, spec in (project.get(field) or {}).items():
+                    version = spec.get("version", "") if isinstance(spec, dict) else spec
+                    if str(version).startswith("link:"):
+                        continue
+                    graph.mark_direct(graph.resolve(name, LockfileGraphs._pnpm_version(version, legacy)))
+        return graph.freeze()
+
+    @staticmethod
+    def _pnpm_key(key: str, legacy: bool) -> Tuple[str, str]:
+        """Splits `/name/1.0.0_peer` (v5) or `/name@1.0.0(peer)` (v6+) keys."""
+        key = key.lstrip("/").split("(")[0]
+        if legacy:
+            name, _, version = key.rpartition("/")
+            return name, version.split("_")[0]
+        name, _, version = key.rpartition("@")
+        return name, version
+
+    @staticmethod
+    def _pnpm_version(version, legacy: bool) -> str:
+        version = str(version).split("(")[0]
+        return version.split("_")[0] if legacy else version
+
+    @staticmethod
+    def yarn_lock(content: str) -> DependencyGraph:
+        """Builds the graph of a yarn.lock, classic (v1) or Berry format."""
+        graph = DependencyGraph("NPM")
+        entries = []
+        specs = {}
+        current = None
+        in_dependencies = False
+        for line in content.splitlines():
+            text = line.strip()
+            if not text or text.startswith("#"):
+                continue
+            indent = len(line) - len(line.lstrip())
+            if indent == 0:
+                keys = [key.strip().strip('"') for key in text.rstrip(":").split(",")]
+                current = None if keys == ["__metadata"] else {"keys": keys, "version": "", "children": []}
+                if current:
+                    entries.append(current)
+                in_dependencies = False
+            elif current is None:
+                continue
+            elif indent <= 2:
+                in_dependencies = text in ("dependencies:", "optionalDependencies:")
+                if text.startswith("version"):
+                    current["version"] = text[len("version"):].lstrip(": ").strip('"')
+            elif in_dependencies:
+                match = YARN_DEPENDENCY_LINE.match(text)
+                if match:
+                    current["children"].append(match.groups())
+
+        for entry in entries:
+            if not any("@workspace:" in key for key in entry["keys"]):
+                name = entry["keys"][0][:entry["keys"][0].find("@", 1)]
+                entry["node"] = graph.node(name, entry["version"])
+                for key in entry["keys"]:
+                    specs[key] = entry["node"]
+
+        for entry in entries:
+            for name, version_range in entry["children"]:
+                child = specs.get(f"{name}@{version_range}")
+                if child is None:
+                    child = graph.resolve(name)
+                if "node" in entry:
+                    graph.add_edge(entry["node"], child)
+                else:
+                    graph.mark_direct(child)
+        return graph.freeze()
+
+    @staticmethod
+    def cargo_lock(content: str) -> Optional[DependencyGraph]:
+        """Builds the graph of a Cargo.lock; packages without a source are workspace members."""
+        try:
+            packages = tomli.loads(content).get("package", [])
+        except tomli.TomlDecodeError:
+            return None
+        graph = DependencyGraph("RUST")
+        members = {package.get("name") for package in packages if "source" not in package}
+        for package in packages:
+            if "source" in package:
+                graph.node(package.get("name", ""), package.get("version", ""))
+
+        for package in packages:
+            member = "source" not in package
+            parent = None if member else graph.node(package.get("name", ""), package.get("version", ""))
+            for dependency in package.get("dependencies", []):
+                # "name", "name version" or "name version (source)"
+                parts = dependency.split(" ")
+                name, version = parts[0], parts[1] if len(parts) > 1 else None
+                if name in members:
+                    continue
+                if member:
+                    graph.mark_direct(graph.resolve(name, version))
+                else:
+                    graph.add_edge_by_name(parent, name, version)
+        return graph.freeze()
+
+    @staticmethod
+    def gemfile_lock(content: str) -> DependencyGraph:
+        """Builds the graph of a Gemfile.lock from its specs and DEPENDENCIES sections."""
+        graph = DependencyGraph("RUBYGEMS")
+        section = None
+        parent = None
+        direct = []
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            indent = len(line) - len(line.lstrip())
+            match = GEM_SPEC_LINE.match(line.strip())
+            if indent == 0:
+                section = line.strip()
+            elif section == "DEPENDENCIES" and indent == 2 and match:
+                direct.append(match.group(1))
+            elif section in ("GEM", "GIT", "PATH") and match:
+                if indent == 4:
+                    parent = graph.node(match.group(1), match.group(2) or "")
+                elif indent == 6 and parent is not None:
+                    graph.add_edge_by_name(parent, match.group(1))
+        for name in direct:
+            graph.mark_direct(graph.resolve(name))
+        return graph.freeze()
+
+    @staticmethod
+    def composer_lock(content: str) -> Optional[DependencyGraph]:
+        """Builds the graph of a composer.lock, ignoring php and extension requirements."""
+        try:
+            data = dependency_extractor.json_loads(content)
+        except ValueError:
+            return None
+        graph = DependencyGraph("COMPOSER")
+        for package in (data.get("packages") or []) + (data.get("packages-dev") or []):
+            parent = graph.node(package.get("name", ""), package.get("version", ""))
+            for name in package.get("require") or {}:
+                if "/" in name:
+                    graph.add_edge_by_name(parent, name)
+        return graph.freeze()
+
+    @staticmethod
+    def podfile_lock(content: str) -> DependencyGraph:
+        """Builds the graph of a Podfile.lock from its PODS and DEPENDENCIES sections."""
+        graph = DependencyGraph("COCOAPODS")
+        section = None
+        parent = None
+        direct = []
+        for line in content.splitlines():
+            text = line.strip()
+            indent = len(line) - len(line.lstrip())
+            if indent == 0:
+                section = text.rstrip(":")
+                continue
+            if not text.startswith("- "):
+                continue
+            match = POD_SPEC_LINE.match(text[2:].rstrip(":").strip('"'))
+            if not match:
+                continue
+            if section == "DEPENDENCIES" and indent == 2:
+                direct.append(match.group(1))
+            elif section == "PODS" and indent == 2:
+                parent = graph.node(match.group(1), match.group(2) or "")
+            elif section == "PODS" and indent == 4 and parent is not None:
+                graph.add_edge_by_name(parent, match.group(1))
+        for name in direct:
+            graph.mark_direct(graph.resolve(name))
+        return graph.freeze()
+
+# Lockfiles that record the whole resolved tree, mapped to their graph builder.
+GRAPH_PARSERS = {
+    "package-lock.json": LockfileGraphs.package_lock_json,
+    "yarn.lock": LockfileGraphs.yarn_lock,
+    "pnpm-lock.yaml": LockfileGraphs.pnpm_lock_yaml,
+    "Gemfile.lock": LockfileGraphs.gemfile_lock,
+    "composer.lock": LockfileGraphs.composer_lock,
+    "Cargo.lock": LockfileGraphs.cargo_lock,
+    "Podfile.lock": LockfileGraphs.podfile_lock,
+}
@@ -0,0 +1,64 @@
+import fnmatch
+from typing import Iterable, Iterator, List, Optional, Tuple
+from utils.dependency_extractor import MANIFEST_PARSERS
+
+# Directories holding vendored code, build output or test data rather than
+# the project's own manifests.
+DEFAULT_SKIP_DIRS = {
+    "node_modules",
+    "bower_components",
+    "vendor",
+    "third_party",
+    ".git",
+    "fixtures",
+    "__fixtures__",
+    "testdata",
+    "test-fixtures",
+}
+
+class ManifestDiscovery:
+    """Finds manifests at any depth of a repository tree.
+
+    Paths are matched against the manifest registry by file name (or by
+    extension for registry entries such as ".csproj"), then filtered by the
+    skip list and the include/exclude globs.
+    """
+    def __init__(self, include: List[str] = None, exclude: List[str] = None, skip_dirs: Iterable[str] = None):
+        self.include = include or []
+        self.exclude = exclude or []
+        self.skip_dirs = set(DEFAULT_SKIP_DIRS if skip_dirs is None else skip_dirs)
+        self.extensions = [name for name in MANIFEST_PARSERS if name.startswith(".")]
+
+    def parser_name(self, path: str) -> Optional[str]:
+        """Returns the registry name of the parser for `path`, if it is a manifest."""
+        file_name = path.rsplit("/", 1)[-1]
+        if file_name in MANIFEST_PARSERS:
+            return file_name
+        for extension in self.extensions:
+            if file_name.endswith(extension):
+                return extension
+        return None
+
+    def skip_directory(self, path: str) -> bool:
+        """Checks whether nothing below directory `path` should be considered."""
+        return path.rsplit("/", 1)[-1] in self.skip_dirs or any(
+            fnmatch.fnmatch(path, pattern) or fnmatch.fnmatch(f"{path}/", pattern) for pattern in self.exclude
+        )
+
+    def wanted(self, path: str) -> bool:
+        directories = path.split("/")[:-1]
+        if any(directory in self.skip_dirs for directory in directories):
+            return False
+        if any(fnmatch.fnmatch(path, pattern) for pattern in self.exclude):
+            return False
+        return not self.include or any(fnmatch.fnmatch(path, pattern) for pattern in self.include)
+
+    def manifests(self, paths: Iterable[str]) -> Iterator[Tuple[str, str]]:
+        """Yields `(path, parser name)` for every wanted manifest, shallowest first."""
+        found = []
+        for path in paths:
+            name = self.parser_name(path)
+            if name and self.wanted(path):
+                found.append((path.count("/"), path, name))
+        for _, path, name in sorted(found):
+            yield path, name
@@ -0,0 +1,83 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Repository metadata fields by the API call that fetches them, so a stale
+# group costs exactly one request to refresh.
+FIELD_GROUPS = {
+    "repository": ("name", "description", "stars", "forks"),
+    "collaborators": ("collaborators",),
+    "languages": ("languages",),
+}
+DEFAULT_TTLS = {"repository": 86400, "collaborators": 7 * 86400, "languages": 7 * 86400}
+
+class MetadataCache:
+    """SQLite store of repository metadata that outlives a run.
+
+    Entries are keyed by the lower-cased `owner/repo` and every field group
+    remembers when it was fetched, so each group expires on its own TTL:
+    stars move daily while languages rarely do. The last `pushed_at` seen
+    is kept to refresh recently active repositories first. Worker threads
+    share the connection under a lock.
+    """
+    def __init__(self, file_name: str, ttls: Dict[str, float] = None):
+        self.file_name = file_name
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        unknown = set(self.ttls) - set(FIELD_GROUPS)
+        if unknown:
+            raise Exception(f"Unknown metadata field groups: {', '.join(sorted(unknown))}")
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(file_name, timeout=60, isolation_level=None,
+                                          check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(f"""
+            CREATE TABLE IF NOT EXISTS metadata (
+                key TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                pushed_at TEXT,
+                {", ".join(f"{group}_at REAL" for group in FIELD_GROUPS)}
+            )
+        """)
+
+    def entries(self, repositories: Iterable[Tuple[str, str]]) -> Dict[str, Tuple[Dict, List[str], Optional[str]]]:
+        """Returns `(metadata, stale groups, pushed_at)` for the cached repositories among
+        `(owner, repo)` pairs, keyed by lower-cased `owner/repo`."""
+        keys = list(dict.fromkeys(f"{owner}/{repo}".lower() for owner, repo in repositories))
+        columns = ", ".join(f"{group}_at" for group in FIELD_GROUPS)
+        now = time.time()
+        found = {}
+        with self.lock:
+            # Stay below SQLite's limit on bound parameters.
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                rows = self.connection.execute(
+                    f"SELECT key, data, pushed_at, {columns} FROM metadata "
+                    f"WHERE key IN ({', '.join('?' * len(batch))})", batch
+                ).fetchall()
+                for key, data, pushed_at, *fetched in rows:
+                    stale = [
+                        group for group, fetched_at in zip(FIELD_GROUPS, fetched)
+                        if fetched_at is None or now - fetched_at >= self.ttls[group]
+                    ]
+                    found[key] = (json.loads(data), stale, pushed_at)
+        return found
+
+    def store(self, owner: str, repo: str, metadata: Dict, groups: List[str], pushed_at: str = None):
+        """Saves a repository's metadata, marking `groups` as fetched now."""
+        key = f"{owner}/{repo}".lower()
+        now = time.time()
+        assignments = "".join(f", {group}_at = excluded.{group}_at" for group in groups)
+        columns = ", ".join(f"{group}_at" for group in groups)
+        with self.lock:
+            self.connection.execute(f"""
+                INSERT INTO metadata (key, data, pushed_at{", " if groups else ""}{columns})
+                VALUES (?, ?, ?{", ?" * len(groups)})
+                ON CONFLICT (key) DO UPDATE SET data = excluded.data,
+                pushed_at = COALESCE(excluded.pushed_at, metadata.pushed_at){assignments}
+            """, (key, json.dumps(metadata), pushed_at, *([now] * len(groups))))
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,177 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
+class Metrics:
+    """Thread-safe counters, gauges and latency histograms for a run.
+
+    Everything is kept in process memory and rendered on demand in the
+    Prometheus text exposition format, so a scan can be scraped through the
+    node exporter's textfile collector without a running HTTP endpoint.
+    """
+    PREFIX = "dependency_analyzer_"
+    BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters: Dict[Tuple, float] = {}
+        self.gauges: Dict[Tuple, float] = {}
+        self.histograms: Dict[Tuple, list] = {}
+        self.descriptions: Dict[str, str] = {}
+        self.started = time.time()
+
+    def describe(self, name: str, description: str):
+        """Sets the HELP text exported for a metric."""
+        self.descriptions[name] = description
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Increments a counter."""
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        """Sets a gauge to its latest value."""
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.gauges[key] = value
+
+    def observe(self, name: str, value: float, **labels):
+        """Records a sample in a histogram."""
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                # Per-bucket counts followed by the sum and count of samples.
+                histogram = self.histograms[key] = [0] * len(self.BUCKETS) + [0.0, 0]
+            for index, bound in enumerate(self.BUCKETS):
+                if value <= bound:
+                    histogram[index] += 1
+                    break
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Observes the wall time of the enclosed block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def render(self) -> str:
+        """Returns all metrics in the Prometheus text exposition format."""
+        with self.lock:
+            counters = sorted(self.counters.items())
+            gauges = sorted(self.gauges.items())
+            histograms = sorted(self.histograms.items())
+
+        lines = []
+        declared = set()
+
+        def declare(name, kind):
+            if name not in declared:
+                declared.add(name)
+                if name in self.descriptions:
+                    lines.append(f"# HELP {self.PREFIX}{name} {self.descriptions[name]}")
+                lines.append(f"# TYPE {self.PREFIX}{name} {kind}")
+
+        for (name, labels), value in counters:
+            declare(name, "counter")
+            lines.append(f"{self.PREFIX}{name}{_labels(labels)} {value}")
+        for (name, labels), value in gauges:
+            declare(name, "gauge")
+            lines.append(f"{self.PREFIX}{name}{_labels(labels)} {value}")
+        for (name, labels), histogram in histograms:
+            declare(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(self.BUCKETS, histogram):
+                cumulative += count
+                lines.append(f"{self.PREFIX}{name}_bucket{_labels(labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{self.PREFIX}{name}_bucket{_labels(labels + (('le', '+Inf'),))} {histogram[-1]}")
+            lines.append(f"{self.PREFIX}{name}_sum{_labels(labels)} {histogram[-2]}")
+            lines.append(f"{self.PREFIX}{name}_count{_labels(labels)} {histogram[-1]}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, file_name: str):
+        """Atomically writes the metrics so a collector never reads a partial file."""
+        temporary = f"{file_name}.{os.getpid()}.tmp"
+        with open(temporary, mode="w", encoding="utf-8") as file:
+            file.write(self.render())
+        os.replace(temporary, file_name)
+
+    def export_periodically(self, file_name: str, interval: float = 15.0):
+        """Rewrites the textfile every `interval` seconds on a daemon thread."""
+        def export():
+            while True:
+                time.sleep(interval)
+                self.write_textfile(file_name)
+
+        threading.Thread(target=export, name="metrics-export", daemon=True).start()
+
+    def summary(self) -> str:
+        """Returns a short human-readable summary of the run."""
+        with self.lock:
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+            histograms = dict(self.histograms)
+
+        def total(metric, **match):
+            return sum(
+                value for (name, labels), value in counters.items()
+                if name == metric and all(dict(labels).get(k) == v for k, v in match.items())
+            )
+
+        elapsed = time.time() - self.started
+        lines = [f"Run summary ({elapsed:.1f}s):"]
+
+        requests = {}
+        for (name, labels), value in counters.items():
+            if name == "http_requests_total":
+                labels = dict(labels)
+                requests.setdefault(labels["endpoint"], {})[labels["status"]] = value
+        for endpoint, statuses in sorted(requests.items()):
+            latency = histograms.get(("http_request_duration_seconds", (("endpoint", endpoint),)))
+            mean = f", mean {latency[-2] / latency[-1] * 1000:.0f}ms" if latency and latency[-1] else ""
+            by_status = ", ".join(f"{status}: {int(count)}" for status, count in sorted(statuses.items()))
+            lines.append(f"  HTTP {endpoint}: {int(sum(statuses.values()))} requests ({by_status}{mean})")
+
+        hits, misses = total("cache_hits_total"), total("cache_misses_total")
+        if hits or misses:
+            lines.append(f"  Cache: {int(hits)} hits, {int(misses)} misses")
+
+        parse_time = sum(h[-2] for (name, _), h in histograms.items() if name == "parse_duration_seconds")
+        parsed = sum(h[-1] for (name, _), h in histograms.items() if name == "parse_duration_seconds")
+        if parsed:
+            lines.append(f"  Parsing: {int(parsed)} manifests in {parse_time:.2f}s")
+
+        for (name, labels), value in sorted(counters.items()):
+            if name == "rows_written_total":
+                lines.append(f"  Rows written to {dict(labels)['file']}: {int(value)}")
+
+        for (name, labels), value in sorted(gauges.items()):
+            if name == "rate_limit_remaining":
+                lines.append(f"  Rate limit remaining ({dict(labels)['resource']}): {int(value)}")
+        return "\n".join(lines)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+metrics = Metrics()
+metrics.describe("http_requests_total", "GitHub API requests by endpoint and status code.")
+metrics.describe("http_request_duration_seconds", "GitHub API request latency by endpoint.")
+metrics.describe("cache_hits_total", "Lookups answered from a cache.")
+metrics.describe("cache_misses_total", "Lookups that had to go to the API.")
+metrics.describe("parse_duration_seconds", "Time spent parsing a manifest, by parser.")
+metrics.describe("rows_written_total", "Rows written, by output file.")
+metrics.describe("rate_limit_remaining", "Requests left in the current GitHub rate-limit window.")
+metrics.describe("files_incomplete_total", "Files skipped by a repository time budget or a request timeout.")
+metrics.describe("probes_skipped_total", "Root manifest probes skipped because of the repository's languages.")
@@ -0,0 +1,150 @@
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+
+class StageProfiler:
+    """Profiles the pipeline stage by stage.
+
+    Each stage (discovery, fetch, parse, match, write) gets its own cProfile
+    profile per thread, merged into one `<stage>.pstats` dump at the end. A
+    sampler thread additionally records the stacks of threads inside a stage
+    into `stacks.collapsed`, ready for flamegraph.pl or speedscope.
+
+    With `every=N` only one repository in N is profiled, chosen by a stable
+    hash so the same repository is sampled in every stage.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.output_dir = None
+        self.every = 1
+        self.sample_interval = 0.005
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.profiles = []
+        self.active = {}
+        self.stacks = Counter()
+        self.unkeyed = Counter()
+
+    def configure(self, output_dir: str, every: int = 1, sample_interval: float = 0.005):
+        """Turns profiling on, writing results to `output_dir` when dumped."""
+        os.makedirs(output_dir, exist_ok=True)
+        self.output_dir = output_dir
+        self.every = max(1, every)
+        self.sample_interval = sample_interval
+        self.enabled = True
+        threading.Thread(target=self._sample, name="profiler-sampler", daemon=True).start()
+
+    def sampled(self, stage: str, repo: str = None) -> bool:
+        """Returns True if this unit of work should be profiled."""
+        if repo is not None:
+            return zlib.crc32(repo.lower().encode("utf-8")) % self.every == 0
+        # Work not tied to one repository, like a batch of output rows.
+        with self.lock:
+            self.unkeyed[stage] += 1
+            return (self.unkeyed[stage] - 1) % self.every == 0
+
+    @contextmanager
+    def stage(self, name: str, repo: str = None):
+        """Profiles the enclosed block as part of stage `name`."""
+        if not self.enabled or not self.sampled(name, repo):
+            yield
+            return
+
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+            self.local.profiles = {}
+        profile = self.local.profiles.get(name)
+        if profile is None:
+            profile = self.local.profiles[name] = cProfile.Profile()
+
+        # Only one profile can be active per thread, so an enclosing stage is
+        # paused while a nested one runs.
+        if stack:
+            stack[-1][1].disable()
+        stack.append((name, profile))
+        thread_id = threading.get_ident()
+        self.active[thread_id] = name
+        enabled = self._enable(profile)
+        if enabled and not getattr(profile, "collected", False):
+            # Registered once it has run, since a profile that never did
+            # cannot be loaded into pstats.
+            profile.collected = True
+            with self.lock:
+                self.profiles.append((name, profile))
+        try:
+            yield
+        finally:
+            if enabled:
+                profile.disable()
+            stack.pop()
+            if stack:
+                self.active[thread_id] = stack[-1][0]
+                self._enable(stack[-1][1])
+            else:
+                self.active.pop(thread_id, None)
+
+    @staticmethod
+    def _enable(profile: cProfile.Profile) -> bool:
+        """Starts `profile`, or leaves the stage to the sampler when it cannot.
+
+        From Python 3.12 cProfile runs on sys.monitoring, which allows one
+        active profiler per process, so a stage entered while another thread
+        is being profiled raises ValueError instead of profiling.
+        """
+        try:
+            profile.enable()
+            return True
+        except ValueError:
+            return False
+
+    def dump(self):
+        """Writes merged pstats, a text report per stage and the collapsed stacks."""
+        if not self.enabled:
+            return
+        self.enabled = False
+
+        by_stage = {}
+        with self.lock:
+            for name, profile in self.profiles:
+                by_stage.setdefault(name, []).append(profile)
+        for name, profiles in by_stage.items():
+            stats = pstats.Stats(profiles[0])
+            for profile in profiles[1:]:
+                stats.add(profile)
+            stats.dump_stats(os.path.join(self.output_dir, f"{name}.pstats"))
+            with open(os.path.join(self.output_dir, f"{name}.txt"), mode="w", encoding="utf-8") as file:
+                stats.stream = file
+                stats.sort_stats("cumulative").print_stats(40)
+
+        with self.lock:
+            stacks = self.stacks.most_common()
+        with open(os.path.join(self.output_dir, "stacks.collapsed"), mode="w", encoding="utf-8") as file:
+            for stack, count in stacks:
+                file.write(f"{stack} {count}\n")
+        print(f"Profiles for {', '.join(sorted(by_stage))} written to {self.output_dir}")
+
+    def _sample(self):
+        while self.enabled:
+            time.sleep(self.sample_interval)
+            frames = sys._current_frames()
+            for thread_id, stage in list(self.active.items()):
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                calls = []
+                while frame is not None:
+                    code = frame.f_code
+                    calls.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                calls.append(stage)
+                with self.lock:
+                    self.stacks[";".join(reversed(calls))] += 1
+
+profiler = StageProfiler()
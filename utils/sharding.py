@@ -0,0 +1,37 @@
+import hashlib
+
+class Shard:
+    """Selects a stable subset of repositories by hashing `owner/repo`.
+
+    The hash is independent of the process and Python version, so every host
+    running `--shard i/N` over the same input agrees on who owns which repo.
+    """
+    def __init__(self, index: int, count: int):
+        if count < 1 or not 0 <= index < count:
+            raise ValueError(f"Invalid shard {index}/{count}")
+        self.index = index
+        self.count = count
+
+    @staticmethod
+    def parse(value: str) -> "Shard":
+        """Parses a shard specification of the form `i/N`."""
+        try:
+            index, count = value.split("/")
+            return Shard(int(index), int(count))
+        except ValueError:
+            raise ValueError(f"Expected a shard of the form i/N, got {value!r}")
+
+    @staticmethod
+    def shard_of(owner: str, repo: str, count: int) -> int:
+        """Returns the shard that owns `owner/repo` out of `count` shards."""
+        key = f"{owner}/{repo}".lower().encode("utf-8")
+        return int.from_bytes(hashlib.sha1(key).digest()[:8], "big") % count
+
+    def contains(self, owner: str, repo: str) -> bool:
+        """Returns True if `owner/repo` belongs to this shard."""
+        return self.shard_of(owner, repo, self.count) == self.index
+
+    def file_name(self, file_name: str) -> str:
+        """Returns the per-shard variant of an output file name."""
+        base, extension = file_name.rsplit(".", 1)
+        return f"{base}.shard-{self.index}-of-{self.count}.{extension}"
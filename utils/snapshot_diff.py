@@ -0,0 +1,95 @@
+import csv
+from operator import itemgetter
+from typing import Dict, Iterator, Tuple
+from utils.column_store import ColumnStoreReader
+from utils.external_sort import ExternalSorter
+
+# Columns identifying a dependency across snapshots, in sort order.
+DIFF_KEY = ("repo", "source_file", "ecosystem", "name")
+
+class SnapshotDiff:
+    """Compares two dependency snapshots, CSV files written by `CSVWriter` or
+    column stores written by `ColumnStoreWriter`.
+
+    Both snapshots are sorted by `DIFF_KEY` with an `ExternalSorter`, then
+    walked together in a single merge join, so memory is bounded by the sort
+    chunk size however many rows the snapshots hold. Rows sharing a key (a
+    package locked at several versions) are compared as one ";"-joined set.
+    """
+    def __init__(self, sorter: ExternalSorter = None):
+        self.sorter = sorter or ExternalSorter()
+
+    def diff(self, old_file: str, new_file: str) -> Iterator[Dict]:
+        """Yields a row for every dependency added, removed or changed between the snapshots."""
+        old = self.groups(self.sorter.sort(self.read(old_file)))
+        new = self.groups(self.sorter.sort(self.read(new_file)))
+        old_group, new_group = next(old, None), next(new, None)
+        while old_group or new_group:
+            if new_group is None or (old_group and old_group[0] < new_group[0]):
+                yield self.change(old_group[0], old_group[1], "", "removed")
+                old_group = next(old, None)
+            elif old_group is None or new_group[0] < old_group[0]:
+                yield self.change(new_group[0], "", new_group[1], "added")
+                new_group = next(new, None)
+            else:
+                if old_group[1] != new_group[1]:
+                    yield self.change(new_group[0], old_group[1], new_group[1], "changed")
+                old_group, new_group = next(old, None), next(new, None)
+
+    @staticmethod
+    def read(file_name: str) -> Iterator[str]:
+        """Yields each row of a snapshot as `DIFF_KEY` and the version joined with "\\0",
+        a string that sorts in key order."""
+        if ColumnStoreReader.is_column_store(file_name):
+            yield from SnapshotDiff.read_column_store(file_name)
+            return
+        with open(file_name, mode="r", newline="", encoding="utf-8", buffering=1024 * 1024) as file:
+            reader = csv.reader(file)
+            headers = next(reader, [])
+            columns = [headers.index(column) for column in DIFF_KEY]
+            version = headers.index("version")
+            operator = headers.index("operator") if "operator" in headers else None
+            key = itemgetter(*columns)
+            for row in reader:
+                try:
+                    record = "\0".join(key(row)) + "\0" + (row[operator] if operator is not None else "") + row[version]
+                except IndexError:
+                    # A truncated final line.
+                    continue
+                if "\n" in record:
+                    record = record.replace("\n", " ")
+                yield record
+
+    @staticmethod
+    def read_column_store(file_name: str) -> Iterator[str]:
+        """`read` for a column store, decoding only the columns the diff needs."""
+        with ColumnStoreReader(file_name) as reader:
+            columns = [*DIFF_KEY, *(["operator"] if "operator" in reader.headers else []), "version"]
+            for row in reader.iter_rows(columns):
+                record = "\0".join(row[:len(DIFF_KEY)]) + "\0" + "".join(row[len(DIFF_KEY):])
+                if "\n" in record:
+                    record = record.replace("\n", " ")
+                yield record
+
+    @staticmethod
+    def groups(records: Iterator[str]) -> Iterator[Tuple[str, str]]:
+        """Collapses sorted records into `(key, versions)`."""
+        key, versions = None, []
+        for record in records:
+            record_key, _, version = record.rpartition("\0")
+            if record_key != key:
+                if key is not None:
+                    yield key, ";".join(dict.fromkeys(versions))
+                key, versions = record_key, []
+            versions.append(version)
+        if key is not None:
+            yield key, ";".join(dict.fromkeys(versions))
+
+    @staticmethod
+    def change(key: str, old_version: str, new_version: str, change: str) -> Dict:
+        return {
+            **dict(zip(DIFF_KEY, key.split("\0"))),
+            "old_version": old_version,
+            "new_version": new_version,
+            "change": change,
+        }
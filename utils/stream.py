@@ -0,0 +1,49 @@
+import queue
+import threading
+from typing import Iterable, Iterator
+
+_DONE = object()
+
+def buffered(iterable: Iterable, max_size: int = 100) -> Iterator:
+    """Runs `iterable` on its own thread and yields its items through a bounded queue.
+
+    The producer blocks once `max_size` items are waiting, so a fast stage can
+    never run arbitrarily far ahead of a slow one. Exceptions raised by the
+    producer are re-raised in the consumer, and closing the returned generator
+    stops the producer at its next item.
+    """
+    items = queue.Queue(maxsize=max_size)
+    stopped = threading.Event()
+    failure = []
+
+    def put(item):
+        while not stopped.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except BaseException as e:
+            failure.append(e)
+        finally:
+            put(_DONE)
+
+    thread = threading.Thread(target=produce, name="stage", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                break
+            yield item
+        if failure:
+            raise failure[0]
+    finally:
+        stopped.set()
@@ -1,8 +1,56 @@
 import re
+from typing import List, Optional, Tuple
+
+# First path segments on github.com that are site pages, not repository owners.
+RESERVED_OWNERS = frozenset({
+    "about", "apps", "blog", "codespaces", "collections", "contact", "customer-stories",
+    "enterprise", "events", "explore", "features", "issues", "login", "marketplace",
+    "new", "notifications", "orgs", "organizations", "pricing", "pulls", "readme",
+    "search", "security", "settings", "site", "sponsors", "topics", "trending", "users",
+})
+
+# Owners are alphanumerics and hyphens; repository names may also hold dots
+# and underscores. The lookbehind keeps hosts such as notgithub.com out.
+GITHUB_REPOSITORY = re.compile(
+    r"(?<![\w.-])(?:https?://)?(?:www\.)?github\.com/([A-Za-z0-9-]{1,39})/([\w.-]{1,100})",
+    re.IGNORECASE,
+)
 
 class URLParser:
     """Extracts GitHub repository URLs from text."""
     @staticmethod
     def extract_github_urls(content):
-        """Extract repository URLs from the README content."""
-        return re.findall(r"https?://github\.com/[\w-]+/[\w-]+", content)
\ No newline at end of file
+        """Extract repository URLs from the README content, canonical and without duplicates."""
+        return [f"https://github.com/{owner}/{repo}" for owner, repo in URLParser.extract_repositories(content)]
+
+    @staticmethod
+    def extract_repositories(content: str) -> List[Tuple[str, str]]:
+        """Returns the `(owner, repo)` pairs linked from `content` in first-seen order.
+
+        Links are matched in one pass of a compiled pattern. Pairs differing only
+        in case are the same repository and are kept once, as first written;
+        site pages such as github.com/sponsors/... are dropped.
+        """
+        repositories = {}
+        # Exact repeats are dropped before any per-link work.
+        for owner, repo in dict.fromkeys(GITHUB_REPOSITORY.findall(content or "")):
+            repository = URLParser.normalize(owner, repo)
+            if repository:
+                repositories.setdefault(f"{repository[0]}/{repository[1]}".lower(), repository)
+        return list(repositories.values())
+
+    @staticmethod
+    def parse_repository(url: str) -> Optional[Tuple[str, str]]:
+        """Returns the `(owner, repo)` of a GitHub repository URL, or None if it is not one."""
+        match = GITHUB_REPOSITORY.search(url)
+        return URLParser.normalize(*match.groups()) if match else None
+
+    @staticmethod
+    def normalize(owner: str, repo: str) -> Optional[Tuple[str, str]]:
+        """Strips a `.git` suffix and trailing punctuation, rejecting reserved and invalid names."""
+        repo = repo.rstrip(".")
+        if repo.lower().endswith(".git"):
+            repo = repo[:-4]
+        if not repo or owner.lower() in RESERVED_OWNERS or owner.startswith("-") or owner.endswith("-"):
+            return None
+        return owner, repo
@@ -0,0 +1,108 @@
+import sqlite3
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+class WorkQueue:
+    """SQLite-backed queue of repositories leased out to worker processes.
+
+    A worker claims a repository for `lease_seconds`; if it dies without
+    completing it, the lease expires and another worker picks the repository
+    up. Only the worker holding the current lease can complete a job, which
+    is what lets the merge step discard output from abandoned attempts.
+    """
+    def __init__(self, file_name: str, lease_seconds: float = 600, max_attempts: int = 3):
+        self.file_name = file_name
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.connection = sqlite3.connect(file_name, timeout=60, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                key TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                repo TEXT NOT NULL,
+                url TEXT,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, lease_expires)"
+        )
+
+    def enqueue(self, repositories: Iterable[Tuple[str, str, str]]) -> int:
+        """Adds `(owner, repo, url)` jobs, ignoring repositories already queued."""
+        before = self.connection.total_changes
+        self.connection.execute("BEGIN")
+        try:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO jobs (key, owner, repo, url) VALUES (?, ?, ?, ?)",
+                ((f"{owner}/{repo}", owner, repo, url) for owner, repo, url in repositories)
+            )
+            self.connection.execute("COMMIT")
+        except Exception:
+            self.connection.execute("ROLLBACK")
+            raise
+        return self.connection.total_changes - before
+
+    def claim(self, worker: str) -> Optional[Dict]:
+        """Leases the next pending or expired job to `worker`.
+
+        Expired leases that used up their attempts are marked failed here, so
+        they do not stay leased forever.
+        """
+        now = time.time()
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            self.connection.execute("""
+                UPDATE jobs SET status = 'failed'
+                WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?
+            """, (now, self.max_attempts))
+            row = self.connection.execute("""
+                SELECT key, owner, repo, url FROM jobs
+                WHERE attempts < ? AND (
+                    status = 'pending' OR (status = 'leased' AND lease_expires < ?)
+                )
+                LIMIT 1
+            """, (self.max_attempts, now)).fetchone()
+            if row:
+                self.connection.execute("""
+                    UPDATE jobs SET status = 'leased', worker = ?, lease_expires = ?,
+                    attempts = attempts + 1 WHERE key = ?
+                """, (worker, now + self.lease_seconds, row[0]))
+            self.connection.execute("COMMIT")
+        except Exception:
+            self.connection.execute("ROLLBACK")
+            raise
+        if row:
+            return {"key": row[0], "owner": row[1], "repo": row[2], "url": row[3]}
+        return None
+
+    def complete(self, key: str, worker: str) -> bool:
+        """Marks a job done if `worker` still holds its lease."""
+        cursor = self.connection.execute(
+            "UPDATE jobs SET status = 'done' WHERE key = ? AND worker = ? AND status = 'leased'",
+            (key, worker)
+        )
+        return cursor.rowcount == 1
+
+    def release(self, key: str, worker: str):
+        """Returns a leased job to the queue so another worker can retry it, or
+        marks it failed once it has used up its attempts."""
+        self.connection.execute("""
+            UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+            worker = NULL WHERE key = ? AND worker = ? AND status = 'leased'
+        """, (self.max_attempts, key, worker))
+
+    def completed_by(self) -> Dict[str, str]:
+        """Maps each completed job to the worker whose output is authoritative."""
+        return dict(self.connection.execute("SELECT key, worker FROM jobs WHERE status = 'done'"))
+
+    def counts(self) -> Dict[str, int]:
+        """Returns the number of jobs in each status."""
+        return dict(self.connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"))
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,299 @@
+import fnmatch
+import posixpath
+import re
+import tomli
+import xml.etree.ElementTree as ET
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from utils import dependency_extractor
+from utils.dependency_extractor import DependencyExtractor, load_yaml, xml_children, _local_name
+
+PROPERTY = re.compile(r"\$\{([^}]+)\}")
+
+class WorkspaceResolver:
+    """Resolves the versions a manifest inherits from elsewhere in its repository.
+
+    Maven modules take `${property}` values and dependencyManagement versions
+    from their parent POMs, Cargo crates take `workspace = true` dependencies
+    from the workspace root, and npm workspace members refer to each other
+    with `workspace:` ranges. One resolver serves one repository: every
+    manifest is parsed once and cached, and each POM's effective properties
+    are built once on top of its parent's, so a build with hundreds of
+    modules resolves in linear time.
+
+    Manifests the caller has not passed to `resolve` yet are read with
+    `load`, which returns "" for a missing file. When the repository's
+    manifest `paths` are known, files outside them are never loaded.
+    """
+    FILE_NAMES = ("pom.xml", "Cargo.toml", "package.json")
+
+    def __init__(self, load: Callable[[str], str] = None, paths: Iterable[str] = None):
+        self.load = load
+        self.paths = set(paths) if paths is not None else None
+        self.poms: Dict[str, Optional[Dict]] = {}
+        # POM path -> (properties, managed versions) after inheritance.
+        self.effective_poms: Dict[str, Tuple[Dict, Dict]] = {}
+        # (groupId, artifactId) -> POM path, for parents found by coordinates.
+        self.coordinates: Dict[Tuple[str, str], str] = {}
+        self.tomls: Dict[str, Optional[Dict]] = {}
+        self.packages: Dict[str, Optional[Dict]] = {}
+        # npm workspace member name -> version, built on first use.
+        self.members: Optional[Dict[str, str]] = None
+
+    def resolve(self, path: str, file_name: str, content: str) -> List[Dict]:
+        """Parses a manifest like its plain parser would, with inherited versions filled in."""
+        if file_name == "pom.xml":
+            return self.resolve_pom(path, content)
+        if file_name == "Cargo.toml":
+            return self.resolve_cargo(path, content)
+        if file_name == "package.json":
+            return self.resolve_package(path, content)
+        return dependency_extractor.MANIFEST_PARSERS[file_name](content)
+
+    def read(self, path: str, listed: bool = True) -> str:
+        """Loads a file not passed in yet; `listed` files are only loaded when known to exist."""
+        if self.load is None or (listed and self.paths is not None and path not in self.paths):
+            return ""
+        try:
+            return self.load(path) or ""
+        except Exception as e:
+            print(f"Error loading {path} for version resolution: {e}")
+            return ""
+
+    # Maven
+
+    def resolve_pom(self, path: str, content: str) -> List[Dict]:
+        model = self.pom(path, content)
+        if model is None:
+            return DependencyExtractor.parse_pom_xml(content)
+        properties, managed = self.effective_pom(path, model)
+        dependencies = []
+        for fields in model["dependencies"]:
+            group = self.interpolate(fields.get("groupId", ""), properties)
+            name = self.interpolate(fields.get("artifactId", ""), properties)
+            version = fields.get("version") or managed.get((group, name), "")
+            dependencies.append({
+                "ecosystem": "MAVEN",
+                "name": name,
+                "operator": "==",
+                "version": self.interpolate(version, properties)
+            })
+        return dependencies
+
+    def pom(self, path: str, content: str = None) -> Optional[Dict]:
+        """Returns the parsed POM at `path`, loading it if it was not passed in."""
+        if path in self.poms:
+            return self.poms[path]
+        if content is None:
+            content = self.read(path)
+        model = None
+        if content:
+            try:
+                model = self.parse_pom(ET.fromstring(content))
+            except ET.ParseError:
+                pass
+        self.poms[path] = model
+        if model:
+            self.coordinates.setdefault((model["groupId"], model["artifactId"]), path)
+        return model
+
+    @staticmethod
+    def parse_pom(root: ET.Element) -> Dict:
+        """Reads the parts of a POM that versions are inherited through, ignoring namespaces."""
+        sections = {_local_name(child.tag): child for child in root}
+        fields = {name: (element.text or "").strip() for name, element in sections.items()}
+        parent = xml_children(sections["parent"]) if "parent" in sections else None
+        properties = xml_children(sections["properties"]) if "properties" in sections else {}
+        managed = []
+        if "dependencyManagement" in sections:
+            managed = [
+                xml_children(element) for element in sections["dependencyManagement"].iter()
+                if _local_name(element.tag) == "dependency"
+            ]
+        return {
+            "groupId": fields.get("groupId") or (parent or {}).get("groupId", ""),
+            "artifactId": fields.get("artifactId", ""),
+            "version": fields.get("version") or (parent or {}).get("version", ""),
+            "parent": parent,
+            "properties": properties,
+            "managed": managed,
+            # Every <dependency>, as parse_pom_xml reports them.
+            "dependencies": [xml_children(element) for element in root.iter() if _local_name(element.tag) == "dependency"],
+        }
+
+    def effective_pom(self, path: str, model: Dict) -> Tuple[Dict, Dict]:
+        """Returns the properties and managed versions of a POM after inheritance."""
+        effective = self.effective_poms.get(path)
+        if effective is not None:
+            return effective
+        # Guards against parent cycles while the chain is resolved.
+        self.effective_poms[path] = ({}, {})
+        parent_path = self.parent_path(path, model)
+        if parent_path:
+            properties, managed = (dict(values) for values in self.effective_pom(parent_path, self.poms[parent_path]))
+        else:
+            properties, managed = {}, {}
+        parent = model["parent"] or {}
+        for prefix in ("project.", "pom.", ""):
+            properties[f"{prefix}groupId"] = model["groupId"]
+            properties[f"{prefix}artifactId"] = model["artifactId"]
+            properties[f"{prefix}version"] = model["version"]
+        for field in ("groupId", "artifactId", "version"):
+            properties[f"project.parent.{field}"] = parent.get(field, "")
+        properties.update(model["properties"])
+        for fields in model["managed"]:
+            key = (self.interpolate(fields.get("groupId", ""), properties),
+                   self.interpolate(fields.get("artifactId", ""), properties))
+            # Kept raw: a child interpolates them with its own properties.
+            managed[key] = fields.get("version", "")
+        effective = self.effective_poms[path] = (properties, managed)
+        return effective
+
+    def parent_path(self, path: str, model: Dict) -> Optional[str]:
+        """Finds the parent POM in the repository by relativePath, then by coordinates."""
+        parent = model["parent"]
+        if not parent:
+            return None
+        coordinates = (parent.get("groupId", ""), parent.get("artifactId", ""))
+        relative = parent.get("relativePath", "../pom.xml")
+        if relative:
+            candidate = posixpath.normpath(posixpath.join(posixpath.dirname(path), relative))
+            if not candidate.endswith(".xml"):
+                candidate = posixpath.join(candidate, "pom.xml")
+            if candidate != path and not candidate.startswith(".."):
+                candidate_model = self.pom(candidate)
+                if candidate_model and (candidate_model["groupId"], candidate_model["artifactId"]) == coordinates:
+                    return candidate
+        candidate = self.coordinates.get(coordinates)
+        return candidate if candidate and candidate != path else None
+
+    @staticmethod
+    def interpolate(value: str, properties: Dict[str, str]) -> str:
+        """Expands `${name}` references, following properties that refer to others."""
+        for _ in range(10):
+            if "${" not in value:
+                break
+            expanded = PROPERTY.sub(lambda match: properties.get(match.group(1), match.group(0)), value)
+            if expanded == value:
+                break
+            value = expanded
+        return value
+
+    # Cargo
+
+    def resolve_cargo(self, path: str, content: str) -> List[Dict]:
+        data = self.toml(path, content)
+        if data is None:
+            return DependencyExtractor.parse_cargo_toml(content)
+        workspace = None
+        dependencies = []
+        for name, spec in data.get("dependencies", {}).items():
+            if isinstance(spec, dict) and spec.get("workspace"):
+                if workspace is None:
+                    workspace = self.cargo_workspace(path)
+                spec = workspace.get(name, "")
+            if isinstance(spec, dict):
+                # Path and git dependencies have no version.
+                spec = spec.get("version", "")
+            dependencies.append({
+                "ecosystem": "RUST",
+                "name": name,
+                "operator": "==",
+                "version": spec
+            })
+        return dependencies
+
+    def toml(self, path: str, content: str = None) -> Optional[Dict]:
+        if path not in self.tomls:
+            if content is None:
+                content = self.read(path)
+            try:
+                self.tomls[path] = tomli.loads(content) if content else None
+            except tomli.TomlDecodeError:
+                self.tomls[path] = None
+        return self.tomls[path]
+
+    def cargo_workspace(self, path: str) -> Dict:
+        """Returns `[workspace.dependencies]` of the nearest enclosing workspace root."""
+        directory = posixpath.dirname(path)
+        while True:
+            data = self.toml(posixpath.join(directory, "Cargo.toml") if directory else "Cargo.toml")
+            if data and isinstance(data.get("workspace"), dict):
+                return data["workspace"].get("dependencies", {})
+            if not directory:
+                return {}
+            directory = posixpath.dirname(directory)
+
+    # npm
+
+    def resolve_package(self, path: str, content: str) -> List[Dict]:
+        data = self.package(path, content)
+        if data is None:
+            return DependencyExtractor.parse_package_json(content)
+        dependencies = []
+        for name, spec in (data.get("dependencies") or {}).items():
+            if isinstance(spec, str) and spec.startswith("workspace:"):
+                spec = self.workspace_version(name, spec)
+            dependencies.append({
+                "ecosystem": "NPM",
+                "name": name,
+                "operator": "",
+                "version": spec
+            })
+        return dependencies
+
+    def package(self, path: str, content: str = None) -> Optional[Dict]:
+        if path not in self.packages:
+            if content is None:
+                content = self.read(path)
+            try:
+                data = dependency_extractor.json_loads(content) if content else None
+            except ValueError:
+                data = None
+            self.packages[path] = data if isinstance(data, dict) else None
+            if self.paths is None:
+                # Members are only known as they are seen.
+                self.members = None
+        return self.packages[path]
+
+    def workspace_version(self, name: str, spec: str) -> str:
+        """Turns a `workspace:` range into the range it is published with."""
+        version = self.workspace_members().get(name)
+        if not version:
+            return spec
+        range_ = spec[len("workspace:"):]
+        if range_ in ("", "*"):
+            return version
+        if range_ in ("^", "~"):
+            return range_ + version
+        return range_
+
+    def workspace_members(self) -> Dict[str, str]:
+        """Maps the names of the workspace's member packages to their versions."""
+        if self.members is not None:
+            return self.members
+        root = self.package("package.json") or {}
+        patterns = root.get("workspaces") or []
+        if isinstance(patterns, dict):
+            patterns = patterns.get("packages") or []
+        if not patterns:
+            try:
+                pnpm = load_yaml(self.read("pnpm-workspace.yaml", listed=False) or "{}")
+            except Exception:
+                pnpm = None
+            patterns = (pnpm.get("packages") or []) if isinstance(pnpm, dict) else []
+        include = [pattern.rstrip("/") for pattern in patterns if isinstance(pattern, str) and not pattern.startswith("!")]
+        exclude = [pattern[1:].rstrip("/") for pattern in patterns if isinstance(pattern, str) and pattern.startswith("!")]
+
+        members = {}
+        candidates = self.paths if self.paths is not None else list(self.packages)
+        for path in sorted(candidates):
+            if not path.endswith("/package.json"):
+                continue
+            directory = posixpath.dirname(path)
+            if (any(fnmatch.fnmatch(directory, pattern) for pattern in include)
+                    and not any(fnmatch.fnmatch(directory, pattern) for pattern in exclude)):
+                data = self.package(path)
+                if data and data.get("name") and isinstance(data.get("version"), str):
+                    members.setdefault(data["name"], data["version"])
+        self.members = members
+        return members